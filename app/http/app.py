@@ -8,6 +8,7 @@ from pkg.sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from .module import injector
 from internal.middleware import Middleware
+from internal.service import EmbeddingsService, RerankService
 
 dotenv.load_dotenv(override=True)  # 加载环境变量
 
@@ -26,5 +27,12 @@ app = Http(
 
 celery = app.extensions["celery"]
 
+# 根据应用配置初始化文本嵌入服务的查询向量缓存与批量嵌入引擎
+injector.get(EmbeddingsService).init_app(app)
+
+# 在后台线程中预热加载重排序模型，避免首次请求在延迟预算内加载模型
+if conf.RERANK_WARM_UP:
+    injector.get(RerankService).warm_up()
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -45,4 +45,70 @@ class Config:
             "broker_connection_retry_on_startup": _get_bool_env(
                 "CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP"
             ),
+            "imports": ["internal.schedule.retrieval_schedule"],
+            "beat_schedule": {
+                "flush-retrieval-records": {
+                    "task": "internal.schedule.retrieval_schedule.flush_retrieval_records",
+                    "schedule": float(_get_env("RETRIEVAL_RECORD_FLUSH_INTERVAL")),
+                },
+            },
         }
+
+        # 文档构建流水线配置，每个阶段拥有独立的工作线程数，阶段之间使用有界队列连接
+        self.INDEXING_PIPELINE = {
+            "parsing_workers": int(_get_env("INDEXING_PARSING_WORKERS")),
+            "splitting_workers": int(_get_env("INDEXING_SPLITTING_WORKERS")),
+            "indexing_workers": int(_get_env("INDEXING_INDEXING_WORKERS")),
+            "completed_workers": int(_get_env("INDEXING_COMPLETED_WORKERS")),
+            "queue_size": int(_get_env("INDEXING_PIPELINE_QUEUE_SIZE")),
+        }
+
+        # 文本嵌入配置，涵盖查询向量缓存以及批量嵌入引擎的批次大小与工作线程数
+        self.EMBEDDING_QUERY_CACHE_SIZE = int(_get_env("EMBEDDING_QUERY_CACHE_SIZE"))
+        self.EMBEDDING_QUERY_CACHE_TTL = int(_get_env("EMBEDDING_QUERY_CACHE_TTL"))
+        self.EMBEDDING_MAX_BATCH_SIZE = int(_get_env("EMBEDDING_MAX_BATCH_SIZE"))
+        self.EMBEDDING_MAX_BATCH_TOKENS = int(_get_env("EMBEDDING_MAX_BATCH_TOKENS"))
+        self.EMBEDDING_WORKERS = int(_get_env("EMBEDDING_WORKERS"))
+
+        # 智能体执行配置
+        self.AGENT_MAX_WORKERS = int(_get_env("AGENT_MAX_WORKERS"))
+        self.AGENT_TOOL_MAX_WORKERS = int(_get_env("AGENT_TOOL_MAX_WORKERS"))
+        self.AGENT_TOOL_MAX_INFLIGHT = int(_get_env("AGENT_TOOL_MAX_INFLIGHT"))
+        self.AGENT_EVENT_BUS = _get_env("AGENT_EVENT_BUS")
+        self.AGENT_EXECUTOR = _get_env("AGENT_EXECUTOR")
+
+        # API工具HTTP请求配置
+        self.API_TOOL_CONNECT_TIMEOUT = float(_get_env("API_TOOL_CONNECT_TIMEOUT"))
+        self.API_TOOL_READ_TIMEOUT = float(_get_env("API_TOOL_READ_TIMEOUT"))
+        self.API_TOOL_MAX_RETRIES = int(_get_env("API_TOOL_MAX_RETRIES"))
+        self.API_TOOL_POOL_MAXSIZE = int(_get_env("API_TOOL_POOL_MAXSIZE"))
+        self.API_TOOL_MAX_RESPONSE_BYTES = int(_get_env("API_TOOL_MAX_RESPONSE_BYTES"))
+
+        # 工具缓存配置
+        self.API_TOOL_CACHE_SIZE = int(_get_env("API_TOOL_CACHE_SIZE"))
+        self.BUILTIN_TOOL_CACHE_SIZE = int(_get_env("BUILTIN_TOOL_CACHE_SIZE"))
+
+        # 大语言模型客户端注册表配置
+        self.LLM_CLIENT_REGISTRY_SIZE = int(_get_env("LLM_CLIENT_REGISTRY_SIZE"))
+        self.LLM_MAX_CONNECTIONS = int(_get_env("LLM_MAX_CONNECTIONS"))
+
+        # 检索结果缓存配置
+        self.RETRIEVAL_CACHE_SIZE = int(_get_env("RETRIEVAL_CACHE_SIZE"))
+        self.RETRIEVAL_CACHE_TTL = int(_get_env("RETRIEVAL_CACHE_TTL"))
+
+        # 检索器注册表以及知识库权限缓存配置
+        self.RETRIEVER_REGISTRY_SIZE = int(_get_env("RETRIEVER_REGISTRY_SIZE"))
+        self.AUTHORIZED_DATASET_CACHE_SIZE = int(
+            _get_env("AUTHORIZED_DATASET_CACHE_SIZE")
+        )
+        self.AUTHORIZED_DATASET_CACHE_TTL = int(
+            _get_env("AUTHORIZED_DATASET_CACHE_TTL")
+        )
+
+        # 混合检索配置
+        self.HYBRID_RETRIEVAL_TIMEOUT = float(_get_env("HYBRID_RETRIEVAL_TIMEOUT"))
+
+        # 重排序配置
+        self.RERANK_TIMEOUT = float(_get_env("RERANK_TIMEOUT"))
+        self.RERANK_BATCH_SIZE = int(_get_env("RERANK_BATCH_SIZE"))
+        self.RERANK_WARM_UP = _get_bool_env("RERANK_WARM_UP")
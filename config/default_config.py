@@ -19,4 +19,53 @@ DEFAULT_CONFIG = {
     "CELERY_TASK_IGNORE_RESULT": "False",
     "CELERY_RESULT_EXPIRES": 3600,
     "CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP": "True",
+    # 文档构建流水线默认配置
+    "INDEXING_PARSING_WORKERS": 2,
+    "INDEXING_SPLITTING_WORKERS": 1,
+    "INDEXING_INDEXING_WORKERS": 2,
+    "INDEXING_COMPLETED_WORKERS": 2,
+    "INDEXING_PIPELINE_QUEUE_SIZE": 4,
+    # 文本嵌入默认配置，查询向量缓存的过期时间单位为秒
+    "EMBEDDING_QUERY_CACHE_SIZE": 10000,
+    "EMBEDDING_QUERY_CACHE_TTL": 3600,
+    "EMBEDDING_MAX_BATCH_SIZE": 64,
+    "EMBEDDING_MAX_BATCH_TOKENS": 16384,
+    "EMBEDDING_WORKERS": 1,
+    # 知识库检索记录批量写入数据库的时间间隔，单位为秒
+    "RETRIEVAL_RECORD_FLUSH_INTERVAL": 10,
+    # 进程内检索结果缓存的条目数以及过期时间，单位为秒
+    "RETRIEVAL_CACHE_SIZE": 2048,
+    "RETRIEVAL_CACHE_TTL": 600,
+    # 检索器注册表的条目数，以及账号有权限检索的知识库缓存的条目数与过期时间，单位为秒
+    "RETRIEVER_REGISTRY_SIZE": 1024,
+    "AUTHORIZED_DATASET_CACHE_SIZE": 4096,
+    "AUTHORIZED_DATASET_CACHE_TTL": 60,
+    # 单个进程同时执行的智能体数量
+    "AGENT_MAX_WORKERS": 64,
+    # 智能体单个步骤并行执行的工具调用数，以及单个进程同时执行的工具调用数(包括已超时但仍未结束的工具调用)
+    "AGENT_TOOL_MAX_WORKERS": 8,
+    "AGENT_TOOL_MAX_INFLIGHT": 32,
+    # 智能体事件总线类型(memory/redis_stream)，以及智能体的执行方式(thread/celery)，只有redis_stream支持celery
+    "AGENT_EVENT_BUS": "memory",
+    "AGENT_EXECUTOR": "thread",
+    # API工具HTTP请求的连接与读取超时时间(秒)、重试次数、每个主机的连接池大小以及返回给智能体的最大响应字节数
+    "API_TOOL_CONNECT_TIMEOUT": 5,
+    "API_TOOL_READ_TIMEOUT": 30,
+    "API_TOOL_MAX_RETRIES": 2,
+    "API_TOOL_POOL_MAXSIZE": 32,
+    "API_TOOL_MAX_RESPONSE_BYTES": 65536,
+    # 编译好的API工具以及内置工具实例的缓存条目数
+    "API_TOOL_CACHE_SIZE": 1024,
+    "BUILTIN_TOOL_CACHE_SIZE": 1024,
+    # 大语言模型客户端注册表缓存的模型实例数，以及所有模型实例共享的最大连接数
+    "LLM_CLIENT_REGISTRY_SIZE": 64,
+    "LLM_MAX_CONNECTIONS": 100,
+    # 混合检索中每个检索器的超时时间，单位为秒
+    "HYBRID_RETRIEVAL_TIMEOUT": 3,
+    # 重排序的延迟预算，超时后使用召回的原始排序，单位为秒
+    "RERANK_TIMEOUT": 0.5,
+    # 重排序模型单次推理的候选文档数
+    "RERANK_BATCH_SIZE": 16,
+    # 是否在应用创建时于后台线程中预热加载重排序模型
+    "RERANK_WARM_UP": "True",
 }
@@ -1,5 +1,23 @@
-from .base_agent import BaseAgent
-from .function_call_agent import FunctionCallAgent
+from .base_agent import BaseAgent, configure_agent_executor
+from .function_call_agent import FunctionCallAgent, configure_tool_concurrency
 from .agent_queue_manager import AgentQueueManager
+from .agent_event_bus import (
+    AgentEventBus,
+    MemoryAgentEventBus,
+    RedisStreamAgentEventBus,
+    configure_agent_event_bus,
+    get_agent_event_bus,
+)
 
-__all__ = ["BaseAgent", "FunctionCallAgent" "AgentQueueManager"]
+__all__ = [
+    "BaseAgent",
+    "FunctionCallAgent",
+    "AgentQueueManager",
+    "AgentEventBus",
+    "MemoryAgentEventBus",
+    "RedisStreamAgentEventBus",
+    "configure_agent_event_bus",
+    "get_agent_event_bus",
+    "configure_agent_executor",
+    "configure_tool_concurrency",
+]
@@ -0,0 +1,229 @@
+import os
+import queue
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from queue import Queue
+from typing import Optional
+from uuid import UUID
+
+from redis import Redis
+
+from internal.core.agent.entities.queue_entity import (
+    AgentEventBusType,
+    AgentThought,
+    QueueEvent,
+)
+from internal.entity.cache_entity import (
+    AGENT_TASK_STOPPED_CHANNEL,
+    AGENT_EVENT_STREAM,
+    AGENT_EVENT_STREAM_MAX_LEN,
+    AGENT_EVENT_STREAM_EXPIRE_TIME,
+)
+
+
+class AgentEventBus(ABC):
+    """智能体事件总线，负责在智能体与监听方之间传递事件，读取结果格式为[(cursor, agent_thought)]，agent_thought为None代表事件流结束"""
+
+    # 是否可以跨进程传递事件，只有跨进程的事件总线才支持在Celery中执行智能体
+    shared_across_processes: bool = False
+
+    @abstractmethod
+    def create(self, task_id: UUID) -> None:
+        """在智能体开始执行前创建任务对应的事件流"""
+        raise NotImplementedError("create()未实现")
+
+    @abstractmethod
+    def publish(self, task_id: UUID, agent_thought: AgentThought) -> None:
+        """发布事件到任务对应的事件流"""
+        raise NotImplementedError("publish()未实现")
+
+    @abstractmethod
+    def close(self, task_id: UUID) -> None:
+        """在事件流中添加结束标识"""
+        raise NotImplementedError("close()未实现")
+
+    @abstractmethod
+    def read(
+        self, task_id: UUID, cursor: str, timeout: float
+    ) -> list[tuple[str, Optional[AgentThought]]]:
+        """读取游标之后的事件，没有事件时最多阻塞timeout秒，超时返回空列表"""
+        raise NotImplementedError("read()未实现")
+
+    @abstractmethod
+    def stop(self, task_id: UUID) -> None:
+        """从任意进程向任务对应的事件流投递停止事件"""
+        raise NotImplementedError("stop()未实现")
+
+    def release(self, task_id: UUID) -> None:
+        """监听结束后释放任务占用的资源"""
+        pass
+
+
+class MemoryAgentEventBus(AgentEventBus):
+    """基于进程内存队列的事件总线，停止信号通过Redis发布订阅推送到持有队列的进程"""
+
+    def __init__(self, redis_client: Redis):
+        self.redis_client = redis_client
+        self._queues: dict[str, Queue] = {}
+        self._lock = threading.Lock()
+        self._stop_listener_pid: Optional[int] = None
+
+    def create(self, task_id: UUID) -> None:
+        self._start_stop_listener()
+        self._queue(task_id)
+
+    def publish(self, task_id: UUID, agent_thought: AgentThought) -> None:
+        # 监听结束后队列已释放，此时发布的事件直接丢弃，避免重新创建队列
+        q = self._queues.get(str(task_id))
+        if q is not None:
+            q.put(agent_thought)
+
+    def close(self, task_id: UUID) -> None:
+        q = self._queues.get(str(task_id))
+        if q is not None:
+            q.put(None)
+
+    def read(
+        self, task_id: UUID, cursor: str, timeout: float
+    ) -> list[tuple[str, Optional[AgentThought]]]:
+        # 1.阻塞等待第一个事件，内存队列不保留历史事件，游标始终为空
+        q = self._queue(task_id)
+        try:
+            items = [q.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+
+        # 2.一次性取出队列中已有的其他事件，直到遇到结束标识
+        while items[-1] is not None:
+            try:
+                items.append(q.get_nowait())
+            except queue.Empty:
+                break
+
+        return [("", item) for item in items]
+
+    def stop(self, task_id: UUID) -> None:
+        self.redis_client.publish(AGENT_TASK_STOPPED_CHANNEL, str(task_id))
+
+    def release(self, task_id: UUID) -> None:
+        with self._lock:
+            self._queues.pop(str(task_id), None)
+
+    def _queue(self, task_id: UUID) -> Queue:
+        """获取任务对应的队列，不存在时创建"""
+        with self._lock:
+            return self._queues.setdefault(str(task_id), Queue())
+
+    def _start_stop_listener(self) -> None:
+        """在当前进程中启动停止信号订阅线程，收到信号后向对应的任务队列添加停止事件"""
+        if self._stop_listener_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._stop_listener_pid == os.getpid():
+                return
+
+            def handle_message(message: dict) -> None:
+                task_id = message["data"]
+                if isinstance(task_id, bytes):
+                    task_id = task_id.decode()
+                self.publish(
+                    task_id,
+                    AgentThought(
+                        id=uuid.uuid4(),
+                        task_id=UUID(task_id),
+                        event=QueueEvent.STOP,
+                    ),
+                )
+                self.close(task_id)
+
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{AGENT_TASK_STOPPED_CHANNEL: handle_message})
+            pubsub.run_in_thread(sleep_time=1, daemon=True)
+            self._stop_listener_pid = os.getpid()
+
+
+class RedisStreamAgentEventBus(AgentEventBus):
+    """基于Redis Streams的事件总线，事件在过期前保留在流中，任意进程都可以从指定游标开始监听"""
+
+    shared_across_processes = True
+
+    def __init__(self, redis_client: Redis):
+        self.redis_client = redis_client
+
+    def create(self, task_id: UUID) -> None:
+        pass
+
+    def publish(self, task_id: UUID, agent_thought: AgentThought) -> None:
+        self._append(task_id, {"data": agent_thought.to_json()})
+
+    def close(self, task_id: UUID) -> None:
+        self._append(task_id, {"end": "1"})
+
+    def read(
+        self, task_id: UUID, cursor: str, timeout: float
+    ) -> list[tuple[str, Optional[AgentThought]]]:
+        # 1.使用阻塞的XREAD读取游标之后的事件，BLOCK为0代表永久阻塞，因此最少阻塞1毫秒
+        result = self.redis_client.xread(
+            {AGENT_EVENT_STREAM.format(task_id=task_id): cursor or "0-0"},
+            count=100,
+            block=max(int(timeout * 1000), 1),
+        )
+        if not result:
+            return []
+
+        # 2.解析事件，结束标识解析为None
+        items = []
+        for entry_id, fields in result[0][1]:
+            data = fields.get(b"data")
+            items.append(
+                (
+                    entry_id.decode(),
+                    None if data is None else AgentThought.from_json(data),
+                )
+            )
+        return items
+
+    def stop(self, task_id: UUID) -> None:
+        self.publish(
+            task_id,
+            AgentThought(id=uuid.uuid4(), task_id=task_id, event=QueueEvent.STOP),
+        )
+        self.close(task_id)
+
+    def _append(self, task_id: UUID, fields: dict) -> None:
+        """追加记录到事件流，同时裁剪长度并刷新过期时间"""
+        stream_key = AGENT_EVENT_STREAM.format(task_id=task_id)
+        pipeline = self.redis_client.pipeline(transaction=False)
+        pipeline.xadd(
+            stream_key, fields, maxlen=AGENT_EVENT_STREAM_MAX_LEN, approximate=True
+        )
+        pipeline.expire(stream_key, AGENT_EVENT_STREAM_EXPIRE_TIME)
+        pipeline.execute()
+
+
+_agent_event_bus: Optional[AgentEventBus] = None
+_agent_event_bus_type: str = AgentEventBusType.MEMORY
+_agent_event_bus_lock = threading.Lock()
+
+
+def configure_agent_event_bus(bus_type: str) -> None:
+    """根据配置设置事件总线类型，需要在首次获取事件总线之前调用"""
+    global _agent_event_bus_type
+    _agent_event_bus_type = bus_type
+
+
+def get_agent_event_bus(redis_client: Redis) -> AgentEventBus:
+    """根据配置的事件总线类型获取当前进程共享的事件总线，默认使用进程内存队列"""
+    global _agent_event_bus
+
+    if _agent_event_bus is None:
+        with _agent_event_bus_lock:
+            if _agent_event_bus is None:
+                if _agent_event_bus_type == AgentEventBusType.REDIS_STREAM:
+                    _agent_event_bus = RedisStreamAgentEventBus(redis_client)
+                else:
+                    _agent_event_bus = MemoryAgentEventBus(redis_client)
+
+    return _agent_event_bus
@@ -1,23 +1,25 @@
-import queue
 import time
 import uuid
-from queue import Queue
-from typing import Generator
+from typing import Generator, Optional
 from uuid import UUID
 
 from redis import Redis
 
 from internal.core.agent.entities.queue_entity import AgentThought, QueueEvent
 from internal.entity.conversation_entity import InvokeFrom
+from .agent_event_bus import AgentEventBus, get_agent_event_bus
 
 
 class AgentQueueManager:
-    """智能体队列管理器"""
+    """智能体队列管理器，事件通过可插拔的事件总线在智能体与监听方之间传递"""
 
     user_id: UUID
     invoke_from: InvokeFrom
     redis_client: Redis
-    _queues: dict[str, Queue]
+    event_bus: AgentEventBus
+
+    # 进程内共享的redis客户端，只通过injector解析一次
+    _shared_redis_client: Optional[Redis] = None
 
     def __init__(
         self,
@@ -28,76 +30,70 @@ class AgentQueueManager:
         # 1.初始化数据
         self.user_id = user_id
         self.invoke_from = invoke_from
-        self._queues = {}
-
-        # 2.内部初始化redis_client
-        from app.http.module import injector
 
-        self.redis_client = injector.get(Redis)
+        # 2.内部初始化redis_client以及事件总线
+        self.redis_client = self.get_redis_client()
+        self.event_bus = get_agent_event_bus(self.redis_client)
 
-    def listen(self, task_id: UUID) -> Generator:
-        """监听队列返回的生成式数据"""
-        # 1.定义基础数据记录超时时间、开始时间、最后一次ping通时间
+    def listen(self, task_id: UUID, cursor: str = "") -> Generator:
+        """监听事件总线返回的生成式数据，没有事件时阻塞等待直到有新事件或者需要发送ping，传递游标时从游标之后恢复监听"""
+        # 1.定义基础数据记录超时时间、ping间隔、截止时间与下一次ping的时间
         listen_timeout = 600
-        start_time = time.time()
-        last_ping_time = 0
-
-        # 2.创建循环队列执行死循环读取数据，直到超时或者数据读取完毕
-        while True:
-            try:
-                # 3.从队列中提取数据并检测数据是否存在，如果存在则使用yield关键字返回
-                item = self.queue(task_id).get(timeout=1)
-                if item is None:
-                    break
-                yield item
-            except queue.Empty:
-                continue
-            finally:
-                # 4.计算获取数据的总耗时
-                elapsed_time = time.time() - start_time
-
-                # 5.每10秒发起一个ping请求
-                if elapsed_time // 10 > last_ping_time:
-                    self.publish(
-                        task_id,
-                        AgentThought(
-                            id=uuid.uuid4(),
-                            task_id=task_id,
-                            event=QueueEvent.PING,
-                        ),
+        ping_interval = 10
+        deadline = time.time() + listen_timeout
+        next_ping_time = time.time() + ping_interval
+
+        try:
+            while True:
+                # 2.阻塞读取游标之后的事件，最多等待到下一次需要ping或者超时的时间点
+                for cursor, agent_thought in self.event_bus.read(
+                    task_id, cursor, max(min(next_ping_time, deadline) - time.time(), 0)
+                ):
+                    if agent_thought is None:
+                        return
+                    agent_thought.cursor = cursor
+                    yield agent_thought
+
+                # 3.每10秒返回一个ping事件，同时检查一次停止标识，防止停止信号丢失
+                now = time.time()
+                if now >= next_ping_time:
+                    yield AgentThought(
+                        id=uuid.uuid4(),
+                        task_id=task_id,
+                        event=QueueEvent.PING,
+                        cursor=cursor,
                     )
-                    last_ping_time = elapsed_time // 10
-
-                # 6.判断总耗时是否超时，如果超时则往队列中添加超时事件
-                if elapsed_time >= listen_timeout:
-                    self.publish(
-                        task_id,
-                        AgentThought(
-                            id=uuid.uuid4(),
-                            task_id=task_id,
-                            event=QueueEvent.TIMEOUT,
-                        ),
-                    )
-
-                # 7.检测是否停止，如果已经停止则添加停止事件
-                if self._is_stopped(task_id):
-                    self.publish(
-                        task_id,
-                        AgentThought(
+                    next_ping_time = now + ping_interval
+                    if self._is_stopped(task_id):
+                        yield AgentThought(
                             id=uuid.uuid4(),
                             task_id=task_id,
                             event=QueueEvent.STOP,
-                        ),
+                            cursor=cursor,
+                        )
+                        return
+
+                # 4.判断总耗时是否超时，如果超时则返回超时事件并结束监听
+                if now >= deadline:
+                    yield AgentThought(
+                        id=uuid.uuid4(),
+                        task_id=task_id,
+                        event=QueueEvent.TIMEOUT,
+                        cursor=cursor,
                     )
+                    return
+        finally:
+            # 5.监听结束后释放任务占用的资源
+            self.event_bus.release(task_id)
 
     def stop_listen(self, task_id: UUID) -> None:
         """停止监听队列信息"""
-        self.queue(task_id).put(None)
+        self.event_bus.close(task_id)
 
     def publish(self, task_id: UUID, agent_thought: AgentThought) -> None:
-        """发布事件信息到队列"""
-        # 1.将事件添加到队列中
-        self.queue(task_id).put(agent_thought)
+        """发布事件信息到事件总线"""
+        # 1.将事件添加到事件总线中
+        self.event_bus.publish(task_id, agent_thought)
 
         # 2.检测事件类型是否为需要停止的类型，涵盖STOP、ERROR、TIMEOUT、AGENT_END
         if agent_thought.event in [
@@ -129,60 +125,69 @@ class AgentQueueManager:
             return True
         return False
 
-    def queue(self, task_id: UUID) -> Queue:
-        """根据传递的task_id获取对应的任务队列信息"""
-        # 1.从队列字典中获取对应的任务队列
-        q = self._queues.get(str(task_id))
-
-        # 2.检测队列是否存在，如果不存在则创建队列，并添加缓存键标识
-        if not q:
-            # 3.添加缓存键标识
-            user_prefix = (
-                "account"
-                if self.invoke_from in [InvokeFrom.WEB_APP, InvokeFrom.DEBUGGER]
-                else "end-user"
-            )
-
-            # 4.设置任务对应的缓存键，代表这次任务已经开始了
-            self.redis_client.setex(
-                self.generate_task_belong_cache_key(task_id),
-                1800,
-                f"{user_prefix}-{str(self.user_id)}",
-            )
-
-            # 5.将任务队列添加到队列字典中
-            q = Queue()
-            self._queues[str(task_id)] = q
-
-        return q
+    def register_task(self, task_id: UUID) -> None:
+        """在智能体开始执行前登记任务，记录任务归属并创建任务对应的事件流"""
+        # 1.添加缓存键标识
+        user_prefix = (
+            "account"
+            if self.invoke_from in [InvokeFrom.WEB_APP, InvokeFrom.DEBUGGER]
+            else "end-user"
+        )
+
+        # 2.设置任务对应的缓存键，代表这次任务已经开始了
+        self.redis_client.setex(
+            self.generate_task_belong_cache_key(task_id),
+            1800,
+            f"{user_prefix}-{str(self.user_id)}",
+        )
+
+        # 3.创建任务对应的事件流
+        self.event_bus.create(task_id)
 
     @classmethod
-    def set_stop_flag(
+    def check_task_belong(
         cls, task_id: UUID, invoke_from: InvokeFrom, user_id: UUID
-    ) -> None:
-        """根据传递的任务id+调用来源停止某次会话"""
+    ) -> bool:
+        """检测任务是否存在并且归属于传递的用户"""
         # 1.获取redis_client客户端
-        from app.http.module import injector
+        redis_client = cls.get_redis_client()
 
-        redis_client = injector.get(Redis)
-
-        # 2.获取当前任务的缓存键，如果任务没执行，则不需要停止
+        # 2.获取当前任务的缓存键，如果任务没执行，则不属于任何用户
         result = redis_client.get(cls.generate_task_belong_cache_key(task_id))
         if not result:
-            return
+            return False
 
-        # 3.计算对应缓存键的结果
+        # 3.计算对应缓存键的结果并比对
         user_prefix = (
             "account"
             if invoke_from in [InvokeFrom.WEB_APP, InvokeFrom.DEBUGGER]
             else "end-user"
         )
-        if result.decode("utf-8") != f"{user_prefix}-{str(user_id)}":
+        return result.decode("utf-8") == f"{user_prefix}-{str(user_id)}"
+
+    @classmethod
+    def set_stop_flag(
+        cls, task_id: UUID, invoke_from: InvokeFrom, user_id: UUID
+    ) -> None:
+        """根据传递的任务id+调用来源停止某次会话"""
+        # 1.检测任务是否存在并且归属于当前用户，不满足则不需要停止
+        if not cls.check_task_belong(task_id, invoke_from, user_id):
             return
 
-        # 4.生成停止键标识
+        # 2.生成停止键标识，并通过事件总线向监听该任务的进程投递停止事件
+        redis_client = cls.get_redis_client()
         stopped_cache_key = cls.generate_task_stopped_cache_key(task_id)
         redis_client.setex(stopped_cache_key, 600, 1)
+        get_agent_event_bus(redis_client).stop(task_id)
+
+    @classmethod
+    def get_redis_client(cls) -> Redis:
+        """获取进程内共享的redis客户端，首次调用时通过injector解析"""
+        if cls._shared_redis_client is None:
+            from app.http.module import injector
+
+            cls._shared_redis_client = injector.get(Redis)
+        return cls._shared_redis_client
 
     @classmethod
     def generate_task_belong_cache_key(cls, task_id: UUID) -> str:
@@ -1,7 +1,9 @@
+import logging
+import threading
 import uuid
 from abc import abstractmethod
-from threading import Thread
-from typing import Optional, Any, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Iterator, Callable
 
 from langchain_core.language_models import BaseLanguageModel
 from langchain_core.load import Serializable
@@ -14,6 +16,21 @@ from internal.core.agent.entities.queue_entity import AgentResult, AgentThought
 from internal.exception import FailException
 from .agent_queue_manager import AgentQueueManager
 
+# 智能体共享的有界线程池，限制单个进程同时执行的智能体数量，超出的任务排队等待
+agent_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="agent")
+
+# 编译好的智能体图结构，格式为{智能体类: 图结构程序}，图结构与单次请求无关，每个进程只编译一次
+compiled_agents: dict[type, CompiledStateGraph] = {}
+compiled_agents_lock = threading.Lock()
+
+
+def configure_agent_executor(max_workers: int) -> None:
+    """根据配置的最大线程数重新创建智能体共享线程池，需要在提交智能体之前调用"""
+    global agent_executor
+    agent_executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="agent"
+    )
+
 
 class BaseAgent(Serializable, Runnable):
     """基于Runnable的基础智能体基类"""
@@ -35,19 +52,36 @@ class BaseAgent(Serializable, Runnable):
         *args,
         **kwargs,
     ):
-        """构造函数，初始化智能体图结构程序"""
+        """构造函数，获取编译好的智能体图结构程序，LLM、智能体配置以及队列管理器等单次请求的状态在运行时通过图配置传递"""
         super().__init__(*args, llm=llm, agent_config=agent_config, **kwargs)
-        self._agent = self._build_agent()
-        self._agent_queue_manager = AgentQueueManager(
-            user_id=agent_config.user_id,
-            invoke_from=agent_config.invoke_from,
-        )
+        self._agent = self._get_compiled_agent()
 
+    @classmethod
     @abstractmethod
-    def _build_agent(self) -> CompiledStateGraph:
-        """构建智能体函数，等待子类实现"""
+    def _build_agent(cls) -> CompiledStateGraph:
+        """构建智能体图结构，图节点需要通过_node从运行配置中获取当前智能体，等待子类实现"""
         raise NotImplementedError("_build_agent()未实现")
 
+    @classmethod
+    def _get_compiled_agent(cls) -> CompiledStateGraph:
+        """获取当前智能体类编译好的图结构程序，不存在时构建并缓存"""
+        agent = compiled_agents.get(cls)
+        if agent is None:
+            with compiled_agents_lock:
+                agent = compiled_agents.get(cls)
+                if agent is None:
+                    agent = compiled_agents[cls] = cls._build_agent()
+        return agent
+
+    @classmethod
+    def _node(cls, name: str) -> Callable:
+        """创建图节点函数，节点执行时从运行配置中取出本次请求的智能体，并调用智能体上的同名方法"""
+
+        def node(state: AgentState, config: RunnableConfig) -> AgentState:
+            return getattr(config["configurable"]["agent"], name)(state)
+
+        return node
+
     def invoke(
         self, input: AgentState, config: Optional[RunnableConfig] = None
     ) -> AgentResult:
@@ -66,18 +100,38 @@ class BaseAgent(Serializable, Runnable):
             raise FailException("智能体未成功构建，请核实后尝试")
 
         # 2.构建对应的任务id及数据初始化
-        input["task_id"] = input.get("task_id", uuid.uuid4())
-        input["history"] = input.get("history", [])
-        input["iteration_count"] = input.get("iteration_count", 0)
+        input = self._init_input(input)
 
-        # 3.创建子线程并执行
-        thread = Thread(target=self._agent.invoke, args=(input,))
-        thread.start()
+        # 3.先登记任务并创建事件流，再将智能体提交到共享线程池中执行
+        self.agent_queue_manager.register_task(input["task_id"])
+        agent_executor.submit(self.run, input)
 
         # 4.调用队列管理器监听数据并返回迭代器
-        yield from self._agent_queue_manager.listen(input["task_id"])
+        yield from self.agent_queue_manager.listen(input["task_id"])
+
+    def run(self, input: AgentState) -> None:
+        """同步执行智能体，事件发布到事件总线，可以在线程池或者Celery任务中调用，未被节点处理的异常转换成错误事件"""
+        input = self._init_input(input)
+        try:
+            self._agent.invoke(input, config={"configurable": {"agent": self}})
+        except Exception as e:
+            logging.exception(f"智能体执行出错, 错误信息: {str(e)}")
+            self.agent_queue_manager.publish_error(input["task_id"], e)
+
+    @classmethod
+    def _init_input(cls, input: AgentState) -> AgentState:
+        """初始化智能体输入，补充任务id、短期记忆以及迭代次数"""
+        input["task_id"] = input.get("task_id", uuid.uuid4())
+        input["history"] = input.get("history", [])
+        input["iteration_count"] = input.get("iteration_count", 0)
+        return input
 
     @property
     def agent_queue_manager(self) -> AgentQueueManager:
-        """只读属性，返回智能体队列管理器"""
+        """只读属性，返回智能体队列管理器，首次使用时创建"""
+        if self._agent_queue_manager is None:
+            self._agent_queue_manager = AgentQueueManager(
+                user_id=self.agent_config.user_id,
+                invoke_from=self.agent_config.invoke_from,
+            )
         return self._agent_queue_manager
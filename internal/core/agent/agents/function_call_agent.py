@@ -1,9 +1,11 @@
 import json
 import logging
 import re
+import threading
 import time
 import uuid
-from typing import Literal
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Literal
 
 from langchain_core.messages import (
     HumanMessage,
@@ -11,8 +13,10 @@ from langchain_core.messages import (
     ToolMessage,
     RemoveMessage,
     AIMessage,
+    ToolCall,
 )
 from langchain_core.messages import messages_to_dict
+from langchain_core.tools import BaseTool
 from langgraph.constants import END
 from langgraph.graph import StateGraph
 from langgraph.graph.state import CompiledStateGraph
@@ -27,28 +31,42 @@ from internal.core.agent.entities.queue_entity import AgentThought, QueueEvent
 from internal.exception import FailException
 from .base_agent import BaseAgent
 
+# 单个步骤中同时执行的工具调用数上限，超出的工具调用在该步骤的线程池中排队
+tool_max_workers = 8
+
+# 进程内同时执行的工具调用名额，超时的工具线程在结束前持续占用名额，名额用尽时新的工具调用直接返回错误
+tool_slots = threading.BoundedSemaphore(32)
+
+
+def configure_tool_concurrency(max_workers: int, max_inflight: int) -> None:
+    """根据配置设置单个步骤的工具线程数上限以及进程内同时执行的工具调用数上限，需要在执行智能体之前调用"""
+    global tool_max_workers, tool_slots
+    tool_max_workers = max_workers
+    tool_slots = threading.BoundedSemaphore(max_inflight)
+
 
 class FunctionCallAgent(BaseAgent):
     """基于函数/工具调用的智能体"""
 
-    def _build_agent(self) -> CompiledStateGraph:
-        """构建LangGraph图结构编译程序"""
+    @classmethod
+    def _build_agent(cls) -> CompiledStateGraph:
+        """构建LangGraph图结构编译程序，节点在运行时调用本次请求的智能体实例"""
         # 1.创建图
         graph = StateGraph(AgentState)
 
         # 2.添加节点
-        graph.add_node("preset_operation", self._preset_operation_node)
-        graph.add_node("long_term_memory_recall", self._long_term_memory_recall_node)
-        graph.add_node("llm", self._llm_node)
-        graph.add_node("tools", self._tools_node)
+        graph.add_node("preset_operation", cls._node("_preset_operation_node"))
+        graph.add_node(
+            "long_term_memory_recall", cls._node("_long_term_memory_recall_node")
+        )
+        graph.add_node("llm", cls._node("_llm_node"))
+        graph.add_node("tools", cls._node("_tools_node"))
 
         # 3.添加边，并设置起点和终点
         graph.set_entry_point("preset_operation")
-        graph.add_conditional_edges(
-            "preset_operation", self._preset_operation_condition
-        )
+        graph.add_conditional_edges("preset_operation", cls._preset_operation_condition)
         graph.add_edge("long_term_memory_recall", "llm")
-        graph.add_conditional_edges("llm", self._tools_condition)
+        graph.add_conditional_edges("llm", cls._tools_condition)
         graph.add_edge("tools", "llm")
 
         # 4.编译应用并返回
@@ -183,10 +201,12 @@ class FunctionCallAgent(BaseAgent):
         ):
             llm = llm.bind_tools(self.agent_config.tools)
 
-        # 4.流式调用LLM输出对应内容
+        # 4.流式调用LLM输出对应内容，消息列表在每次LLM调用时只序列化一次，并且只附加到第一个事件上
         gathered = None
         is_first_chunk = True
         generation_type = ""
+        message = messages_to_dict(state["messages"])
+        message_published = False
         try:
             for chunk in llm.stream(state["messages"]):
                 if is_first_chunk:
@@ -216,6 +236,7 @@ class FunctionCallAgent(BaseAgent):
                                 re.escape(keyword), "**", content, flags=re.IGNORECASE
                             )
 
+                    # 8.后续事件只携带增量内容，不再重复携带消息列表
                     self.agent_queue_manager.publish(
                         state["task_id"],
                         AgentThought(
@@ -223,11 +244,12 @@ class FunctionCallAgent(BaseAgent):
                             task_id=state["task_id"],
                             event=QueueEvent.AGENT_MESSAGE,
                             thought=content,
-                            message=messages_to_dict(state["messages"]),
+                            message=[] if message_published else message,
                             answer=content,
                             latency=(time.perf_counter() - start_at),
                         ),
                     )
+                    message_published = True
         except Exception as e:
             logging.exception(f"LLM节点发生错误, 错误信息: {str(e)}")
             self.agent_queue_manager.publish_error(
@@ -244,7 +266,7 @@ class FunctionCallAgent(BaseAgent):
                     task_id=state["task_id"],
                     event=QueueEvent.AGENT_THOUGHT,
                     thought=json.dumps(gathered.tool_calls),
-                    message=messages_to_dict(state["messages"]),
+                    message=message,
                     latency=(time.perf_counter() - start_at),
                 ),
             )
@@ -262,57 +284,157 @@ class FunctionCallAgent(BaseAgent):
         return {"messages": [gathered], "iteration_count": state["iteration_count"] + 1}
 
     def _tools_node(self, state: AgentState) -> AgentState:
-        """工具执行节点"""
+        """工具执行节点，多个工具调用并行执行，每个工具完成后立即提交事件，工具消息按照调用顺序返回"""
         # 1.将工具列表转换成字典，便于调用指定的工具
         tools_by_name = {tool.name: tool for tool in self.agent_config.tools}
 
-        # 2.提取消息中的工具调用参数
+        # 2.提取消息中的工具调用参数，每个步骤使用独立的有界线程池，工具调用需要先获取进程内的执行名额
         tool_calls = state["messages"][-1].tool_calls
+        max_workers = max(min(len(tool_calls), tool_max_workers), 1)
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="agent_tool"
+        )
+        slots = tool_slots
+        tool_results = [None] * len(tool_calls)
+        started_at: dict[int, float] = {}
+        futures = {}
+        for index, tool_call in enumerate(tool_calls):
+            if not slots.acquire(blocking=False):
+                tool_results[index] = (
+                    uuid.uuid4(),
+                    "工具执行出错: 当前执行中的工具调用过多，请稍后重试",
+                    0,
+                )
+                self._publish_tool_event(state, tool_call, *tool_results[index])
+                continue
+            future = executor.submit(
+                self._invoke_tool, tools_by_name, tool_call, started_at, index, slots
+            )
+            futures[future] = index
+
+        # 3.按照完成顺序提交事件，每个工具的超时时间从开始执行时计算，超时未完成的工具记为执行超时
+        timeout = self.agent_config.tool_call_timeout
+        pending, timed_out = set(futures), set()
+        while pending:
+            deadlines = [
+                started_at[futures[future]] + timeout
+                for future in pending
+                if futures[future] in started_at
+            ]
+            done, pending = wait(
+                pending,
+                timeout=(
+                    max(min(deadlines) - time.monotonic(), 0) if deadlines else 0.01
+                ),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                index = futures[future]
+                tool_results[index] = future.result()
+                self._publish_tool_event(state, tool_calls[index], *tool_results[index])
+
+            now = time.monotonic()
+            for future in list(pending):
+                index = futures[future]
+                if index in started_at and now - started_at[index] >= timeout:
+                    pending.discard(future)
+                    timed_out.add(future)
+                    tool_results[index] = (
+                        uuid.uuid4(),
+                        f"工具执行超时: 超过{timeout}秒未返回结果",
+                        timeout,
+                    )
+                    self._publish_tool_event(
+                        state, tool_calls[index], *tool_results[index]
+                    )
 
-        # 3.循环执行工具组装工具消息
-        messages = []
-        for tool_call in tool_calls:
-            # 4.创建智能体动作事件id并记录开始时间
-            id = uuid.uuid4()
-            start_at = time.perf_counter()
-
-            try:
-                # 5.获取工具并调用工具
-                tool = tools_by_name[tool_call["name"]]
-                tool_result = tool.invoke(tool_call["args"])
-            except Exception as e:
-                # 6.添加错误工具信息
-                tool_result = f"工具执行出错: {str(e)}"
-
-            # 7.将工具消息添加到消息列表中
-            messages.append(
+            # 3.1 线程池中的线程均被超时的工具占用时，排队的工具调用无法开始执行，直接记为执行超时
+            if (
+                len([future for future in timed_out if not future.done()])
+                >= max_workers
+            ):
+                for future in list(pending):
+                    if future.cancel():
+                        slots.release()
+                        pending.discard(future)
+                        index = futures[future]
+                        tool_results[index] = (
+                            uuid.uuid4(),
+                            "工具执行超时: 等待执行的过程中工具线程均被超时的工具占用",
+                            0,
+                        )
+                        self._publish_tool_event(
+                            state, tool_calls[index], *tool_results[index]
+                        )
+
+        # 超时的工具无法中断，不等待其线程结束，线程数受步骤线程池以及进程内执行名额的限制
+        executor.shutdown(wait=False)
+
+        # 4.按照工具调用顺序组装工具消息
+        return {
+            "messages": [
                 ToolMessage(
                     tool_call_id=tool_call["id"],
                     content=json.dumps(tool_result),
                     name=tool_call["name"],
                 )
-            )
+                for tool_call, (_, tool_result, _) in zip(tool_calls, tool_results)
+            ]
+        }
 
-            # 7.判断执行工具的名字，提交不同事件，涵盖智能体动作以及知识库检索
-            event = (
-                QueueEvent.AGENT_ACTION
-                if tool_call["name"] != DATASET_RETRIEVAL_TOOL_NAME
-                else QueueEvent.DATASET_RETRIEVAL
-            )
-            self.agent_queue_manager.publish(
-                state["task_id"],
-                AgentThought(
-                    id=id,
-                    task_id=state["task_id"],
-                    event=event,
-                    observation=json.dumps(tool_result),
-                    tool=tool_call["name"],
-                    tool_input=tool_call["args"],
-                    latency=(time.perf_counter() - start_at),
-                ),
-            )
+    @classmethod
+    def _invoke_tool(
+        cls,
+        tools_by_name: dict[str, BaseTool],
+        tool_call: ToolCall,
+        started_at: dict[int, float],
+        index: int,
+        slots: threading.BoundedSemaphore,
+    ) -> tuple[uuid.UUID, Any, float]:
+        """执行单个工具调用，开始执行时将时间记录到started_at中，结束后释放执行名额，返回智能体动作事件id、工具结果以及耗时"""
+        # 1.创建智能体动作事件id并记录开始时间
+        started_at[index] = time.monotonic()
+        id = uuid.uuid4()
+        start_at = time.perf_counter()
 
-        return {"messages": messages}
+        try:
+            # 2.获取工具并调用工具
+            tool = tools_by_name[tool_call["name"]]
+            tool_result = tool.invoke(tool_call["args"])
+        except Exception as e:
+            # 3.添加错误工具信息
+            tool_result = f"工具执行出错: {str(e)}"
+        finally:
+            slots.release()
+
+        return id, tool_result, time.perf_counter() - start_at
+
+    def _publish_tool_event(
+        self,
+        state: AgentState,
+        tool_call: ToolCall,
+        id: uuid.UUID,
+        tool_result: Any,
+        latency: float,
+    ) -> None:
+        """判断执行工具的名字，提交不同事件，涵盖智能体动作以及知识库检索"""
+        event = (
+            QueueEvent.AGENT_ACTION
+            if tool_call["name"] != DATASET_RETRIEVAL_TOOL_NAME
+            else QueueEvent.DATASET_RETRIEVAL
+        )
+        self.agent_queue_manager.publish(
+            state["task_id"],
+            AgentThought(
+                id=id,
+                task_id=state["task_id"],
+                event=event,
+                observation=json.dumps(tool_result),
+                tool=tool_call["name"],
+                tool_input=tool_call["args"],
+                latency=latency,
+            ),
+        )
 
     @classmethod
     def _tools_condition(cls, state: AgentState) -> Literal["tools", "__end__"]:
@@ -57,6 +57,9 @@ class AgentConfig(BaseModel):
     # 智能体使用的工具列表
     tools: list[BaseTool] = Field(default_factory=list)
 
+    # 单次工具调用的超时时间(秒)，同一步骤中的工具并行执行，超时的工具返回超时信息
+    tool_call_timeout: float = 30
+
     # 审核配置
     review_config: dict = Field(
         default_factory=lambda: DEFAULT_APP_CONFIG["review_config"]
@@ -1,7 +1,10 @@
+import json
+from dataclasses import dataclass, field, fields, MISSING
 from enum import Enum
+from typing import Any
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 
 
 class QueueEvent(str, Enum):
@@ -22,8 +25,19 @@ class QueueEvent(str, Enum):
         return self.value
 
 
-class AgentThought(BaseModel):
-    """智能体推理观察输出内容"""
+class AgentEventBusType(str, Enum):
+    """智能体事件总线类型枚举"""
+
+    MEMORY = "memory"  # 进程内存队列，监听方必须与智能体位于同一进程
+    REDIS_STREAM = "redis_stream"  # Redis Streams，任意进程均可监听并支持断线恢复
+
+    def __str__(self):
+        return self.value
+
+
+@dataclass(slots=True)
+class AgentThought:
+    """智能体推理观察输出内容，LLM每生成一个token都会创建一个事件，因此使用不做校验的轻量slots数据类"""
 
     id: UUID  # 事件对应的id，同一个事件的id是一样的
     task_id: UUID  # 任务id
@@ -35,10 +49,12 @@ class AgentThought(BaseModel):
 
     # 工具相关的字段
     tool: str = ""  # 调用工具的名字
-    tool_input: dict = Field(default_factory=dict)  # 工具的输入
+    tool_input: dict = field(default_factory=dict)  # 工具的输入
 
     # 消息相关的数据
-    message: list[dict] = Field(default_factory=dict)  # 推理使用的消息列表
+    message: list[dict] = field(
+        default_factory=list
+    )  # 推理使用的消息列表，同一次LLM调用只有第一个事件携带
     message_token_count: int = 0  # 消息花费的token数
     message_unit_price: float = 0  # 单价
     message_price_unit: float = 0  # 价格单位
@@ -54,6 +70,30 @@ class AgentThought(BaseModel):
     total_price: float = 0  # 总价格
     latency: float = 0  # 步骤推理耗时
 
+    # 事件在事件总线中的游标，客户端断线后可以从该游标之后恢复监听
+    cursor: str = ""
+
+    def to_json(self) -> str:
+        """序列化成紧凑的JSON字符串，只保留与默认值不同的字段"""
+        data = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if f.default is not MISSING and value == f.default:
+                continue
+            if f.default_factory is not MISSING and not value:
+                continue
+            data[f.name] = str(value) if isinstance(value, UUID) else value
+        return json.dumps(data, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data: Any) -> "AgentThought":
+        """从to_json生成的JSON字符串中还原事件"""
+        data = json.loads(data)
+        data["id"] = UUID(data["id"])
+        data["task_id"] = UUID(data["task_id"])
+        data["event"] = QueueEvent(data["event"])
+        return cls(**data)
+
 
 class AgentResult(BaseModel):
     """智能体推理观察最终结果"""
@@ -0,0 +1,3 @@
+from .llm_client_registry import LLMClientRegistry, llm_client_registry
+
+__all__ = ["LLMClientRegistry", "llm_client_registry"]
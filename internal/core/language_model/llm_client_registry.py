@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+from typing import Any, Optional
+
+import httpx
+import openai
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+
+from internal.exception import FailException
+from internal.lib.helper import generate_text_hash
+from pkg.cache import LRUCache
+
+
+class LLMClientRegistry:
+    """大语言模型客户端注册表，按照(提供者, 模型, 参数)复用模型实例，所有实例共享同一个HTTP连接池，并统计连接复用情况"""
+
+    def __init__(self, max_size: int = 64, max_connections: int = 100):
+        """构造函数，max_size为缓存的模型实例数，max_connections为共享连接池的最大连接数"""
+        self.max_connections = max_connections
+        self._clients = LRUCache(max_size=max_size)
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._http_client_pid: Optional[int] = None
+        self._requests = 0
+        self._connections = 0
+
+    def configure(self, max_size: int, max_connections: int) -> None:
+        """设置缓存的模型实例数以及共享连接池的最大连接数，HTTP客户端会在下次获取模型实例时重新创建"""
+        with self._lock:
+            self._clients.max_size = max_size
+            self.max_connections = max_connections
+            self._http_client_pid = None
+
+    def get_llm(self, model: str, provider: str = "openai", **params) -> BaseChatModel:
+        """根据提供者、模型名称以及参数获取模型实例，相同配置的请求与后台任务共享同一个实例"""
+        # 1.检测模型提供者，目前只支持OpenAI兼容的接口
+        if provider != "openai":
+            raise FailException(f"不支持的模型提供者: {provider}")
+
+        # 2.根据提供者、模型与参数计算缓存键，命中则直接返回模型实例
+        http_client = self._get_http_client()
+        cache_key = (
+            provider,
+            model,
+            generate_text_hash(json.dumps(params, sort_keys=True, default=str)),
+        )
+        llm = self._clients.get(cache_key)
+        if llm is not None:
+            return llm
+
+        # 3.未命中则创建模型实例并使用共享的HTTP客户端
+        llm = ChatOpenAI(model=model, http_client=http_client, **params)
+        self._clients.set(cache_key, llm)
+
+        return llm
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """获取注册表的统计信息，涵盖模型实例缓存命中情况、请求数、新建连接数以及连接复用率"""
+        with self._lock:
+            requests, connections = self._requests, self._connections
+        return {
+            **self._clients.stats,
+            "requests": requests,
+            "connections": connections,
+            "reused_connections": max(requests - connections, 0),
+            "reuse_rate": (
+                round(max(requests - connections, 0) / requests, 4) if requests else 0
+            ),
+        }
+
+    def _get_http_client(self) -> httpx.Client:
+        """获取当前进程共享的HTTP客户端，进程fork后重新创建客户端并清空模型实例，避免多个进程共用同一个连接"""
+        if self._http_client_pid != os.getpid():
+            with self._lock:
+                if self._http_client_pid != os.getpid():
+                    # 使用openai的默认客户端，保留其默认的超时与重定向配置
+                    self._clients.clear()
+                    self._http_client = openai.DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections,
+                        ),
+                        event_hooks={"request": [self._on_request]},
+                    )
+                    self._http_client_pid = os.getpid()
+                    self._requests = self._connections = 0
+        return self._http_client
+
+    def _on_request(self, request: httpx.Request) -> None:
+        """请求发起前记录请求数，并通过httpcore的trace扩展记录新建的连接数"""
+        with self._lock:
+            self._requests += 1
+        request.extensions["trace"] = self._trace
+
+    def _trace(self, event_name: str, info: dict) -> None:
+        """httpcore的追踪回调，每建立一个TCP连接触发一次connect_tcp.complete事件"""
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections += 1
+
+
+# 进程内共享的大语言模型客户端注册表，应用创建后根据配置设置
+llm_client_registry = LLMClientRegistry()
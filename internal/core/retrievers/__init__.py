@@ -1,4 +1,5 @@
 from .semantic_retriever import SemanticRetriever
 from .full_text_retriever import FullTextRetriever
+from .hybrid_retriever import HybridRetriever
 
-__all__ = ["SemanticRetriever", "FullTextRetriever"]
+__all__ = ["SemanticRetriever", "FullTextRetriever", "HybridRetriever"]
@@ -1,13 +1,18 @@
+import heapq
+import math
+from collections import defaultdict
 from typing import List
 from uuid import UUID
 from langchain_core.retrievers import BaseRetriever
 from pydantic import Field
 from pkg.sqlalchemy import SQLAlchemy
-from internal.service import JiebaService
+from internal.service import JiebaService, KeywordTableService
+from internal.service.keyword_table_service import KeywordTable
 from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document as LCDocument
-from internal.model import KeywordTable, Segment
-from collections import Counter
+from internal.entity.dataset_entity import FullTextRanking, BM25_K1, BM25_B
+from internal.model import SegmentKeyword, KeywordStatistic, DatasetStatistic, Segment
+from sqlalchemy import Float, case, cast, desc, func
 
 
 class FullTextRetriever(BaseRetriever):
@@ -17,6 +22,8 @@ class FullTextRetriever(BaseRetriever):
     db: SQLAlchemy
     search_kwargs: dict = Field(default_factory=dict)
     jieba_service: JiebaService
+    keyword_table_service: KeywordTableService
+    ranking: FullTextRanking = FullTextRanking.BM25
 
     def _get_relevant_documents(
         self, query: str, *, run_manager: CallbackManagerForRetrieverRun
@@ -25,41 +32,33 @@ class FullTextRetriever(BaseRetriever):
         # 将查询query转换成关键词列表
         keywords = self.jieba_service.extract_keywords(query, 10)
 
-        # 查找指定知识库的关键词表
-        keyword_tables = [
-            keyword_table
-            for keyword_table, in self.db.session.query(KeywordTable)
-            .with_entities(KeywordTable.keyword_table)
-            .filter(KeywordTable.dataset_id.in_(self.dataset_ids))
-            .all()
-        ]
-
-        # 遍历所有的知识库关键词表，找到匹配query关键词的id列表
-        all_ids = []
-        for keyword_table in keyword_tables:
-            for keyword, segment_ids in keyword_table.items():
-                # 如果数据存在则提取关键词对应的片段id列表
-                if keyword in keywords:
-                    all_ids.extend(segment_ids)
-
-        # 统计segment_id出现的频率
-        id_counter = Counter(all_ids)
+        if len(keywords) == 0:
+            return []
 
-        # 获取出现频率最高的前k个数据，格式为[(segment_id, freq), (segment_id, freq), ...]
+        # 根据排序方式获取得分最高的前k个数据，格式为[(segment_id, score), ...]
+        # 热点知识库的关键词表可以完整放入进程内缓存时直接在内存中计算，否则交由数据库计算
         k = self.search_kwargs.get("k", 4)
-        top_10_ids = id_counter.most_common(k)
+        keyword_tables = self.keyword_table_service.get_keyword_tables(self.dataset_ids)
+        if keyword_tables is not None:
+            top_k_ids = self._rank_in_memory(keyword_tables, keywords, k)
+        elif self.ranking == FullTextRanking.BM25:
+            top_k_ids = self._rank_by_bm25(keywords, k)
+        else:
+            top_k_ids = self._rank_by_keyword_count(keywords, k)
 
         # 根据得到的id列表检索数据库得到片段列表信息
         segments = (
             self.db.session.query(Segment)
-            .filter(Segment.id.in_([id for id, _ in top_10_ids]))
+            .filter(Segment.id.in_([id for id, _ in top_k_ids]))
             .all()
         )
         segment_dict = {str(segment.id): segment for segment in segments}
 
-        # 根据频率进行排序
+        # 根据得分进行排序
         sorted_segments = [
-            segment_dict[str(id)] for id, freq in top_10_ids if id in segment_dict
+            (segment_dict[str(id)], score)
+            for id, score in top_k_ids
+            if id in segment_dict
         ]
 
         # 构建LangChain文档列表
@@ -74,10 +73,148 @@ class FullTextRetriever(BaseRetriever):
                     "node_id": str(segment.node_id),
                     "document_enabled": True,
                     "segment_enabled": True,
-                    "score": 0,
+                    "score": score,
                 },
             )
-            for segment in sorted_segments
+            for segment, score in sorted_segments
         ]
 
         return lc_documents
+
+    def _rank_in_memory(
+        self, keyword_tables: list[KeywordTable], keywords: list[str], k: int
+    ) -> list[tuple[str, float]]:
+        """使用进程内缓存的关键词表计算得分，排序规则与数据库计算保持一致，返回得分最高的前k个片段"""
+        scores = defaultdict(float)
+        keywords = set(keywords)
+
+        if self.ranking == FullTextRanking.BM25:
+            # 1.汇总检索知识库的片段数以及平均片段长度
+            segment_count = sum(len(t.segment_lengths) for t in keyword_tables)
+            if segment_count <= 0:
+                return []
+            avg_segment_length = max(
+                sum(sum(t.segment_lengths.values()) for t in keyword_tables)
+                / segment_count,
+                1.0,
+            )
+
+            # 2.逐个关键词计算idf，并累加命中片段的BM25得分
+            for keyword in keywords:
+                postings = [
+                    (t, t.postings[keyword])
+                    for t in keyword_tables
+                    if keyword in t.postings
+                ]
+                df = sum(len(frequencies) for _, frequencies in postings)
+                if df <= 0:
+                    continue
+                idf = math.log(1 + (segment_count - df + 0.5) / (df + 0.5))
+                for keyword_table, frequencies in postings:
+                    for segment_id, frequency in frequencies.items():
+                        length_norm = BM25_K1 * (
+                            1
+                            - BM25_B
+                            + BM25_B
+                            * keyword_table.segment_lengths[segment_id]
+                            / avg_segment_length
+                        )
+                        scores[segment_id] += (
+                            idf * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+                        )
+        else:
+            # 3.统计每个片段命中的关键词数
+            for keyword_table in keyword_tables:
+                for keyword in keywords:
+                    for segment_id in keyword_table.postings.get(keyword, {}):
+                        scores[segment_id] += 1
+
+        top_k = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        if self.ranking == FullTextRanking.BM25:
+            return top_k
+        return [(segment_id, 0) for segment_id, _ in top_k]
+
+    def _rank_by_keyword_count(
+        self, keywords: list[str], k: int
+    ) -> list[tuple[str, float]]:
+        """在倒排表中统计每个片段命中的关键词数，返回命中数最高的前k个片段，得分固定为0"""
+        hit_count = func.count(SegmentKeyword.id).label("hit_count")
+        return [
+            (str(segment_id), 0)
+            for segment_id, _ in self.db.session.query(
+                SegmentKeyword.segment_id, hit_count
+            )
+            .filter(
+                SegmentKeyword.dataset_id.in_(self.dataset_ids),
+                SegmentKeyword.keyword.in_(keywords),
+            )
+            .group_by(SegmentKeyword.segment_id)
+            .order_by(desc(hit_count), SegmentKeyword.segment_id)
+            .limit(k)
+            .all()
+        ]
+
+    def _rank_by_bm25(self, keywords: list[str], k: int) -> list[tuple[str, float]]:
+        """使用预计算的文档频率与片段长度统计计算BM25得分，返回得分最高的前k个片段"""
+        # 1.汇总检索知识库的片段数以及平均片段长度
+        segment_count, segment_length_total = (
+            self.db.session.query(
+                func.coalesce(func.sum(DatasetStatistic.segment_count), 0),
+                func.coalesce(func.sum(DatasetStatistic.segment_length_total), 0),
+            )
+            .filter(DatasetStatistic.dataset_id.in_(self.dataset_ids))
+            .one()
+        )
+        if segment_count <= 0:
+            return []
+        avg_segment_length = max(float(segment_length_total) / segment_count, 1.0)
+
+        # 2.根据关键词的文档频率计算逆文档频率(idf)
+        document_frequencies = (
+            self.db.session.query(
+                KeywordStatistic.keyword,
+                func.sum(KeywordStatistic.document_frequency),
+            )
+            .filter(
+                KeywordStatistic.dataset_id.in_(self.dataset_ids),
+                KeywordStatistic.keyword.in_(keywords),
+            )
+            .group_by(KeywordStatistic.keyword)
+            .all()
+        )
+        idfs = {
+            keyword: math.log(1 + (segment_count - int(df) + 0.5) / (int(df) + 0.5))
+            for keyword, df in document_frequencies
+            if df and df > 0
+        }
+        if not idfs:
+            return []
+
+        # 3.在数据库中完成每个片段的BM25得分累加与排序，只返回前k条数据
+        frequency = cast(SegmentKeyword.frequency, Float)
+        length_norm = BM25_K1 * (
+            1
+            - BM25_B
+            + BM25_B * cast(SegmentKeyword.segment_length, Float) / avg_segment_length
+        )
+        score = func.sum(
+            case(idfs, value=SegmentKeyword.keyword, else_=0.0)
+            * frequency
+            * (BM25_K1 + 1)
+            / (frequency + length_norm)
+        ).label("score")
+
+        return [
+            (str(segment_id), float(score))
+            for segment_id, score in self.db.session.query(
+                SegmentKeyword.segment_id, score
+            )
+            .filter(
+                SegmentKeyword.dataset_id.in_(self.dataset_ids),
+                SegmentKeyword.keyword.in_(list(idfs.keys())),
+            )
+            .group_by(SegmentKeyword.segment_id)
+            .order_by(desc(score), SegmentKeyword.segment_id)
+            .limit(k)
+            .all()
+        ]
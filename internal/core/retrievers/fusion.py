@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from langchain_core.documents import Document as LCDocument
+
+from internal.entity.dataset_entity import FusionStrategy
+
+
+def _document_key(document: LCDocument) -> str:
+    """获取文档的唯一标识，优先使用片段id，用于在多个检索结果之间去重"""
+    return str(document.metadata.get("segment_id", document.page_content))
+
+
+def reciprocal_rank_fusion(
+    doc_lists: list[list[LCDocument]], weights: list[float], c: int = 60
+) -> list[tuple[LCDocument, float]]:
+    """加权倒数排名融合，只依赖文档在各个列表中的排名，返回按融合得分降序排列的(文档, 得分)列表"""
+    scores = defaultdict(float)
+    documents = {}
+    for doc_list, weight in zip(doc_lists, weights):
+        for rank, document in enumerate(doc_list, start=1):
+            key = _document_key(document)
+            scores[key] += weight / (rank + c)
+            documents.setdefault(key, document)
+
+    return sorted(
+        [(documents[key], score) for key, score in scores.items()],
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+
+def min_max_score_fusion(
+    doc_lists: list[list[LCDocument]], weights: list[float]
+) -> list[tuple[LCDocument, float]]:
+    """最小-最大归一化得分融合，将各个列表的得分归一化到[0, 1]后加权求和，返回按融合得分降序排列的(文档, 得分)列表"""
+    scores = defaultdict(float)
+    documents = {}
+    for doc_list, weight in zip(doc_lists, weights):
+        if not doc_list:
+            continue
+
+        # 1.计算当前列表的得分范围，所有得分相同时归一化得分均为1
+        raw_scores = [float(document.metadata.get("score", 0)) for document in doc_list]
+        min_score, max_score = min(raw_scores), max(raw_scores)
+
+        # 2.归一化后按照权重累加
+        for document, raw_score in zip(doc_list, raw_scores):
+            key = _document_key(document)
+            normalized_score = (
+                (raw_score - min_score) / (max_score - min_score)
+                if max_score > min_score
+                else 1.0
+            )
+            scores[key] += weight * normalized_score
+            documents.setdefault(key, document)
+
+    return sorted(
+        [(documents[key], score) for key, score in scores.items()],
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+
+def fuse_documents(
+    doc_lists: list[list[LCDocument]],
+    weights: list[float],
+    strategy: str = FusionStrategy.RRF,
+    k: int = 4,
+) -> list[LCDocument]:
+    """根据融合策略合并多个检索器的结果，返回融合得分最高的前k个文档"""
+    if strategy == FusionStrategy.MIN_MAX:
+        fused = min_max_score_fusion(doc_lists, weights)
+    else:
+        fused = reciprocal_rank_fusion(doc_lists, weights)
+
+    return [document for document, _ in fused[:k]]
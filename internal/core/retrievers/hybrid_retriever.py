@@ -0,0 +1,90 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import List, Optional
+
+from flask import Flask
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document as LCDocument
+from langchain_core.retrievers import BaseRetriever
+from pydantic import Field
+
+from internal.entity.dataset_entity import FusionStrategy
+from .fusion import fuse_documents
+
+# 混合检索共享的线程池，超时的检索任务会在后台执行完毕，不会阻塞当前请求
+hybrid_retriever_executor = ThreadPoolExecutor(
+    max_workers=16, thread_name_prefix="hybrid_retriever"
+)
+
+
+class HybridRetriever(BaseRetriever):
+    """混合检索器，并行执行多个检索器并融合结果，单个检索器超时或出错时使用其余检索器的结果"""
+
+    flask_app: Flask
+    retrievers: list[BaseRetriever]
+    weights: list[float] = Field(default_factory=list)
+    timeouts: list[Optional[float]] = Field(default_factory=list)
+    fusion: FusionStrategy = FusionStrategy.RRF
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[LCDocument]:
+        """根据传递的query并行执行所有检索器，返回融合后的LangChain文档列表"""
+        # 1.将所有检索器提交到线程池中同时执行
+        started_at = time.monotonic()
+        futures = [
+            hybrid_retriever_executor.submit(
+                self._invoke_retriever, retriever, query, run_manager
+            )
+            for retriever in self.retrievers
+        ]
+
+        # 2.按照每个检索器各自的超时时间等待结果，超时或出错的检索器结果记为空列表
+        doc_lists, errors = [], []
+        for index, future in enumerate(futures):
+            timeout = self.timeouts[index] if index < len(self.timeouts) else None
+            try:
+                doc_lists.append(
+                    future.result(
+                        timeout=(
+                            None
+                            if timeout is None
+                            else max(started_at + timeout - time.monotonic(), 0)
+                        )
+                    )
+                )
+            except TimeoutError:
+                logging.warning(
+                    f"混合检索子检索器超时, 检索器: {type(self.retrievers[index]).__name__}, 超时时间: {timeout}s"
+                )
+                doc_lists.append([])
+            except Exception as e:
+                logging.exception(f"混合检索子检索器执行出错, 错误信息: {str(e)}")
+                errors.append(e)
+                doc_lists.append([])
+
+        # 3.所有检索器均执行出错时抛出异常
+        if errors and len(errors) == len(self.retrievers):
+            raise errors[0]
+
+        # 4.按照融合策略合并各个检索器的结果并截取前k条数据
+        return fuse_documents(
+            doc_lists,
+            self.weights or [1 / len(doc_lists)] * len(doc_lists),
+            self.fusion,
+            self.k,
+        )
+
+    def _invoke_retriever(
+        self,
+        retriever: BaseRetriever,
+        query: str,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> List[LCDocument]:
+        """在独立的应用上下文中执行检索器，保证数据库会话在线程之间互不干扰"""
+        with self.flask_app.app_context():
+            return retriever.invoke(
+                query, config={"callbacks": run_manager.get_child()}
+            )
@@ -19,8 +19,9 @@ class SemanticRetriever(BaseRetriever):
         self, query: str, *, run_manager: CallbackManagerForRetrieverRun
     ) -> List[LCDocument]:
         """根据传递的query执行相似性检索"""
-        # 提取最大搜索条件k，默认值为4
-        k = self.search_kwargs.pop("k", 4)
+        # 提取最大搜索条件k，默认值为4，检索器会被复用，不能修改共享的search_kwargs
+        search_kwargs = {**self.search_kwargs}
+        k = search_kwargs.pop("k", 4)
 
         # 执行相似性检索，并获取得分信息
         search_result = self.vector_store.similarity_search_with_relevance_scores(
@@ -36,7 +37,7 @@ class SemanticRetriever(BaseRetriever):
                         Filter.by_property("segment_enabled").equal(True),
                     ]
                 ),
-                **self.search_kwargs,
+                **search_kwargs,
             }
         )
 
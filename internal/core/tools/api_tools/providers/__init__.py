@@ -1,3 +1,4 @@
 from .api_providers_manager import ApiProvidersManager
+from .api_tool_http_client import ApiToolHttpClient, api_tool_http_client
 
-__all__ = ["ApiProvidersManager"]
+__all__ = ["ApiProvidersManager", "ApiToolHttpClient", "api_tool_http_client"]
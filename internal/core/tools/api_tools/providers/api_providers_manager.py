@@ -1,6 +1,6 @@
-from typing import Type, Optional, Callable
+from typing import Type, Optional, Callable, Iterable
+from uuid import UUID
 from injector import inject
-import requests
 from dataclasses import dataclass
 from pydantic import BaseModel, create_model, Field
 from langchain_core.tools import BaseTool, StructuredTool
@@ -9,6 +9,12 @@ from internal.core.tools.api_tools.entities import (
     ParameterTypeMap,
     ParameterIn,
 )
+from internal.lib.helper import generate_text_hash
+from pkg.cache import LRUCache
+from .api_tool_http_client import api_tool_http_client
+
+# 编译后的LangChain工具缓存，键为(工具id, 配置hash)，配置变化后hash随之变化，不会命中旧工具
+api_tool_cache = LRUCache(max_size=1024)
 
 
 @inject
@@ -17,11 +23,21 @@ class ApiProvidersManager(BaseModel):
     """API提供者管理器，能根据纯低的工具配置信息生成自定义LangChain工具"""
 
     @classmethod
-    def _create_tool_func_from_tool_entity(cls, tool_entity: ToolEntity) -> Callable:
-        """根据传递的信息创建发起API请求的函数"""
+    def _create_tool_func_from_tool_entity(
+        cls, tool_entity: ToolEntity
+    ) -> tuple[Callable, Callable]:
+        """根据传递的信息创建发起API请求的同步函数与异步函数"""
+        # 1.参数结构映射与请求头只在创建工具时构建一次
+        parameter_map = {
+            parameter.get("name"): parameter for parameter in tool_entity.parameters
+        }
+        header_map = {
+            header.get("key"): header.get("value") for header in tool_entity.headers
+        }
 
-        def tool_func(**kwargs) -> str:
-            """API工具请求函数"""
+        # 2.同步与异步请求函数共享参数转换逻辑
+        def build_request(kwargs: dict) -> dict:
+            """将工具参数按照存放位置转换成请求参数"""
             # 定义变量存储来自path/query/header/cookie/request_body的参数
             parameters = {
                 ParameterIn.PATH: {},
@@ -31,14 +47,6 @@ class ApiProvidersManager(BaseModel):
                 ParameterIn.REQUEST_BODY: {},
             }
 
-            # 更该参数结构映射
-            parameter_map = {
-                parameter.get("name"): parameter for parameter in tool_entity.parameters
-            }
-            header_map = {
-                header.get("key"): header.get("value") for header in tool_entity.headers
-            }
-
             # 循环遍历传递的所有字段并校验
             for key, value in kwargs.items():
                 # 提取键值对关联的字段并校验
@@ -48,20 +56,24 @@ class ApiProvidersManager(BaseModel):
                 # 将参数存储到合适的位置上，默认在query上
                 parameters[parameter.get("in", ParameterIn.QUERY)][key] = value
 
-            # 构建request请求并返回采集的内容
-            return requests.request(
-                method=tool_entity.method,
-                url=tool_entity.url.format(**parameters[ParameterIn.PATH]),
-                params=parameters[ParameterIn.QUERY],
-                json=parameters[ParameterIn.REQUEST_BODY],
-                headers={
-                    **header_map,
-                    **parameters[ParameterIn.HEADER],
-                },
-                cookies=parameters[ParameterIn.COOKIE],
-            ).text
-
-        return tool_func
+            return {
+                "method": tool_entity.method,
+                "url": tool_entity.url.format(**parameters[ParameterIn.PATH]),
+                "params": parameters[ParameterIn.QUERY],
+                "json": parameters[ParameterIn.REQUEST_BODY],
+                "headers": {**header_map, **parameters[ParameterIn.HEADER]},
+                "cookies": parameters[ParameterIn.COOKIE],
+            }
+
+        def tool_func(**kwargs) -> str:
+            """API工具请求函数，使用共享连接池发起请求并返回采集的内容"""
+            return api_tool_http_client.request(**build_request(kwargs))
+
+        async def tool_coroutine(**kwargs) -> str:
+            """API工具异步请求函数"""
+            return await api_tool_http_client.arequest(**build_request(kwargs))
+
+        return tool_func, tool_coroutine
 
     @classmethod
     def _create_model_from_parameters(cls, parameters: list[dict]) -> Type[BaseModel]:
@@ -84,10 +96,30 @@ class ApiProvidersManager(BaseModel):
         )
 
     def get_tool(self, tool_entity: ToolEntity) -> BaseTool:
-        """根据传递的配置获取自定义API工具"""
-        return StructuredTool.from_function(
-            func=self._create_tool_func_from_tool_entity(tool_entity),
+        """根据传递的配置获取自定义API工具，相同id与配置的工具只编译一次"""
+        # 1.根据工具id与完整配置计算缓存键，命中则直接返回编译好的工具
+        cache_key = (tool_entity.id, generate_text_hash(tool_entity.model_dump_json()))
+        tool = api_tool_cache.get(cache_key)
+        if tool is not None:
+            return tool
+
+        # 2.未命中则创建请求函数与参数模型，并构建LangChain工具
+        tool_func, tool_coroutine = self._create_tool_func_from_tool_entity(tool_entity)
+        tool = StructuredTool.from_function(
+            func=tool_func,
+            coroutine=tool_coroutine,
             name=f"{tool_entity.id}_{tool_entity.name}",
             description=tool_entity.description,
             args_schema=self._create_model_from_parameters(tool_entity.parameters),
         )
+        api_tool_cache.set(cache_key, tool)
+
+        return tool
+
+    @classmethod
+    def invalidate_tools(cls, tool_ids: Iterable[UUID | str]) -> None:
+        """根据工具id删除缓存中编译好的工具，在工具提供者更新或者删除时调用"""
+        tool_ids = {str(tool_id) for tool_id in tool_ids}
+        for cache_key in api_tool_cache.keys():
+            if cache_key[0] in tool_ids:
+                api_tool_cache.delete(cache_key)
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 响应内容超出最大字节数时追加的截断提示
+TRUNCATED_SUFFIX = "...(响应内容过长，已截断)"
+
+
+class ApiToolHttpClient:
+    """API工具的HTTP执行层，按照主机复用长连接，支持超时、重试以及大响应截断，并提供可选的httpx异步请求"""
+
+    def __init__(
+        self,
+        connect_timeout: float = 5,
+        read_timeout: float = 30,
+        max_retries: int = 2,
+        pool_maxsize: int = 32,
+        max_response_bytes: int = 64 * 1024,
+    ):
+        """构造函数，max_response_bytes为返回给智能体的最大响应字节数，超出部分不会被读取"""
+        self.configure(
+            connect_timeout, read_timeout, max_retries, pool_maxsize, max_response_bytes
+        )
+
+        # 异步客户端与事件循环绑定，每个事件循环使用独立的客户端
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_clients_lock = threading.Lock()
+
+    def configure(
+        self,
+        connect_timeout: float,
+        read_timeout: float,
+        max_retries: int,
+        pool_maxsize: int,
+        max_response_bytes: int,
+    ) -> None:
+        """设置超时、重试、连接池大小以及最大响应字节数，并重新创建同步请求共享的会话"""
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.pool_maxsize = pool_maxsize
+        self.max_response_bytes = max_response_bytes
+
+        # 同步请求共享的会话，每个主机对应一个连接池，只对幂等请求在连接失败或网关错误时重试
+        adapter = HTTPAdapter(
+            pool_connections=pool_maxsize,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=max_retries,
+                backoff_factor=0.3,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False,
+            ),
+        )
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> str:
+        """发起同步请求，以流式方式读取响应，最多读取max_response_bytes字节"""
+        with self._session.request(
+            method, url, timeout=self.timeout, stream=True, **kwargs
+        ) as response:
+            content, truncated = bytearray(), False
+            for chunk in response.iter_content(chunk_size=8192):
+                content.extend(chunk)
+                if len(content) > self.max_response_bytes:
+                    truncated = True
+                    break
+            return self._decode(content, response.encoding, truncated)
+
+    async def arequest(self, method: str, url: str, **kwargs) -> str:
+        """发起异步请求，需要安装httpx，以流式方式读取响应，最多读取max_response_bytes字节"""
+        client = self._get_async_client()
+        async with client.stream(method, url, **kwargs) as response:
+            content, truncated = bytearray(), False
+            async for chunk in response.aiter_bytes():
+                content.extend(chunk)
+                if len(content) > self.max_response_bytes:
+                    truncated = True
+                    break
+            return self._decode(content, response.encoding, truncated)
+
+    def _get_async_client(self) -> Any:
+        """获取当前事件循环对应的httpx异步客户端，不存在时创建"""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                    limits=httpx.Limits(max_keepalive_connections=self.pool_maxsize),
+                    transport=httpx.AsyncHTTPTransport(retries=self.max_retries),
+                )
+                self._async_clients[loop] = client
+        return client
+
+    def _decode(
+        self, content: bytearray, encoding: Optional[str], truncated: bool
+    ) -> str:
+        """将响应内容解码成字符串，截断时追加提示"""
+        if truncated:
+            content = content[: self.max_response_bytes]
+        text = bytes(content).decode(encoding or "utf-8", errors="ignore")
+        return text + TRUNCATED_SUFFIX if truncated else text
+
+
+# API工具共享的HTTP客户端，应用创建后根据配置设置
+api_tool_http_client = ApiToolHttpClient()
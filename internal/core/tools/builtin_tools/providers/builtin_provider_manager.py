@@ -1,10 +1,17 @@
+import json
 import yaml
 import os
-from typing import Any
+from typing import Any, Optional
 from injector import inject, singleton
+from langchain_core.tools import BaseTool
 from internal.core.tools.builtin_tools.entities import ProviderEntity, Provider
+from internal.lib.helper import generate_text_hash
+from pkg.cache import LRUCache
 from pydantic import BaseModel, Field
 
+# 内置工具实例缓存，键为(提供商名称, 工具名称, 参数hash)
+builtin_tool_cache = LRUCache(max_size=1024)
+
 
 @inject
 @singleton
@@ -37,6 +44,29 @@ class BuiltInProviderManager(BaseModel):
             return provider.get_tool(tool_name)
         return None
 
+    def create_tool(
+        self, provider_name: str, tool_name: str, params: dict[str, Any]
+    ) -> Optional[BaseTool]:
+        """根据提供商名称、工具名称以及自定义参数获取工具实例，相同参数的工具只实例化一次"""
+        # 1.根据提供商、工具名称与参数计算缓存键，命中则直接返回工具实例
+        cache_key = (
+            provider_name,
+            tool_name,
+            generate_text_hash(json.dumps(params, sort_keys=True, default=str)),
+        )
+        tool = builtin_tool_cache.get(cache_key)
+        if tool is not None:
+            return tool
+
+        # 2.未命中则获取工具函数并实例化
+        tool_func = self.get_tool(provider_name, tool_name)
+        if not tool_func:
+            return None
+        tool = tool_func(**params)
+        builtin_tool_cache.set(cache_key, tool)
+
+        return tool
+
     def _get_provider_tool_map(self):
         """获取工具提供商映射"""
         # 检测provider_tool_map是否为空
@@ -37,6 +37,10 @@ DEFAULT_APP_CONFIG = {
         "retrieval_strategy": "semantic",  # 检索策略
         "k": 10,  # top-k
         "score": 0.5,  # 分数
+        "rerank": {  # 重排序
+            "enable": False,  # 是否启用
+            "fetch_k": 20,  # 重排序的候选文档数
+        },
     },
     "long_term_memory": {  # 长期记忆
         "enable": False,  # 是否启用
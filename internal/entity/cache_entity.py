@@ -4,10 +4,51 @@ LOCK_EXPIRE_TIME = 600
 # 更新文档启用状态缓存锁
 LOCK_DOCUMENT_UPDATE_ENABLED = "lock:document:update_enabled_{document_id}"
 
-# 更新关键词表缓存锁
-LOCK_KEYWORD_TABLE_UPDATE_KEYWORD_TABLE = (
-    "lock:keyword_table:update:keyword_table_{dataset_id}"
-)
-
 # 更新片段启用状态缓存锁
 LOCK_SEGMENT_UPDATE_ENABLED = "lock:segment:update:enabled_{segment_id}"
+
+# 知识库关键词表版本号，关键词表每次变更后自增
+KEYWORD_TABLE_VERSION = "keyword_table:version:{dataset_id}"
+
+# 进程内关键词表缓存的内存预算，单位为字节，默认为256MB
+KEYWORD_TABLE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# 单个知识库关键词表允许进入进程内缓存的最大字节数，默认为32MB，超出时交由数据库计算
+KEYWORD_TABLE_CACHE_ENTRY_MAX_BYTES = 32 * 1024 * 1024
+
+# 同一知识库关键词表两次后台重新加载的最小间隔，单位为秒，批量上传期间的多次变更只会触发少量重新加载
+KEYWORD_TABLE_REFRESH_INTERVAL = 5
+
+# 单条倒排记录在进程内缓存中占用的估算字节数
+KEYWORD_TABLE_CACHE_POSTING_BYTES = 160
+
+# 文档处理批次进度，以哈希的形式记录批次文档总数、已处理数以及批次状态
+DOCUMENT_BATCH_PROGRESS = "document:batch_progress:{batch}"
+
+# 文档处理批次进度的过期时间，单位为秒，默认为1天
+DOCUMENT_BATCH_PROGRESS_EXPIRE_TIME = 86400
+
+# 文本向量缓存的命中统计，以哈希的形式记录文档向量与查询向量的命中/未命中次数
+EMBEDDINGS_CACHE_STATS = "embeddings:cache_stats"
+
+# 待写入数据库的知识库查询记录列表，每条记录为JSON字符串
+PENDING_DATASET_QUERIES = "write_behind:dataset_queries"
+
+# 待累加到数据库的片段命中次数，以哈希的形式记录{segment_id: 命中次数增量}
+PENDING_SEGMENT_HIT_COUNTS = "write_behind:segment_hit_counts"
+
+# 每次从缓存中批量写入数据库的最大记录数
+WRITE_BEHIND_BATCH_SIZE = 1000
+
+# 知识库内容版本号，知识库的片段、关键词、向量或启用状态变更后自增，用于检索结果缓存失效
+DATASET_CONTENT_VERSION = "dataset:content_version:{dataset_id}"
+
+# 智能体任务停止信号的发布订阅频道，消息内容为任务id
+AGENT_TASK_STOPPED_CHANNEL = "agent:task_stopped"
+
+# 智能体事件流，每个任务对应一个Redis Stream
+AGENT_EVENT_STREAM = "agent:events:{task_id}"
+
+# 智能体事件流的最大长度(近似裁剪)以及最后一次写入后的过期时间(秒)
+AGENT_EVENT_STREAM_MAX_LEN = 10000
+AGENT_EVENT_STREAM_EXPIRE_TIME = 1800
@@ -55,6 +55,17 @@ class DocumentStatus(str, Enum):
     ERROR = "error"
 
 
+class DocumentBatchStatus(str, Enum):
+    """文档处理批次状态枚举"""
+
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+
+
+# 单个处理批次最多拆分的文档构建子任务数，超出时按照文件大小均衡分组
+BUILD_DOCUMENTS_MAX_SUBTASKS = 64
+
+
 class SegmentStatus(str, Enum):
     """分段状态枚举"""
 
@@ -72,6 +83,32 @@ class RetrievalStrategy(str, Enum):
     HYBRID = "hybrid"
 
 
+class FusionStrategy(str, Enum):
+    """混合检索结果融合策略枚举"""
+
+    RRF = "rrf"  # 加权倒数排名融合
+    MIN_MAX = "min_max"  # 最小-最大归一化得分加权融合
+
+
+# 混合检索时每个检索器的超额召回倍数，融合后再截取前k条数据
+HYBRID_OVERFETCH_FACTOR = 3
+
+# 混合检索默认的检索器权重
+DEFAULT_HYBRID_WEIGHTS = {"semantic": 0.5, "full_text": 0.5}
+
+
+class FullTextRanking(str, Enum):
+    """全文检索排序方式枚举"""
+
+    KEYWORD_COUNT = "keyword_count"  # 按命中关键词数排序
+    BM25 = "bm25"  # 按BM25得分排序
+
+
+# BM25词频饱和参数与片段长度归一化参数
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
 class RetrievalSource(str, Enum):
     """检索来源枚举"""
 
@@ -0,0 +1,59 @@
+from flask import Flask
+
+from internal.core.agent.agents import (
+    configure_agent_executor,
+    configure_agent_event_bus,
+    configure_tool_concurrency,
+)
+from internal.core.language_model import llm_client_registry
+from internal.core.tools.api_tools.providers import api_tool_http_client
+from internal.core.tools.api_tools.providers.api_providers_manager import (
+    api_tool_cache,
+)
+from internal.core.tools.builtin_tools.providers.builtin_provider_manager import (
+    builtin_tool_cache,
+)
+from internal.service.retrieval_cache_service import retrieval_result_cache
+from internal.service.retrieval_service import (
+    retriever_registry,
+    authorized_dataset_cache,
+)
+
+
+def init_app(app: Flask):
+    """进程内共享的缓存与客户端初始化，模块导入时尚未加载.env中的环境变量，需要在应用创建后根据配置设置"""
+    # 检索结果缓存配置
+    retrieval_result_cache.max_size = app.config["RETRIEVAL_CACHE_SIZE"]
+    retrieval_result_cache.ttl = app.config["RETRIEVAL_CACHE_TTL"]
+
+    # 检索器注册表以及知识库权限缓存配置
+    retriever_registry.max_size = app.config["RETRIEVER_REGISTRY_SIZE"]
+    authorized_dataset_cache.max_size = app.config["AUTHORIZED_DATASET_CACHE_SIZE"]
+    authorized_dataset_cache.ttl = app.config["AUTHORIZED_DATASET_CACHE_TTL"]
+
+    # 智能体共享线程池、事件总线以及工具调用并发配置
+    configure_agent_executor(app.config["AGENT_MAX_WORKERS"])
+    configure_agent_event_bus(app.config["AGENT_EVENT_BUS"])
+    configure_tool_concurrency(
+        max_workers=app.config["AGENT_TOOL_MAX_WORKERS"],
+        max_inflight=app.config["AGENT_TOOL_MAX_INFLIGHT"],
+    )
+
+    # API工具共享的HTTP客户端配置
+    api_tool_http_client.configure(
+        connect_timeout=app.config["API_TOOL_CONNECT_TIMEOUT"],
+        read_timeout=app.config["API_TOOL_READ_TIMEOUT"],
+        max_retries=app.config["API_TOOL_MAX_RETRIES"],
+        pool_maxsize=app.config["API_TOOL_POOL_MAXSIZE"],
+        max_response_bytes=app.config["API_TOOL_MAX_RESPONSE_BYTES"],
+    )
+
+    # 编译好的API工具以及内置工具实例的缓存配置
+    api_tool_cache.max_size = app.config["API_TOOL_CACHE_SIZE"]
+    builtin_tool_cache.max_size = app.config["BUILTIN_TOOL_CACHE_SIZE"]
+
+    # 大语言模型客户端注册表配置
+    llm_client_registry.configure(
+        max_size=app.config["LLM_CLIENT_REGISTRY_SIZE"],
+        max_connections=app.config["LLM_MAX_CONNECTIONS"],
+    )
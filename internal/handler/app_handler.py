@@ -155,6 +155,19 @@ class AppHandler:
 
         return compact_generate_response(response)
 
+    @login_required
+    def resume_debug_chat(self, app_id: uuid.UUID, task_id: uuid.UUID):
+        """根据传递的应用id+任务id+游标，在连接断开后恢复调试会话的流式事件"""
+        # 1.优先使用浏览器自动携带的Last-Event-ID，其次使用查询参数中的游标
+        cursor = request.headers.get("Last-Event-ID") or request.args.get("cursor", "")
+
+        # 2.调用服务恢复流式事件
+        response = self.app_service.resume_debug_chat(
+            app_id, task_id, cursor, current_user
+        )
+
+        return compact_generate_response(response)
+
     @login_required
     def stop_debug_chat(self, app_id: uuid.UUID, task_id: uuid.UUID):
         """根据传递的应用id+任务id停止某个应用的指定调试会话"""
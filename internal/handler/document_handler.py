@@ -120,3 +120,12 @@ class DocumentHandler:
         )
 
         return success_json(documents_status)
+
+    @login_required
+    def get_batch_progress(self, dataset_id: UUID, batch: str):
+        """根据传递的知识库ID和批次号获取处理批次的整体进度"""
+        batch_progress = self.document_service.get_batch_progress(
+            dataset_id, batch, account=current_user
+        )
+
+        return success_json(batch_progress)
@@ -1,7 +1,9 @@
 from datetime import datetime
+from functools import cache
 import hashlib
 import importlib
-from typing import Any, List
+from typing import Any, Callable, List
+import tiktoken
 from langchain_core.documents import Document
 
 
@@ -28,6 +30,35 @@ def generate_text_hash(text: str) -> str:
     return hashlib.sha3_256(text.encode()).hexdigest()
 
 
+@cache
+def get_token_encoding() -> tiktoken.Encoding:
+    """获取计算token数使用的编码器，编码器在进程内只加载一次"""
+    return tiktoken.encoding_for_model("gpt-3.5")
+
+
+def calculate_token_count(text: str) -> int:
+    """计算传入文本的token数"""
+    return len(get_token_encoding().encode(text))
+
+
+def calculate_token_counts(texts: list[str]) -> list[int]:
+    """批量计算文本列表的token数，内部一次性并行编码所有文本"""
+    return [len(tokens) for tokens in get_token_encoding().encode_batch(texts)]
+
+
+def create_token_length_function() -> Callable[[str], int]:
+    """创建带有记忆的token数计算函数，文本分割器在分割与合并时会重复计算同一段文本的长度"""
+    token_counts: dict[str, int] = {}
+
+    def length_function(text: str) -> int:
+        token_count = token_counts.get(text)
+        if token_count is None:
+            token_count = token_counts[text] = calculate_token_count(text)
+        return token_count
+
+    return length_function
+
+
 def datetime_to_timestamp(dt: datetime) -> int:
     """将datetime类型转换为时间戳，如果数据不存在则返回0"""
     if dt is None:
@@ -0,0 +1,69 @@
+"""“关键词倒排表”
+
+Revision ID: 6f58accb9117
+Revises: c12302c67026
+Create Date: 2026-10-18 10:12:36.418205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '6f58accb9117'
+down_revision = 'c12302c67026'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('segment_keyword',
+    sa.Column('id', sa.UUID(), server_default=sa.text('uuid_generate_v4()'), nullable=False),
+    sa.Column('dataset_id', sa.UUID(), nullable=False),
+    sa.Column('keyword', sa.Text(), server_default=sa.text("''::text"), nullable=False),
+    sa.Column('segment_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP(0)'), nullable=False),
+    sa.PrimaryKeyConstraint('id', name='pk_segment_keyword_id'),
+    sa.UniqueConstraint('dataset_id', 'keyword', 'segment_id', name='uq_segment_keyword_dataset_id_keyword_segment_id')
+    )
+    with op.batch_alter_table('segment_keyword', schema=None) as batch_op:
+        batch_op.create_index('idx_segment_keyword_segment_id', ['segment_id'], unique=False)
+
+    # 将原有JSONB关键词表展开为倒排记录
+    op.execute("""
+        INSERT INTO segment_keyword (dataset_id, keyword, segment_id)
+        SELECT DISTINCT kt.dataset_id, kv.key, ids.segment_id::uuid
+        FROM keyword_table AS kt
+        CROSS JOIN LATERAL jsonb_each(kt.keyword_table) AS kv
+        CROSS JOIN LATERAL jsonb_array_elements_text(kv.value) AS ids(segment_id)
+    """)
+
+    op.drop_table('keyword_table')
+
+
+def downgrade():
+    op.create_table('keyword_table',
+    sa.Column('id', sa.UUID(), server_default=sa.text('uuid_generate_v4()'), autoincrement=False, nullable=False),
+    sa.Column('dataset_id', sa.UUID(), autoincrement=False, nullable=False),
+    sa.Column('keyword_table', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), autoincrement=False, nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP(0)'), autoincrement=False, nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP(0)'), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('id', name='pk_keyword_table_id')
+    )
+
+    # 将倒排记录重新聚合为每个知识库一条的JSONB关键词表
+    op.execute("""
+        INSERT INTO keyword_table (dataset_id, keyword_table)
+        SELECT dataset_id, jsonb_object_agg(keyword, segment_ids)
+        FROM (
+            SELECT dataset_id, keyword, jsonb_agg(segment_id::text) AS segment_ids
+            FROM segment_keyword
+            GROUP BY dataset_id, keyword
+        ) AS postings
+        GROUP BY dataset_id
+    """)
+
+    with op.batch_alter_table('segment_keyword', schema=None) as batch_op:
+        batch_op.drop_index('idx_segment_keyword_segment_id')
+
+    op.drop_table('segment_keyword')
@@ -0,0 +1,81 @@
+"""“BM25统计信息”
+
+Revision ID: daf08e51c40c
+Revises: 6f58accb9117
+Create Date: 2026-10-18 14:36:52.903114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'daf08e51c40c'
+down_revision = '6f58accb9117'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('keyword_statistic',
+    sa.Column('id', sa.UUID(), server_default=sa.text('uuid_generate_v4()'), nullable=False),
+    sa.Column('dataset_id', sa.UUID(), nullable=False),
+    sa.Column('keyword', sa.Text(), server_default=sa.text("''::text"), nullable=False),
+    sa.Column('document_frequency', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP(0)'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP(0)'), nullable=False),
+    sa.PrimaryKeyConstraint('id', name='pk_keyword_statistic_id'),
+    sa.UniqueConstraint('dataset_id', 'keyword', name='uq_keyword_statistic_dataset_id_keyword')
+    )
+    op.create_table('dataset_statistic',
+    sa.Column('id', sa.UUID(), server_default=sa.text('uuid_generate_v4()'), nullable=False),
+    sa.Column('dataset_id', sa.UUID(), nullable=False),
+    sa.Column('segment_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('segment_length_total', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP(0)'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP(0)'), nullable=False),
+    sa.PrimaryKeyConstraint('id', name='pk_dataset_statistic_id'),
+    sa.UniqueConstraint('dataset_id', name='uq_dataset_statistic_dataset_id')
+    )
+    with op.batch_alter_table('segment_keyword', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('frequency', sa.Integer(), server_default=sa.text('1'), nullable=False))
+        batch_op.add_column(sa.Column('segment_length', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+    # 回填倒排记录的词频以及片段长度
+    op.execute("""
+        UPDATE segment_keyword AS sk
+        SET segment_length = s.token_count,
+            frequency = GREATEST(
+                (char_length(s.content) - char_length(replace(s.content, sk.keyword, '')))
+                / GREATEST(char_length(sk.keyword), 1),
+                1
+            )
+        FROM segment AS s
+        WHERE s.id = sk.segment_id
+    """)
+
+    # 回填关键词文档频率以及知识库片段统计
+    op.execute("""
+        INSERT INTO keyword_statistic (dataset_id, keyword, document_frequency)
+        SELECT dataset_id, keyword, count(*)
+        FROM segment_keyword
+        GROUP BY dataset_id, keyword
+    """)
+    op.execute("""
+        INSERT INTO dataset_statistic (dataset_id, segment_count, segment_length_total)
+        SELECT dataset_id, count(*), sum(segment_length)
+        FROM (
+            SELECT DISTINCT dataset_id, segment_id, segment_length
+            FROM segment_keyword
+        ) AS segments
+        GROUP BY dataset_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('segment_keyword', schema=None) as batch_op:
+        batch_op.drop_column('segment_length')
+        batch_op.drop_column('frequency')
+
+    op.drop_table('dataset_statistic')
+    op.drop_table('keyword_statistic')
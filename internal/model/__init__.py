@@ -1,7 +1,16 @@
 from .app import App, AppDatasetJoin, AppConfig, AppConfigVersion
 from .api_tool import ApiTool, ApiToolProvider
 from .upload_file import UploadFile
-from .dataset import Dataset, DatasetQuery, Document, Segment, KeywordTable, ProcessRule
+from .dataset import (
+    Dataset,
+    DatasetQuery,
+    Document,
+    Segment,
+    SegmentKeyword,
+    KeywordStatistic,
+    DatasetStatistic,
+    ProcessRule,
+)
 from .conversation import Conversation, Message, MessageAgentThought
 from .account import Account, AccountOAuth
 
@@ -15,7 +24,9 @@ __all__ = [
     "DatasetQuery",
     "Document",
     "Segment",
-    "KeywordTable",
+    "SegmentKeyword",
+    "KeywordStatistic",
+    "DatasetStatistic",
     "ProcessRule",
     "AppDatasetJoin",
     "Conversation",
@@ -4,9 +4,12 @@ from sqlalchemy import (
     String,
     Text,
     Integer,
+    BigInteger,
     Boolean,
     DateTime,
     PrimaryKeyConstraint,
+    UniqueConstraint,
+    Index,
     text,
     func,
 )
@@ -207,15 +210,72 @@ class Segment(db.Model):
         return db.session.query(Document).get(self.document_id)
 
 
-class KeywordTable(db.Model):
-    """关键词表模型"""
+class SegmentKeyword(db.Model):
+    """片段关键词倒排表模型，每条记录对应知识库下一个关键词与一个片段的映射"""
+
+    __tablename__ = "segment_keyword"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", name="pk_segment_keyword_id"),
+        # 唯一约束同时作为(dataset_id, keyword)的前缀索引，用于关键词检索
+        UniqueConstraint(
+            "dataset_id",
+            "keyword",
+            "segment_id",
+            name="uq_segment_keyword_dataset_id_keyword_segment_id",
+        ),
+        Index("idx_segment_keyword_segment_id", "segment_id"),
+    )
+
+    id = Column(UUID, nullable=False, server_default=text("uuid_generate_v4()"))
+    dataset_id = Column(UUID, nullable=False)
+    keyword = Column(Text, nullable=False, server_default=text("''::text"))
+    segment_id = Column(UUID, nullable=False)
+    frequency = Column(Integer, nullable=False, server_default=text("1"))
+    segment_length = Column(Integer, nullable=False, server_default=text("0"))
+    created_at = Column(
+        DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP(0)")
+    )
+
+
+class KeywordStatistic(db.Model):
+    """关键词统计表模型，记录知识库下每个关键词的文档频率(包含该关键词的片段数)"""
+
+    __tablename__ = "keyword_statistic"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", name="pk_keyword_statistic_id"),
+        UniqueConstraint(
+            "dataset_id", "keyword", name="uq_keyword_statistic_dataset_id_keyword"
+        ),
+    )
+
+    id = Column(UUID, nullable=False, server_default=text("uuid_generate_v4()"))
+    dataset_id = Column(UUID, nullable=False)
+    keyword = Column(Text, nullable=False, server_default=text("''::text"))
+    document_frequency = Column(Integer, nullable=False, server_default=text("0"))
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        server_default=text("CURRENT_TIMESTAMP(0)"),
+        server_onupdate=text("CURRENT_TIMESTAMP(0)"),
+    )
+    created_at = Column(
+        DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP(0)")
+    )
 
-    __tablename__ = "keyword_table"
-    __table_args__ = (PrimaryKeyConstraint("id", name="pk_keyword_table_id"),)
+
+class DatasetStatistic(db.Model):
+    """知识库全文检索统计表模型，记录知识库下已建立倒排索引的片段数及片段总长度"""
+
+    __tablename__ = "dataset_statistic"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", name="pk_dataset_statistic_id"),
+        UniqueConstraint("dataset_id", name="uq_dataset_statistic_dataset_id"),
+    )
 
     id = Column(UUID, nullable=False, server_default=text("uuid_generate_v4()"))
     dataset_id = Column(UUID, nullable=False)
-    keyword_table = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    segment_count = Column(Integer, nullable=False, server_default=text("0"))
+    segment_length_total = Column(BigInteger, nullable=False, server_default=text("0"))
     updated_at = Column(
         DateTime,
         nullable=False,
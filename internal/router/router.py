@@ -109,6 +109,11 @@ class Router:
             view_func=self.app_handler.stop_debug_chat,
         )
 
+        blueprint.add_url_rule(
+            "/apps/<uuid:app_id>/conversations/tasks/<uuid:task_id>/events",
+            view_func=self.app_handler.resume_debug_chat,
+        )
+
         # 内置插件广场模块
         blueprint.add_url_rule(
             "/builtin-tools", view_func=self.builtin_tool_handler.get_builtin_tools
@@ -239,6 +244,11 @@ class Router:
             view_func=self.document_handler.get_documents_status,
         )
 
+        blueprint.add_url_rule(
+            "/datasets/<uuid:dataset_id>/documents/batch/<string:batch>/progress",
+            view_func=self.document_handler.get_batch_progress,
+        )
+
         blueprint.add_url_rule(
             "/datasets/<uuid:dataset_id>/documents",
             view_func=self.document_handler.get_documents_with_page,
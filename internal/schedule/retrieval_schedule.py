@@ -0,0 +1,11 @@
+from celery import shared_task
+
+
+@shared_task
+def flush_retrieval_records() -> None:
+    """定时将缓存中的知识库查询记录与片段命中次数批量写入数据库"""
+    from app.http.module import injector
+    from internal.service.retrieval_service import RetrievalService
+
+    retrieval_service = injector.get(RetrievalService)
+    retrieval_service.flush_retrieval_records()
@@ -7,7 +7,12 @@ from flask_login import LoginManager
 
 from internal.exception.exception import CustomException
 from internal.router import Router
-from internal.extension import logging_extension, redis_extension, celery_extension
+from internal.extension import (
+    logging_extension,
+    redis_extension,
+    celery_extension,
+    runtime_extension,
+)
 from config import Config
 
 from pkg.response.http_code import HttpCode
@@ -43,6 +48,7 @@ class Http(Flask):
         logging_extension.init_app(self)
         redis_extension.init_app(self)
         celery_extension.init_app(self)
+        runtime_extension.init_app(self)
         login_manager.init_app(self)
         # with self.app_context():  # 创建上下文
         #     _ = App()
@@ -14,6 +14,8 @@ from .process_rule_service import ProcessRuleService
 from .keyword_table_service import KeywordTableService
 from .segment_service import SegmentService
 from .retrieval_service import RetrievalService
+from .retrieval_cache_service import RetrievalCacheService
+from .rerank_service import RerankService
 from .conversation_service import ConversationService
 from .jwt_service import JwtService
 from .account_service import AccountService
@@ -36,6 +38,8 @@ __all__ = [
     "KeywordTableService",
     "SegmentService",
     "RetrievalService",
+    "RetrievalCacheService",
+    "RerankService",
     "ConversationService",
     "JwtService",
     "AccountService",
@@ -59,7 +59,10 @@ class ApiToolService(BaseService):
 
         # 开启数据库自动提交
         with self.db.auto_commit():
-            # 先删除该工具提供者下的所有工具
+            # 先删除该工具提供者下的所有工具，同时删除缓存中编译好的工具
+            self.api_providers_manager.invalidate_tools(
+                api_tool.id for api_tool in api_tool_provider.tools
+            )
             self.db.session.query(ApiTool).filter(
                 ApiTool.provider_id == provider_id, ApiTool.account_id == account.id
             ).delete()
@@ -226,7 +229,10 @@ class ApiToolService(BaseService):
 
         # 开启数据库自动提交
         with self.db.auto_commit():
-            # 删除API工具
+            # 删除API工具，同时删除缓存中编译好的工具
+            self.api_providers_manager.invalidate_tools(
+                api_tool.id for api_tool in api_tool_provider.tools
+            )
             self.db.session.query(ApiTool).filter(
                 ApiTool.provider_id == provider_id, ApiTool.account_id == account.id
             ).delete()
@@ -10,13 +10,13 @@ from datetime import datetime
 from flask import request, current_app, Flask
 from injector import inject
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
 from redis import Redis
 from sqlalchemy import func, desc
 
 from internal.core.agent.agents import FunctionCallAgent, AgentQueueManager
 from internal.core.agent.entities.agent_entity import AgentConfig
-from internal.core.agent.entities.queue_entity import QueueEvent
+from internal.core.agent.entities.queue_entity import AgentThought, QueueEvent
+from internal.core.language_model import llm_client_registry
 from internal.core.memory import TokenBufferMemory
 from internal.core.tools.api_tools.entities import ToolEntity
 
@@ -24,7 +24,7 @@ from internal.core.tools.api_tools.providers import ApiProvidersManager
 from internal.core.tools.builtin_tools.providers import BuiltInProviderManager
 from internal.entity.app_entity import AppStatus, AppConfigType, DEFAULT_APP_CONFIG
 from internal.entity.conversation_entity import InvokeFrom, MessageStatus
-from internal.entity.dataset_entity import RetrievalSource
+from internal.entity.dataset_entity import RetrievalSource, FusionStrategy
 from internal.exception import (
     NotFoundException,
     ForbiddenException,
@@ -37,6 +37,7 @@ from internal.model import (
     Account,
     AppConfigVersion,
     ApiTool,
+    ApiToolProvider,
     Dataset,
     AppConfig,
     AppDatasetJoin,
@@ -54,6 +55,7 @@ from pkg.sqlalchemy import SQLAlchemy
 from .base_service import BaseService
 from .conversation_service import ConversationService
 from .retrieval_service import RetrievalService
+from internal.task.agent_task import run_debug_agent
 
 
 @inject
@@ -533,89 +535,26 @@ class AppService(BaseService):
             status=MessageStatus.NORMAL,
         )
 
-        # todo:5.根据传递的model_config实例化不同的LLM模型，等待多LLM接入后该处会发生变化
-        llm = ChatOpenAI(
-            model=draft_app_config["model_config"]["model"],
-            **draft_app_config["model_config"]["parameters"],
-        )
-
-        # 6.实例化TokenBufferMemory用于提取短期记忆
-        token_buffer_memory = TokenBufferMemory(
-            db=self.db,
-            conversation=debug_conversation,
-            model_instance=llm,
-        )
-        history = token_buffer_memory.get_history_prompt_messages(
-            message_limit=draft_app_config["dialog_round"],
+        # 5.登记任务，跨进程的事件总线可以将智能体交给Celery执行，否则在当前进程的线程池中执行
+        task_id = uuid.uuid4()
+        agent_queue_manager = AgentQueueManager(
+            user_id=account.id, invoke_from=InvokeFrom.DEBUGGER
         )
-
-        # 7.将草稿配置中的tools转换成LangChain工具
-        tools = []
-        for tool in draft_app_config["tools"]:
-            # 8.根据不同的工具类型执行不同的操作
-            if tool["type"] == "builtin_tool":
-                # 9.内置工具，通过builtin_provider_manager获取工具实例
-                builtin_tool = self.builtin_provider_manager.get_tool(
-                    tool["provider"]["id"], tool["tool"]["name"]
-                )
-                if not builtin_tool:
-                    continue
-                tools.append(builtin_tool(**tool["tool"]["params"]))
-            else:
-                # 10.API工具，首先根据id找到ApiTool记录，然后创建示例
-                api_tool = self.get(ApiTool, tool["tool"]["id"])
-                if not api_tool:
-                    continue
-                tools.append(
-                    self.api_provider_manager.get_tool(
-                        ToolEntity(
-                            id=str(api_tool.id),
-                            name=api_tool.name,
-                            url=api_tool.url,
-                            method=api_tool.method,
-                            description=api_tool.description,
-                            headers=api_tool.provider.headers,
-                            parameters=api_tool.parameters,
-                        )
-                    )
-                )
-
-        # 11.检测是否关联了知识库
-        if draft_app_config["datasets"]:
-            # 12.构建LangChain知识库检索工具
-            dataset_retrieval = (
-                self.retrieval_service.create_langchain_tool_from_search(
-                    flask_app=current_app._get_current_object(),
-                    dataset_ids=[
-                        dataset["id"] for dataset in draft_app_config["datasets"]
-                    ],
-                    account_id=account.id,
-                    retrival_source=RetrievalSource.APP,
-                    **draft_app_config["retrieval_config"],
-                )
+        if (
+            current_app.config["AGENT_EXECUTOR"] == "celery"
+            and agent_queue_manager.event_bus.shared_across_processes
+        ):
+            agent_queue_manager.register_task(task_id)
+            run_debug_agent.delay(app_id, query, account.id, task_id)
+            agent_thought_stream = agent_queue_manager.listen(task_id)
+        else:
+            agent, agent_input = self._build_debug_agent(
+                draft_app_config, debug_conversation, query, account
             )
-            tools.append(dataset_retrieval)
-
-        # todo:13.构建Agent智能体，目前暂时使用FunctionCallAgent
-        agent = FunctionCallAgent(
-            llm=llm,
-            agent_config=AgentConfig(
-                user_id=account.id,
-                invoke_from=InvokeFrom.DEBUGGER,
-                enable_long_term_memory=draft_app_config["long_term_memory"]["enable"],
-                tools=tools,
-                review_config=draft_app_config["review_config"],
-            ),
-        )
+            agent_thought_stream = agent.stream({**agent_input, "task_id": task_id})
 
         agent_thoughts = {}
-        for agent_thought in agent.stream(
-            {
-                "messages": [HumanMessage(query)],
-                "history": history,
-                "long_term_memory": debug_conversation.summary,
-            }
-        ):
+        for agent_thought in agent_thought_stream:
             # 15.提取thought以及answer
             event_id = str(agent_thought.id)
 
@@ -675,7 +614,7 @@ class AppService(BaseService):
                 "answer": agent_thought.answer,
                 "latency": agent_thought.latency,
             }
-            yield f"event: {agent_thought.event}\ndata:{json.dumps(data)}\n\n"
+            yield self._format_agent_thought_event(agent_thought, data)
 
         # 22.将消息以及推理过程添加到数据库
         thread = Thread(
@@ -692,6 +631,177 @@ class AppService(BaseService):
         )
         thread.start()
 
+    def run_debug_agent(
+        self, app_id: UUID, query: str, account_id: UUID, task_id: UUID
+    ) -> None:
+        """在Celery任务中重新构建调试智能体并同步执行，事件通过跨进程的事件总线推送给监听方"""
+        # 1.获取账号、应用草稿配置以及调试会话信息
+        account = self.get(Account, account_id)
+        app = self.get_app(app_id, account)
+        draft_app_config = self.get_draft_app_config(app_id, account)
+
+        # 2.构建智能体并使用指定的任务id执行
+        agent, agent_input = self._build_debug_agent(
+            draft_app_config, app.debug_conversation, query, account
+        )
+        agent.run({**agent_input, "task_id": task_id})
+
+    def resume_debug_chat(
+        self, app_id: UUID, task_id: UUID, cursor: str, account: Account
+    ) -> Generator:
+        """根据传递的应用id+任务id+游标，在连接断开后从游标之后恢复调试会话的流式事件"""
+        # 1.获取应用信息并校验任务归属
+        app = self.get_app(app_id, account)
+        if not AgentQueueManager.check_task_belong(
+            task_id, InvokeFrom.DEBUGGER, account.id
+        ):
+            raise NotFoundException("该调试任务不存在或已结束")
+
+        # 2.从游标之后监听事件并返回流式事件数据
+        agent_queue_manager = AgentQueueManager(
+            user_id=account.id, invoke_from=InvokeFrom.DEBUGGER
+        )
+        for agent_thought in agent_queue_manager.listen(task_id, cursor):
+            data = {
+                "id": str(agent_thought.id),
+                "conversation_id": str(app.debug_conversation_id),
+                "task_id": str(agent_thought.task_id),
+                "event": agent_thought.event,
+                "thought": agent_thought.thought,
+                "observation": agent_thought.observation,
+                "tool": agent_thought.tool,
+                "tool_input": agent_thought.tool_input,
+                "answer": agent_thought.answer,
+                "latency": agent_thought.latency,
+            }
+            yield self._format_agent_thought_event(agent_thought, data)
+
+    def _build_debug_agent(
+        self,
+        draft_app_config: dict[str, Any],
+        debug_conversation: Conversation,
+        query: str,
+        account: Account,
+    ) -> tuple[FunctionCallAgent, dict[str, Any]]:
+        """根据应用草稿配置构建调试智能体，返回智能体以及智能体的输入"""
+        # todo:1.根据传递的model_config实例化不同的LLM模型，等待多LLM接入后该处会发生变化
+        llm = llm_client_registry.get_llm(
+            model=draft_app_config["model_config"]["model"],
+            **draft_app_config["model_config"]["parameters"],
+        )
+
+        # 2.实例化TokenBufferMemory用于提取短期记忆
+        token_buffer_memory = TokenBufferMemory(
+            db=self.db,
+            conversation=debug_conversation,
+            model_instance=llm,
+        )
+        history = token_buffer_memory.get_history_prompt_messages(
+            message_limit=draft_app_config["dialog_round"],
+        )
+
+        # 3.批量查询草稿配置中关联的API工具以及工具提供者记录，避免逐条查询
+        api_tool_ids = [
+            tool["tool"]["id"]
+            for tool in draft_app_config["tools"]
+            if tool["type"] == "api_tool"
+        ]
+        api_tools, api_tool_providers = {}, {}
+        if api_tool_ids:
+            api_tools = {
+                str(api_tool.id): api_tool
+                for api_tool in self.db.session.query(ApiTool)
+                .filter(ApiTool.id.in_(api_tool_ids))
+                .all()
+            }
+            api_tool_providers = {
+                api_tool_provider.id: api_tool_provider
+                for api_tool_provider in self.db.session.query(ApiToolProvider)
+                .filter(
+                    ApiToolProvider.id.in_(
+                        list({api_tool.provider_id for api_tool in api_tools.values()})
+                    )
+                )
+                .all()
+            }
+
+        # 4.将草稿配置中的tools转换成LangChain工具，编译好的工具会被缓存复用
+        tools = []
+        for tool in draft_app_config["tools"]:
+            if tool["type"] == "builtin_tool":
+                # 5.内置工具，通过builtin_provider_manager获取工具实例
+                builtin_tool = self.builtin_provider_manager.create_tool(
+                    tool["provider"]["id"],
+                    tool["tool"]["name"],
+                    tool["tool"]["params"],
+                )
+                if not builtin_tool:
+                    continue
+                tools.append(builtin_tool)
+            else:
+                # 6.API工具，根据id找到ApiTool记录，然后获取工具
+                api_tool = api_tools.get(str(tool["tool"]["id"]))
+                api_tool_provider = (
+                    api_tool_providers.get(api_tool.provider_id) if api_tool else None
+                )
+                if not api_tool or not api_tool_provider:
+                    continue
+                tools.append(
+                    self.api_provider_manager.get_tool(
+                        ToolEntity(
+                            id=str(api_tool.id),
+                            name=api_tool.name,
+                            url=api_tool.url,
+                            method=api_tool.method,
+                            description=api_tool.description,
+                            headers=api_tool_provider.headers,
+                            parameters=api_tool.parameters,
+                        )
+                    )
+                )
+
+        # 7.检测是否关联了知识库
+        if draft_app_config["datasets"]:
+            # 8.构建LangChain知识库检索工具
+            dataset_retrieval = (
+                self.retrieval_service.create_langchain_tool_from_search(
+                    flask_app=current_app._get_current_object(),
+                    dataset_ids=[
+                        dataset["id"] for dataset in draft_app_config["datasets"]
+                    ],
+                    account_id=account.id,
+                    retrival_source=RetrievalSource.APP,
+                    **draft_app_config["retrieval_config"],
+                )
+            )
+            tools.append(dataset_retrieval)
+
+        # todo:9.构建Agent智能体，目前暂时使用FunctionCallAgent
+        agent = FunctionCallAgent(
+            llm=llm,
+            agent_config=AgentConfig(
+                user_id=account.id,
+                invoke_from=InvokeFrom.DEBUGGER,
+                enable_long_term_memory=draft_app_config["long_term_memory"]["enable"],
+                tools=tools,
+                review_config=draft_app_config["review_config"],
+            ),
+        )
+
+        return agent, {
+            "messages": [HumanMessage(query)],
+            "history": history,
+            "long_term_memory": debug_conversation.summary,
+        }
+
+    @classmethod
+    def _format_agent_thought_event(
+        cls, agent_thought: AgentThought, data: dict[str, Any]
+    ) -> str:
+        """将智能体事件格式化成SSE事件，事件总线提供游标时携带id字段，便于客户端断线后恢复"""
+        event_id = f"id: {agent_thought.cursor}\n" if agent_thought.cursor else ""
+        return f"{event_id}event: {agent_thought.event}\ndata:{json.dumps(data)}\n\n"
+
     def stop_debug_chat(self, app_id: UUID, task_id: UUID, account: Account) -> None:
         """根据传递的应用id+任务id+账号，停止某个应用的调试会话，中断流式事件"""
         # 1.获取应用信息并校验权限
@@ -989,8 +1099,14 @@ class AppService(BaseService):
             # 9.1 判断检索配置非空且类型为字典
             if not retrieval_config or not isinstance(retrieval_config, dict):
                 raise ValidateErrorException("检索配置格式错误")
-            # 9.2 校验检索配置的字段类型
-            if set(retrieval_config.keys()) != {"retrieval_strategy", "k", "score"}:
+            # 9.2 校验检索配置的字段类型，fusion与weights为可选的混合检索配置，rerank为可选的重排序配置
+            required_keys = {"retrieval_strategy", "k", "score"}
+            optional_keys = {"fusion", "weights", "rerank"}
+            if not (
+                required_keys
+                <= set(retrieval_config.keys())
+                <= required_keys | optional_keys
+            ):
                 raise ValidateErrorException("检索配置格式错误")
             # 9.3 校验检索策略是否正确
             if retrieval_config["retrieval_strategy"] not in [
@@ -1009,6 +1125,34 @@ class AppService(BaseService):
                 0 <= retrieval_config["score"] <= 1
             ):
                 raise ValidateErrorException("最小匹配范围为0-1")
+            # 9.6 校验混合检索融合策略
+            if "fusion" in retrieval_config and retrieval_config["fusion"] not in [
+                strategy.value for strategy in FusionStrategy
+            ]:
+                raise ValidateErrorException("混合检索融合策略格式错误")
+            # 9.7 校验混合检索权重，权重为semantic/full_text到0-1之间浮点数的映射
+            if "weights" in retrieval_config:
+                weights = retrieval_config["weights"]
+                if (
+                    not isinstance(weights, dict)
+                    or not set(weights.keys()) <= {"semantic", "full_text"}
+                    or not all(
+                        isinstance(weight, (int, float)) and 0 <= weight <= 1
+                        for weight in weights.values()
+                    )
+                ):
+                    raise ValidateErrorException("混合检索权重格式错误")
+            # 9.8 校验重排序配置，候选文档数范围为1-50
+            if "rerank" in retrieval_config:
+                rerank = retrieval_config["rerank"]
+                if (
+                    not isinstance(rerank, dict)
+                    or set(rerank.keys()) != {"enable", "fetch_k"}
+                    or not isinstance(rerank["enable"], bool)
+                    or not isinstance(rerank["fetch_k"], int)
+                    or not (1 <= rerank["fetch_k"] <= 50)
+                ):
+                    raise ValidateErrorException("重排序配置格式错误")
 
         # 10.校验long_term_memory长期记忆配置
         if "long_term_memory" in draft_app_config:
@@ -1,4 +1,6 @@
+import uuid
 from typing import Any, Optional
+from sqlalchemy import insert
 from pkg.sqlalchemy import SQLAlchemy
 from internal.exception import FailException
 
@@ -16,6 +18,21 @@ class BaseService:
 
         return model_instance
 
+    def create_many(self, model: Any, rows: list[dict[str, Any]]) -> list[Any]:
+        """根据模型批量创建数据，主键在客户端生成，所有数据在同一个事务中通过一条insert...returning语句写入"""
+        if not rows:
+            return []
+
+        for row in rows:
+            row.setdefault("id", uuid.uuid4())
+
+        with self.db.auto_commit():
+            model_instances = self.db.session.scalars(
+                insert(model).returning(model), rows
+            ).all()
+
+        return model_instances
+
     def delete(self, model_instance: Any) -> Any:
         """删除数据"""
         with self.db.auto_commit():
@@ -5,8 +5,8 @@ from dataclasses import dataclass
 from .base_service import BaseService
 from pkg.sqlalchemy import SQLAlchemy
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
+from internal.core.language_model import llm_client_registry
 from internal.entity.conversation_entity import (
     SUMMARIZER_TEMPLATE,
     CONVERSATION_NAME_TEMPLATE,
@@ -29,8 +29,8 @@ class ConversationService(BaseService):
         # 创建prompt
         prompt = ChatPromptTemplate.from_template(SUMMARIZER_TEMPLATE)
 
-        # 构建大语言模型实例，并将大语言模型温度调低，降低幻觉的概率
-        llm = ChatOpenAI(
+        # 从注册表获取大语言模型实例，并将大语言模型温度调低，降低幻觉的概率
+        llm = llm_client_registry.get_llm(
             temperature=0.5,
             model="gpt-4o-mini",
             openai_api_key=os.getenv("OPENAI_API_KEY"),
@@ -58,8 +58,8 @@ class ConversationService(BaseService):
             [("system", CONVERSATION_NAME_TEMPLATE), ("human", "{query}")]
         )
 
-        # 构建大语言模型实例，并将大语言模型温度调低，降低幻觉的概率
-        llm = ChatOpenAI(
+        # 从注册表获取大语言模型实例，并将大语言模型温度调低，降低幻觉的概率
+        llm = llm_client_registry.get_llm(
             temperature=0,
             model="gpt-4o-mini",
             openai_api_key=os.getenv("OPENAI_API_KEY"),
@@ -106,8 +106,8 @@ class ConversationService(BaseService):
             [("system", SUGGESTED_QUESTIONS_TEMPLATE), ("human", "{histories}")]
         )
 
-        # 构建大语言模型实例，并将大语言模型温度调低，降低幻觉的概率
-        llm = ChatOpenAI(
+        # 从注册表获取大语言模型实例，并将大语言模型温度调低，降低幻觉的概率
+        llm = llm_client_registry.get_llm(
             # temperature=0,
             # model="gpt-4o-mini",
             # openai_api_key=os.getenv("OPENAI_API_KEY"),
@@ -10,7 +10,15 @@ from internal.schema.dataset_schema import (
     GetDatasetsWithPageReq,
     HitReq,
 )
-from internal.model import Dataset, Segment, DatasetQuery, AppDatasetJoin, Account
+from internal.model import (
+    Dataset,
+    Document,
+    Segment,
+    UploadFile,
+    DatasetQuery,
+    AppDatasetJoin,
+    Account,
+)
 from internal.exception import ValidateErrorException, NotFoundException, FailException
 from internal.entity.dataset_entity import DEFAULT_DATASET_DESCRIPTION_FORMATTER
 from pkg.paginator import Paginator
@@ -155,7 +163,7 @@ class DatasetService(BaseService):
 
         # 调用检索服务进行检索
         lc_documents = self.retrieval_service.search_in_datasets(
-            dataset_ids=[dataset_id], **req.data, account=account
+            dataset_ids=[dataset_id], **req.data, account_id=account.id
         )
 
         lc_documents_dict = {
@@ -163,42 +171,37 @@ class DatasetService(BaseService):
             for lc_document in lc_documents
         }
 
-        # 根据检索到的数据查询对应的片段信息
-        segments = (
-            self.db.session.query(Segment)
-            .filter(
-                Segment.id.in_(
-                    [
-                        str(lc_document.metadata["segment_id"])
-                        for lc_document in lc_documents
-                    ]
-                )
+        # 使用一次联表查询获取片段以及对应的文档名字、上传文件信息，避免逐条懒加载文档与上传文件
+        rows = (
+            self.db.session.query(
+                Segment, Document.name, UploadFile.extension, UploadFile.mime_type
             )
+            .join(Document, Document.id == Segment.document_id)
+            .outerjoin(UploadFile, UploadFile.id == Document.upload_file_id)
+            .filter(Segment.id.in_(list(lc_documents_dict.keys())))
             .all()
         )
-        segment_dict = {str(segment.id): segment for segment in segments}
+        row_dict = {str(row[0].id): row for row in rows}
 
-        # 排序片段数据
-        sorted_segments = [
-            segment_dict[str(lc_document.metadata["segment_id"])]
-            for lc_document in lc_documents
-            if str(lc_document.metadata["segment_id"]) in segment_dict
+        # 按照检索结果排序片段数据
+        sorted_rows = [
+            row_dict[segment_id]
+            for segment_id in lc_documents_dict.keys()
+            if segment_id in row_dict
         ]
 
         # 组装响应数据
         hit_result = []
 
-        for segment in sorted_segments:
-            document = segment.document
-            upload_file = document.upload_file
+        for segment, document_name, extension, mime_type in sorted_rows:
             hit_result.append(
                 {
                     "id": segment.id,
                     "document": {
-                        "id": document.id,
-                        "name": document.name,
-                        "extension": upload_file.extension,
-                        "mime_type": upload_file.mime_type,
+                        "id": segment.document_id,
+                        "name": document_name,
+                        "extension": extension,
+                        "mime_type": mime_type,
                     },
                     "dataset_id": segment.dataset_id,
                     "score": lc_documents_dict[str(segment.id)].metadata["score"],
@@ -6,12 +6,20 @@ from typing import List
 from injector import inject
 from dataclasses import dataclass
 
+from celery import chord
+
 from sqlalchemy import UUID, asc, desc, func
 
 from internal.exception import ForbiddenException, FailException, NotFoundException
 from .base_service import BaseService
 from pkg.sqlalchemy import SQLAlchemy
-from internal.entity.dataset_entity import ProcessType, SegmentStatus, DocumentStatus
+from internal.entity.dataset_entity import (
+    ProcessType,
+    SegmentStatus,
+    DocumentStatus,
+    DocumentBatchStatus,
+    BUILD_DOCUMENTS_MAX_SUBTASKS,
+)
 from internal.model import (
     Document,
     Dataset,
@@ -24,13 +32,19 @@ from internal.model import (
 from internal.entity.upload_file_entity import ALLOWED_DOCUMENT_EXTENSION
 from internal.task.document_task import (
     build_documents,
+    build_documents_completed,
     update_document_enabled,
     delete_document,
 )
 from internal.lib.helper import datetime_to_timestamp
 from internal.schema.document_schema import GetDocumentsWithPageReq
 from pkg.paginator import Paginator
-from internal.entity.cache_entity import LOCK_EXPIRE_TIME, LOCK_DOCUMENT_UPDATE_ENABLED
+from internal.entity.cache_entity import (
+    LOCK_EXPIRE_TIME,
+    LOCK_DOCUMENT_UPDATE_ENABLED,
+    DOCUMENT_BATCH_PROGRESS,
+    DOCUMENT_BATCH_PROGRESS_EXPIRE_TIME,
+)
 from redis import Redis
 
 
@@ -108,8 +122,29 @@ class DocumentService(BaseService):
             )
             documents.append(document)
 
-        # 调用异步任务，完成后续操作
-        build_documents.delay([document.id for document in documents])
+        # 将文档按照文件大小均衡拆分为多个子任务，使批次可以由多个Celery worker并行构建
+        document_groups = self._split_document_groups(
+            [
+                (document.id, upload_file.size)
+                for document, upload_file in zip(documents, upload_files)
+            ]
+        )
+
+        # 初始化批次进度，所有子任务完成后由回调任务将批次标记为已完成
+        cache_key = DOCUMENT_BATCH_PROGRESS.format(batch=batch)
+        self.redis_client.hset(
+            cache_key,
+            mapping={
+                "total_count": len(documents),
+                "processed_count": 0,
+                "subtask_count": len(document_groups),
+                "status": DocumentBatchStatus.PROCESSING.value,
+            },
+        )
+        self.redis_client.expire(cache_key, DOCUMENT_BATCH_PROGRESS_EXPIRE_TIME)
+        chord(
+            build_documents.s(document_ids, batch) for document_ids in document_groups
+        )(build_documents_completed.s(batch))
 
         # 返回文档列表与处理批次
         return documents, batch
@@ -118,24 +153,8 @@ class DocumentService(BaseService):
         self, dataset_id: UUID, batch: str, account: Account
     ) -> list[dict]:
         """根据传递的知识库id和批次号获取文档列表状态"""
-
-        # 检测知识库权限
-        dataset = self.get(Dataset, dataset_id)
-        if dataset is None or dataset.account_id != account.id:
-            raise ForbiddenException("无权限操作该知识库或知识库不存在")
-
-        # 查询当前知识库下该批次的文档列表
-        documents = (
-            self.db.session.query(Document)
-            .filter(
-                Document.dataset_id == dataset_id,
-                Document.batch == batch,
-            )
-            .order_by(asc("position"))
-            .all()
-        )
-        if documents is None or len(documents) == 0:
-            raise NotFoundException("该处理批次未找到文档")
+        # 检测知识库权限并查询当前知识库下该批次的文档列表
+        documents = self._get_batch_documents(dataset_id, batch, account)
 
         # 循环遍历文档列表提取文档的状态信息
         documents_status = []
@@ -188,6 +207,92 @@ class DocumentService(BaseService):
 
         return documents_status
 
+    def get_batch_progress(
+        self, dataset_id: UUID, batch: str, account: Account
+    ) -> dict:
+        """根据传递的知识库id和批次号获取处理批次的整体进度，缓存过期或不存在时根据文档状态计算"""
+        # 1.检测知识库权限并查询当前知识库下该批次的文档列表
+        documents = self._get_batch_documents(dataset_id, batch, account)
+
+        # 2.优先使用子任务实时累加的批次进度
+        progress = {
+            key.decode(): value.decode()
+            for key, value in self.redis_client.hgetall(
+                DOCUMENT_BATCH_PROGRESS.format(batch=batch)
+            ).items()
+        }
+        if progress:
+            return {
+                "total_count": int(progress.get("total_count", 0)),
+                "processed_count": int(progress.get("processed_count", 0)),
+                "subtask_count": int(progress.get("subtask_count", 0)),
+                "status": progress.get("status", DocumentBatchStatus.PROCESSING),
+                "completed_at": int(progress.get("completed_at", 0)),
+            }
+
+        # 3.批次进度已过期则根据文档状态计算
+        processed_count = len(
+            [
+                document
+                for document in documents
+                if document.status in [DocumentStatus.COMPLETED, DocumentStatus.ERROR]
+            ]
+        )
+        return {
+            "total_count": len(documents),
+            "processed_count": processed_count,
+            "subtask_count": 0,
+            "status": (
+                DocumentBatchStatus.COMPLETED
+                if processed_count == len(documents)
+                else DocumentBatchStatus.PROCESSING
+            ),
+            "completed_at": 0,
+        }
+
+    def _get_batch_documents(
+        self, dataset_id: UUID, batch: str, account: Account
+    ) -> list[Document]:
+        """检测知识库权限并获取知识库下指定批次的文档列表"""
+        # 1.检测知识库权限
+        dataset = self.get(Dataset, dataset_id)
+        if dataset is None or dataset.account_id != account.id:
+            raise ForbiddenException("无权限操作该知识库或知识库不存在")
+
+        # 2.查询当前知识库下该批次的文档列表
+        documents = (
+            self.db.session.query(Document)
+            .filter(
+                Document.dataset_id == dataset_id,
+                Document.batch == batch,
+            )
+            .order_by(asc("position"))
+            .all()
+        )
+        if documents is None or len(documents) == 0:
+            raise NotFoundException("该处理批次未找到文档")
+
+        return documents
+
+    @classmethod
+    def _split_document_groups(
+        cls, documents: list[tuple[UUID, int]]
+    ) -> list[list[UUID]]:
+        """将(文档id, 文件大小)列表按照文件大小均衡拆分为多个分组，文档数不超过子任务上限时每个文档单独成组"""
+        group_count = min(len(documents), BUILD_DOCUMENTS_MAX_SUBTASKS)
+        groups = [[] for _ in range(group_count)]
+        group_sizes = [0] * group_count
+
+        # 按照文件大小从大到小依次分配给当前总大小最小的分组
+        for document_id, size in sorted(
+            documents, key=lambda item: item[1], reverse=True
+        ):
+            index = group_sizes.index(min(group_sizes))
+            groups[index].append(document_id)
+            group_sizes[index] += size
+
+        return groups
+
     def get_document(
         self, dataset_id: UUID, document_id: UUID, account: Account
     ) -> Document:
@@ -1,31 +1,196 @@
+import json
+import logging
 import os
-from injector import inject
+import threading
+import time
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Iterator, Optional, Sequence
+from injector import inject, singleton
 from dataclasses import dataclass
+from flask import Flask
 from langchain_community.storage import RedisStore
 from langchain_core.embeddings import Embeddings
+from langchain_core.stores import ByteStore
 from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import EncoderBackedStore
 from redis import Redis
 from langchain_openai import OpenAIEmbeddings
-import tiktoken
 from langchain_huggingface import HuggingFaceEmbeddings
+from internal.entity.cache_entity import EMBEDDINGS_CACHE_STATS
+from internal.lib.helper import (
+    generate_text_hash,
+    calculate_token_count,
+    calculate_token_counts,
+)
+from pkg.cache import LRUCache
+
+# 文本嵌入模型名字，同时作为向量缓存的命名空间，避免更换模型后命中旧模型的向量
+EMBEDDINGS_MODEL_NAME = "Alibaba-NLP/gte-multilingual-base"
+
+
+class LRUByteStore(ByteStore):
+    """基于进程内LRU缓存的字节存储，用于缓存查询向量"""
+
+    def __init__(self, cache: LRUCache):
+        self.cache = cache
+
+    def mget(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        return [self.cache.get(key) for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, bytes]]) -> None:
+        for key, value in key_value_pairs:
+            self.cache.set(key, value, len(value))
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self.cache.delete(key)
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        for key in self.cache.keys():
+            if prefix is None or key.startswith(prefix):
+                yield key
+
+
+class InstrumentedByteStore(ByteStore):
+    """字节存储包装器，读取时在Redis中累加命中与未命中次数，用于统计向量缓存的命中率"""
+
+    def __init__(self, store: ByteStore, redis: Redis, name: str):
+        self.store = store
+        self.redis = redis
+        self.name = name
+
+    def mget(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        values = self.store.mget(keys)
+        hits = len([value for value in values if value is not None])
+        try:
+            pipeline = self.redis.pipeline(transaction=False)
+            pipeline.hincrby(EMBEDDINGS_CACHE_STATS, f"{self.name}_hits", hits)
+            pipeline.hincrby(
+                EMBEDDINGS_CACHE_STATS, f"{self.name}_misses", len(values) - hits
+            )
+            pipeline.execute()
+        except Exception as e:
+            logging.warning(f"记录向量缓存命中率失败, 错误信息: {str(e)}")
+        return values
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, bytes]]) -> None:
+        self.store.mset(key_value_pairs)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        self.store.mdelete(keys)
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        yield from self.store.yield_keys(prefix=prefix)
+
+
+class BatchEmbeddingEngine:
+    """批量文本嵌入引擎，将多个调用方(多个文档)提交的文本合并为大批次后，交由专用的工作线程调用嵌入模型计算"""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = 64,
+        max_batch_tokens: int = 16384,
+        max_workers: int = 1,
+        max_wait_time: float = 0.02,
+    ):
+        """构造函数，max_batch_size与max_batch_tokens限制单个批次的文本数与token数，max_wait_time为凑批的最长等待时间(秒)"""
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_workers = max_workers
+        self.max_wait_time = max_wait_time
+        self._requests: Queue[tuple[str, int, Future]] = Queue()
+        self._workers_pid: Optional[int] = None
+        self._workers_lock = threading.Lock()
+
+    def embed_documents(
+        self, texts: list[str], token_counts: Optional[list[int]] = None
+    ) -> list[list[float]]:
+        """提交文本列表并阻塞等待计算完成，返回与texts顺序一致的向量列表"""
+        self._start_workers()
+        if token_counts is None:
+            token_counts = [0] * len(texts)
+
+        futures = []
+        for text, token_count in zip(texts, token_counts):
+            future = Future()
+            self._requests.put((text, token_count, future))
+            futures.append(future)
+
+        return [future.result() for future in futures]
+
+    def _start_workers(self) -> None:
+        """在当前进程中启动嵌入工作线程，fork出的子进程需要重新启动"""
+        if self._workers_pid == os.getpid():
+            return
+
+        with self._workers_lock:
+            if self._workers_pid == os.getpid():
+                return
+            for _ in range(max(self.max_workers, 1)):
+                threading.Thread(target=self._run, daemon=True).start()
+            self._workers_pid = os.getpid()
+
+    def _run(self) -> None:
+        """工作线程，不断从请求队列中凑出批次并调用嵌入模型"""
+        pending = None
+        while True:
+            # 1.获取批次的第一条文本，上一批次超出token预算的文本会成为下一批次的第一条
+            batch = [pending if pending is not None else self._requests.get()]
+            pending = None
+            batch_tokens = batch[0][1]
+
+            # 2.在等待时间内持续凑批，直到达到批次文本数或token预算
+            deadline = time.monotonic() + self.max_wait_time
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._requests.get(
+                        timeout=max(deadline - time.monotonic(), 0)
+                    )
+                except Empty:
+                    break
+                if batch_tokens + item[1] > self.max_batch_tokens:
+                    pending = item
+                    break
+                batch.append(item)
+                batch_tokens += item[1]
+
+            # 3.批次内相同的文本只计算一次，一次性计算整个批次的向量并分发给各个调用方
+            try:
+                texts = list(dict.fromkeys(text for text, _, _ in batch))
+                vectors = dict(zip(texts, self.embeddings.embed_documents(texts)))
+                for text, _, future in batch:
+                    future.set_result(vectors[text])
+            except Exception as e:
+                logging.exception(f"批量计算文本向量失败, 错误信息: {str(e)}")
+                for _, _, future in batch:
+                    future.set_exception(e)
 
 
 @inject
+@singleton
 @dataclass
 class EmbeddingsService:
-    """文本嵌入模型服务"""
+    """文本嵌入模型服务，嵌入模型体积较大，整个进程共享同一个实例"""
 
+    _redis: Redis
     _store: RedisStore
     _embeddings: Embeddings
     _cache_backed_embeddings: CacheBackedEmbeddings
+    _query_cache: LRUCache
+    _engine: BatchEmbeddingEngine
 
     def __init__(self, redis: Redis):
         """构造函数，初始化文本嵌入模型客户端、存储器、缓存客户端"""
+        self._redis = redis
         self._store = RedisStore(
             client=redis,
+            namespace=f"embeddings:{EMBEDDINGS_MODEL_NAME}",
         )
         self._embeddings = HuggingFaceEmbeddings(
-            model_name="Alibaba-NLP/gte-multilingual-base",
+            model_name=EMBEDDINGS_MODEL_NAME,
             cache_folder=os.path.join(os.getcwd(), "internal", "core", "embeddings"),
             model_kwargs={"trust_remote_code": True},
         )
@@ -34,17 +199,76 @@ class EmbeddingsService:
         #     openai_api_base=os.getenv("OPENAI_API_BASE"),
         #     openai_api_key=os.getenv("OPENAI_API_KEY"),
         # )
-        self._cache_backed_embeddings = CacheBackedEmbeddings.from_bytes_store(
+        self._query_cache = LRUCache(max_size=10000, ttl=3600)
+        # 文档向量使用片段内容的hash(即Segment.hash)作为键存储在Redis中，相同内容的片段只计算一次
+        # 查询向量存储在进程内的LRU缓存中，并设置过期时间
+        self._cache_backed_embeddings = CacheBackedEmbeddings(
             self._embeddings,
-            self._store,
-            namespace="embeddings",
+            self._create_embedding_store(
+                InstrumentedByteStore(self._store, redis, "document")
+            ),
+            query_embedding_store=self._create_embedding_store(
+                InstrumentedByteStore(
+                    LRUByteStore(self._query_cache),
+                    redis,
+                    "query",
+                )
+            ),
+        )
+        self._engine = BatchEmbeddingEngine(self._cache_backed_embeddings)
+
+    def init_app(self, app: Flask) -> None:
+        """根据应用配置设置查询向量缓存的容量与过期时间，以及批量嵌入引擎的批次大小与工作线程数"""
+        self._query_cache.max_size = app.config["EMBEDDING_QUERY_CACHE_SIZE"]
+        self._query_cache.ttl = app.config["EMBEDDING_QUERY_CACHE_TTL"]
+        self._engine.max_batch_size = app.config["EMBEDDING_MAX_BATCH_SIZE"]
+        self._engine.max_batch_tokens = app.config["EMBEDDING_MAX_BATCH_TOKENS"]
+        self._engine.max_workers = app.config["EMBEDDING_WORKERS"]
+
+    def embed_documents(
+        self, texts: list[str], token_counts: Optional[list[int]] = None
+    ) -> list[list[float]]:
+        """通过批量嵌入引擎计算文本列表的向量，并发调用的文本会被合并到同一个批次中计算"""
+        return self._engine.embed_documents(texts, token_counts)
+
+    def get_cache_stats(self) -> dict[str, dict]:
+        """获取文档向量缓存与查询向量缓存的命中次数、未命中次数以及命中率"""
+        stats = {
+            key.decode(): int(value)
+            for key, value in self._redis.hgetall(EMBEDDINGS_CACHE_STATS).items()
+        }
+        cache_stats = {}
+        for name in ["document", "query"]:
+            hits = stats.get(f"{name}_hits", 0)
+            misses = stats.get(f"{name}_misses", 0)
+            cache_stats[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses > 0 else 0,
+            }
+        return cache_stats
+
+    @classmethod
+    def _create_embedding_store(
+        cls, store: ByteStore
+    ) -> EncoderBackedStore[str, list[float]]:
+        """将字节存储包装成向量存储，键为文本内容的hash，值为JSON序列化后的向量"""
+        return EncoderBackedStore(
+            store,
+            generate_text_hash,
+            lambda vector: json.dumps(vector).encode(),
+            lambda value: json.loads(value.decode()),
         )
 
     @classmethod
     def calculate_token_count(cls, query: str) -> int:
         """计算传入文本的token数"""
-        encoding = tiktoken.encoding_for_model("gpt-3.5")
-        return len(encoding.encode(query))
+        return calculate_token_count(query)
+
+    @classmethod
+    def calculate_token_counts(cls, texts: list[str]) -> list[int]:
+        """批量计算文本列表的token数"""
+        return calculate_token_counts(texts)
 
     @property
     def store(self) -> RedisStore:
@@ -7,24 +7,38 @@ from flask import Flask, current_app
 from injector import inject
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
-
-from sqlalchemy import func
-from internal.model import Document, Segment, KeywordTable, DatasetQuery
+from queue import Queue
+from threading import Thread
+from typing import Any, Callable
+
+from sqlalchemy import func, update
+from internal.model import (
+    Document,
+    Segment,
+    SegmentKeyword,
+    KeywordStatistic,
+    DatasetStatistic,
+    DatasetQuery,
+)
 from .base_service import BaseService
 from pkg.sqlalchemy import SQLAlchemy
-from internal.entity.dataset_entity import DocumentStatus, SegmentStatus
+from internal.entity.dataset_entity import (
+    DocumentStatus,
+    SegmentStatus,
+    DocumentBatchStatus,
+)
 from internal.entity.cache_entity import (
     LOCK_DOCUMENT_UPDATE_ENABLED,
-    LOCK_KEYWORD_TABLE_UPDATE_KEYWORD_TABLE,
-    LOCK_EXPIRE_TIME,
+    DOCUMENT_BATCH_PROGRESS,
 )
 from langchain_core.documents import Document as LC_Document
 from internal.core.file_extractor import FileExtractor
 from .process_rule_service import ProcessRuleService
 from .embeddings_service import EmbeddingsService
-from internal.lib.helper import generate_text_hash
+from internal.lib.helper import generate_text_hash, create_token_length_function
 from .jieba_service import JiebaService
 from .keyword_table_service import KeywordTableService
+from .retrieval_cache_service import RetrievalCacheService
 from .vector_database_service import VectorDatabaseService
 from internal.exception import NotFoundException
 from redis import Redis
@@ -43,43 +57,141 @@ class IndexingService(BaseService):
     embeddings_service: EmbeddingsService
     jieba_service: JiebaService
     keyword_table_service: KeywordTableService
+    retrieval_cache_service: RetrievalCacheService
     vector_database_service: VectorDatabaseService
 
     def build_documents(self, document_ids: list[UUID]) -> None:
-        """根据传递的文档id列表构建知识库文档，涵盖了加载、分割、索引构建、数据存储等内容"""
+        """根据传递的文档id列表构建知识库文档，加载、分割、索引构建、数据存储以流水线的形式重叠执行"""
         # 根据文档id获取所有文档
         documents = (
-            self.db.session.query(Document).filter(Document.id.in_(document_ids)).all()
+            self.db.session.query(Document)
+            .with_entities(Document.id)
+            .filter(Document.id.in_(document_ids))
+            .all()
         )
 
-        # 执行循环遍历所有文档完成对每个文档的构建
-        for document in documents:
-            try:
-                # 更新当前状态为解析中，并记录开始处理的时间
-                self.update(
-                    document,
-                    status=DocumentStatus.PARSING,
-                    processing_started_at=datetime.now(),
-                )
+        # 构建流水线，每个阶段拥有独立的工作线程数，前一阶段的输出作为后一阶段的输入
+        pipeline_config = current_app.config["INDEXING_PIPELINE"]
+        self._run_pipeline(
+            current_app._get_current_object(),
+            [id for id, in documents],
+            [
+                (self._parsing_stage, pipeline_config["parsing_workers"]),
+                (self._splitting, pipeline_config["splitting_workers"]),
+                (self._indexing_stage, pipeline_config["indexing_workers"]),
+                (self._completed, pipeline_config["completed_workers"]),
+            ],
+            pipeline_config["queue_size"],
+        )
 
-                # 执行文档加载步骤，并更新文档的状态和时间
-                lc_documents = self._parsing(document)
-                # 执行文档分割步骤，并更新文档的状态和时间，涵盖了片段的信息
-                lc_segments = self._splitting(document, lc_documents)
+    def _run_pipeline(
+        self,
+        flask_app: Flask,
+        document_ids: list[UUID],
+        stages: list[tuple[Callable[[Document, Any], Any], int]],
+        queue_size: int,
+    ) -> None:
+        """执行文档构建流水线，阶段之间使用有界队列传递(文档id, 阶段输出)，任意阶段失败的文档不再进入后续阶段"""
+        queues = [Queue(maxsize=queue_size) for _ in stages]
+
+        def worker(stage_index: int) -> None:
+            """阶段工作线程，每个文档在独立的应用上下文中执行，保证数据库会话互不干扰"""
+            stage, _ = stages[stage_index]
+            input_queue = queues[stage_index]
+            output_queue = (
+                queues[stage_index + 1] if stage_index + 1 < len(queues) else None
+            )
 
-                # 执行文档索引步骤，涵盖关键词提取、向量，并跟新数据状态
-                self._indexing(document, lc_segments)
-                # 执行文档存储步骤，涵盖文档状态更新，以及向量数据库的存储
-                self._completed(document, lc_segments)
+            while True:
+                item = input_queue.get()
+                if item is None:
+                    return
 
-            except Exception as e:
-                logging.exception(f"构建文档失败, 错误信息: {str(e)}")
-                self.update(
-                    document,
-                    status=DocumentStatus.ERROR,
-                    error=str(e),
-                    stopped_at=datetime.now(),
-                )
+                document_id, data = item
+                try:
+                    with flask_app.app_context():
+                        data = stage(self.get(Document, document_id), data)
+                except Exception as e:
+                    logging.exception(f"构建文档失败, 错误信息: {str(e)}")
+                    self._mark_document_error(flask_app, document_id, e)
+                    continue
+
+                if output_queue is not None:
+                    output_queue.put((document_id, data))
+
+        # 1.启动所有阶段的工作线程
+        stage_threads = [
+            [
+                Thread(target=worker, args=(index,), daemon=True)
+                for _ in range(max(workers, 1))
+            ]
+            for index, (_, workers) in enumerate(stages)
+        ]
+        for threads in stage_threads:
+            for thread in threads:
+                thread.start()
+
+        # 2.将文档依次送入第一个阶段，队列已满时阻塞等待，避免占用过多内存
+        for document_id in document_ids:
+            queues[0].put((document_id, None))
+
+        # 3.按照阶段顺序发送结束信号，等待上一阶段全部结束后再结束下一阶段
+        for queue, threads in zip(queues, stage_threads):
+            for _ in threads:
+                queue.put(None)
+            for thread in threads:
+                thread.join()
+
+    def _mark_document_error(
+        self, flask_app: Flask, document_id: UUID, error: Exception
+    ) -> None:
+        """将构建失败的文档状态更新为错误"""
+        try:
+            with flask_app.app_context():
+                document = self.get(Document, document_id)
+                if document is not None:
+                    self.update(
+                        document,
+                        status=DocumentStatus.ERROR,
+                        error=str(error),
+                        stopped_at=datetime.now(),
+                    )
+        except Exception as e:
+            logging.exception(
+                f"更新文档错误状态失败, 文档ID: {document_id}, 错误信息: {str(e)}"
+            )
+
+    def _parsing_stage(self, document: Document, _: Any) -> list[LC_Document]:
+        """流水线的加载阶段，更新当前状态为解析中并记录开始处理的时间后执行文档加载"""
+        self.update(
+            document,
+            status=DocumentStatus.PARSING,
+            processing_started_at=datetime.now(),
+        )
+        return self._parsing(document)
+
+    def _indexing_stage(
+        self, document: Document, lc_segments: list[LC_Document]
+    ) -> list[LC_Document]:
+        """流水线的索引阶段，执行关键词提取与词表构建，并将片段列表传递给存储阶段"""
+        self._indexing(document, lc_segments)
+        return lc_segments
+
+    def update_batch_progress(self, batch: str, count: int) -> None:
+        """累加处理批次中已处理(完成或失败)的文档数"""
+        self.redis_client.hincrby(
+            DOCUMENT_BATCH_PROGRESS.format(batch=batch), "processed_count", count
+        )
+
+    def complete_batch(self, batch: str) -> None:
+        """将处理批次标记为已完成并记录完成时间"""
+        self.redis_client.hset(
+            DOCUMENT_BATCH_PROGRESS.format(batch=batch),
+            mapping={
+                "status": DocumentBatchStatus.COMPLETED.value,
+                "completed_at": int(datetime.now().timestamp()),
+            },
+        )
 
     def update_document_enabled(self, document_id: UUID) -> None:
         """根据传递的文档id更新文档的启用状态, 同时修改weaviate向量数据库中的记录"""
@@ -155,8 +267,9 @@ class IndexingService(BaseService):
                 disable_at=None if origin_enable else datetime.now(),
             )
         finally:
-            #  删除缓存
+            #  删除缓存并更新知识库内容版本号
             self.redis_client.delete(cache_key)
+            self.retrieval_cache_service.bump_dataset_version(document.dataset_id)
 
     def delete_document(self, dataset_id: UUID, document_id: UUID) -> None:
         """根据传递的知识库ID和文档ID删除文档"""
@@ -185,6 +298,7 @@ class IndexingService(BaseService):
         self.keyword_table_service.delete_keyword_table_from_ids(
             dataset_id=dataset_id, segment_ids=segment_ids
         )
+        self.retrieval_cache_service.bump_dataset_version(dataset_id)
 
     def delete_dataset(self, dataset_id: UUID) -> None:
         """根据传递的知识库ID执行相应删除操作"""
@@ -200,9 +314,15 @@ class IndexingService(BaseService):
                     Segment.dataset_id == dataset_id
                 ).delete()
 
-                # 删除关联的关键词表记录
-                self.db.session.query(KeywordTable).filter(
-                    KeywordTable.dataset_id == dataset_id
+                # 删除关联的关键词倒排记录以及全文检索统计信息
+                self.db.session.query(SegmentKeyword).filter(
+                    SegmentKeyword.dataset_id == dataset_id
+                ).delete()
+                self.db.session.query(KeywordStatistic).filter(
+                    KeywordStatistic.dataset_id == dataset_id
+                ).delete()
+                self.db.session.query(DatasetStatistic).filter(
+                    DatasetStatistic.dataset_id == dataset_id
                 ).delete()
 
                 # 删除知识库查询记录
@@ -215,6 +335,10 @@ class IndexingService(BaseService):
                     where=Filter.by_property("dataset_id").equal(str(dataset_id))
                 )
 
+            # 更新关键词表以及知识库内容版本号，使所有进程的相关缓存失效
+            self.keyword_table_service.bump_version(dataset_id)
+            self.retrieval_cache_service.bump_dataset_version(dataset_id)
+
         except Exception as e:
             logging.error(
                 f"异步删除知识库失败, dataset_id: {dataset_id}, error: {str(e)}"
@@ -250,7 +374,7 @@ class IndexingService(BaseService):
         process_rule = document.process_rule
         text_splitter = self.process_rule_service.get_text_splitter_by_process_rule(
             process_rule,
-            self.embeddings_service.calculate_token_count,
+            create_token_length_function(),
         )
 
         # 按照process_rule的规则清除多余字符串
@@ -271,39 +395,47 @@ class IndexingService(BaseService):
             .scalar()
         )
 
-        # 循环处理片段数据并添加元数据，同时存储到pgsql数据库
-        segments = []
-        for lc_segment in lc_segments:
+        # 一次性批量计算所有片段的token数
+        token_counts = self.embeddings_service.calculate_token_counts(
+            [lc_segment.page_content for lc_segment in lc_segments]
+        )
+
+        # 循环处理片段数据并添加元数据，片段id在客户端生成，便于在写入前构建元数据
+        rows = []
+        for lc_segment, token_count in zip(lc_segments, token_counts):
             position += 1
             content = lc_segment.page_content
-            segment = self.create(
-                Segment,
-                account_id=document.account_id,
-                dataset_id=document.dataset_id,
-                document_id=document.id,
-                node_id=uuid.uuid4(),
-                position=position,
-                content=content,
-                character_count=len(content),
-                token_count=self.embeddings_service.calculate_token_count(content),
-                hash=generate_text_hash(content),
-                status=SegmentStatus.WAITING,
-            )
+            row = {
+                "id": uuid.uuid4(),
+                "account_id": document.account_id,
+                "dataset_id": document.dataset_id,
+                "document_id": document.id,
+                "node_id": uuid.uuid4(),
+                "position": position,
+                "content": content,
+                "character_count": len(content),
+                "token_count": token_count,
+                "hash": generate_text_hash(content),
+                "status": SegmentStatus.WAITING,
+            }
             lc_segment.metadata = {
                 "account_id": str(document.account_id),
                 "dataset_id": str(document.dataset_id),
                 "document_id": str(document.id),
-                "segment_id": str(segment.id),
-                "node_id": str(segment.node_id),
+                "segment_id": str(row["id"]),
+                "node_id": str(row["node_id"]),
                 "document_enabled": False,
                 "segment_enabled": False,
             }
-            segments.append(segment)
+            rows.append(row)
+
+        # 在同一个事务中批量写入所有片段
+        self.create_many(Segment, rows)
 
         # 更新文档的数据，涵盖状态、token数等内容
         self.update(
             document,
-            token_count=sum([segment.token_count for segment in segments]),
+            token_count=sum(token_counts),
             status=DocumentStatus.INDEXING,
             splitting_completed_at=datetime.now(),
         )
@@ -311,51 +443,39 @@ class IndexingService(BaseService):
         return lc_segments
 
     def _indexing(self, document: Document, lc_segments: list[LC_Document]) -> None:
-        """根据传递的信息构建索引，涵盖关键词提取、词表构建"""
-        for lc_segment in lc_segments:
-            # 提取每一个片段对应的关键词，关键词的数量最多不超过10个
-            keywords = self.jieba_service.extract_keywords(lc_segment.page_content, 10)
-
-            # 逐条更新文档片段的关键词
-            self.db.session.query(Segment).filter(
-                Segment.id == lc_segment.metadata["segment_id"]
-            ).update(
-                {
-                    "keywords": keywords,
-                    "status": SegmentStatus.INDEXING,
-                    "indexing_completed_at": datetime.now(),
-                }
+        """根据传递的信息构建索引，涵盖关键词提取、词表构建，所有片段的关键词会在同一个事务中批量写入"""
+        # 1.提取每一个片段对应的关键词，关键词的数量最多不超过10个
+        segment_keywords = {
+            lc_segment.metadata["segment_id"]: self.jieba_service.extract_keywords(
+                lc_segment.page_content, 10
             )
+            for lc_segment in lc_segments
+        }
 
-            # 获取当前知识库的关键词表
-            keyword_table_record = (
-                self.keyword_table_service.get_keyword_table_from_dataset_id(
-                    document.dataset_id
+        # 2.在同一个事务中批量更新片段关键词、关键词倒排表以及文档状态
+        indexing_completed_at = datetime.now()
+        with self.db.auto_commit():
+            if segment_keywords:
+                self.db.session.execute(
+                    update(Segment),
+                    [
+                        {
+                            "id": segment_id,
+                            "keywords": keywords,
+                            "status": SegmentStatus.INDEXING,
+                            "indexing_completed_at": indexing_completed_at,
+                        }
+                        for segment_id, keywords in segment_keywords.items()
+                    ],
                 )
+            self.keyword_table_service.add_segment_keywords(
+                document.dataset_id, list(segment_keywords.keys())
             )
-            keyword_table = {
-                field: set(value)
-                for field, value in keyword_table_record.keyword_table.items()
-            }
+            document.indexing_completed_at = indexing_completed_at
 
-            # 循环处理关键词并更新关键词表
-            for keyword in keywords:
-                if keyword not in keyword_table:
-                    keyword_table[keyword] = set()
-                keyword_table[keyword].add(lc_segment.metadata["segment_id"])
-
-            # 更新关键词表
-            self.update(
-                keyword_table_record,
-                keyword_table={
-                    field: list(value) for field, value in keyword_table.items()
-                },
-            )
-        # 更新文档状态
-        self.update(
-            document,
-            indexing_completed_at=datetime.now(),
-        )
+        # 3.事务提交后更新关键词表以及知识库内容版本号，使所有进程的相关缓存失效
+        self.keyword_table_service.bump_version(document.dataset_id)
+        self.retrieval_cache_service.bump_dataset_version(document.dataset_id)
 
     def _completed(self, document: Document, lc_segments: list[LC_Document]) -> None:
         """根据传递的信息完成文档的构建，涵盖文档状态更新、向量数据库存储"""
@@ -364,16 +484,34 @@ class IndexingService(BaseService):
             lc_segment.metadata["document_enabled"] = True
             lc_segment.metadata["segment_enabled"] = True
 
+        # 通过批量嵌入引擎计算所有片段的向量，并发构建的多个文档的片段会被合并为大批次计算
+        token_counts = {
+            str(node_id): token_count
+            for node_id, token_count in self.db.session.query(Segment)
+            .with_entities(Segment.node_id, Segment.token_count)
+            .filter(Segment.document_id == document.id)
+            .all()
+        }
+        vectors = self.embeddings_service.embed_documents(
+            [lc_segment.page_content for lc_segment in lc_segments],
+            [
+                token_counts.get(lc_segment.metadata["node_id"], 0)
+                for lc_segment in lc_segments
+            ],
+        )
+
         def thread_func(
-            flask_app: Flask, chunks: list[LC_Document], ids: list[UUID]
+            flask_app: Flask,
+            chunks: list[LC_Document],
+            chunk_vectors: list[list[float]],
+            ids: list[UUID],
         ) -> None:
             """线程函数，执行向量数据库与pgsql数据的存储"""
             try:
                 with flask_app.app_context():
-                    # 调用向量数据库存储对应数据
-                    self.vector_database_service.vector_store.add_documents(
-                        chunks,
-                        ids=ids,
+                    # 将预先计算好的向量批量写入向量数据库
+                    self.vector_database_service.add_documents_with_vectors(
+                        chunks, chunk_vectors, ids
                     )
 
                     with self.db.auto_commit():
@@ -405,17 +543,18 @@ class IndexingService(BaseService):
 
         with ThreadPoolExecutor(max_workers=5) as executor:
             futures = []
-            # 调用向量数据库，每次存储10条数据，避免一次传递过多数据
-            for i in range(0, len(lc_segments), 10):
-                # 提取需要存储的数据和ids
-                chunks = lc_segments[i : i + 10]
-                # for chunk in chunks:
-                #     print(chunk)
-                #     print(f"Chunk metadata: {chunk.metadata}")
+            # 调用向量数据库，每次批量写入100条已计算好向量的数据
+            for i in range(0, len(lc_segments), 100):
+                # 提取需要存储的数据、向量和ids
+                chunks = lc_segments[i : i + 100]
                 ids = [chunk.metadata["node_id"] for chunk in chunks]
                 futures.append(
                     executor.submit(
-                        thread_func, current_app._get_current_object(), chunks, ids
+                        thread_func,
+                        current_app._get_current_object(),
+                        chunks,
+                        vectors[i : i + 100],
+                        ids,
                     )
                 )
 
@@ -430,6 +569,9 @@ class IndexingService(BaseService):
             enabled=True,
         )
 
+        # 片段已经写入向量数据库，更新知识库内容版本号
+        self.retrieval_cache_service.bump_dataset_version(document.dataset_id)
+
     @classmethod
     def _clean_extra_text(cls, text: str) -> str:
         """清除过滤传递的多余空白字符串"""
@@ -1,112 +1,319 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from uuid import UUID
 from injector import inject
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from flask import Flask, current_app
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
 
-from internal.entity.cache_entity import (
-    LOCK_EXPIRE_TIME,
-    LOCK_KEYWORD_TABLE_UPDATE_KEYWORD_TABLE,
-)
 from .base_service import BaseService
+from pkg.cache import LRUCache
 from pkg.sqlalchemy import SQLAlchemy
-from internal.model import KeywordTable, Segment
+from internal.entity.cache_entity import (
+    KEYWORD_TABLE_VERSION,
+    KEYWORD_TABLE_CACHE_MAX_BYTES,
+    KEYWORD_TABLE_CACHE_ENTRY_MAX_BYTES,
+    KEYWORD_TABLE_CACHE_POSTING_BYTES,
+    KEYWORD_TABLE_REFRESH_INTERVAL,
+)
+from internal.model import SegmentKeyword, KeywordStatistic, DatasetStatistic, Segment
 from redis import Redis
 
 
+@dataclass
+class KeywordTable:
+    """解析后的知识库关键词表，用于在进程内缓存中直接完成关键词检索"""
+
+    version: int = 0  # 关键词表版本号
+    postings: dict[str, dict[str, int]] = field(
+        default_factory=dict
+    )  # 倒排表，格式为{keyword: {segment_id: frequency}}
+    segment_lengths: dict[str, int] = field(
+        default_factory=dict
+    )  # 片段长度，格式为{segment_id: segment_length}
+
+
+# 进程内关键词表缓存，按照知识库id存储，同一进程内的所有服务实例共享
+keyword_table_cache = LRUCache(max_size=1024, max_bytes=KEYWORD_TABLE_CACHE_MAX_BYTES)
+
+# 超出单个知识库内存上限的关键词表版本，格式为{dataset_id: version}，同一版本不再重复加载
+oversized_keyword_tables = LRUCache(max_size=1024)
+
+# 关键词表后台加载状态，涵盖加载线程池、正在加载的知识库以及上次加载完成的时间，fork出的子进程需要重新创建
+_loader: Optional[ThreadPoolExecutor] = None
+_loader_pid: Optional[int] = None
+_loading_datasets: set[str] = set()
+_loaded_at: dict[str, float] = {}
+_loader_lock = threading.Lock()
+
+
 @inject
 @dataclass
 class KeywordTableService(BaseService):
-    """知识库关键词表服务"""
+    """知识库关键词表服务，关键词表以(知识库, 关键词, 片段)倒排记录的形式存储，并同步维护BM25所需的统计信息"""
 
     db: SQLAlchemy
     redis_client: Redis
 
-    def get_keyword_table_from_dataset_id(self, dataset_id: UUID) -> KeywordTable:
-        """根据传递的知识库id获取关键词表"""
-        keyword_table = (
-            self.db.session.query(KeywordTable)
+    def add_segment_keywords(self, dataset_id: UUID, segment_ids: list[UUID]) -> None:
+        """根据片段id列表将片段的关键词写入倒排表并更新统计信息，该方法不提交事务，由调用方控制提交"""
+        if not segment_ids:
+            return
+
+        # 1.先移除这些片段已有的倒排记录，保证重复添加时统计信息依旧准确
+        self._delete_segment_keywords(dataset_id, segment_ids)
+
+        # 2.根据segment_ids查找片段的关键词、内容以及长度信息
+        segments = (
+            self.db.session.query(Segment)
+            .with_entities(
+                Segment.id, Segment.keywords, Segment.content, Segment.token_count
+            )
             .filter(
-                KeywordTable.dataset_id == dataset_id,
+                Segment.id.in_(segment_ids),
             )
-            .one_or_none()
+            .all()
         )
-        if keyword_table is None:
-            keyword_table = self.create(
-                KeywordTable, dataset_id=dataset_id, keyword_table={}
-            )
 
-        return keyword_table
+        # 3.将片段展开为倒排记录，同时记录关键词在片段中出现的次数(词频)
+        rows = [
+            {
+                "dataset_id": dataset_id,
+                "keyword": keyword,
+                "segment_id": id,
+                "frequency": max(content.count(keyword), 1),
+                "segment_length": token_count,
+            }
+            for id, keywords, content, token_count in segments
+            for keyword in set(keywords)
+        ]
+        if not rows:
+            return
+
+        # 4.批量插入倒排记录并累加统计信息
+        self.db.session.execute(
+            insert(SegmentKeyword).on_conflict_do_nothing(
+                constraint="uq_segment_keyword_dataset_id_keyword_segment_id"
+            ),
+            rows,
+        )
+        self._update_statistics(dataset_id, rows, 1)
 
     def delete_keyword_table_from_ids(
         self, dataset_id: UUID, segment_ids: list[UUID]
     ) -> None:
         """根据传递的知识库id+片段id列表删除对应关键词表中多余的数据"""
-        # 1.删除知识库关键词表里多余的数据，该操作需要上锁，避免在并发的情况下拿到错误的数据
-        cache_key = LOCK_KEYWORD_TABLE_UPDATE_KEYWORD_TABLE.format(
-            dataset_id=dataset_id
-        )
-        with self.redis_client.lock(cache_key, timeout=LOCK_EXPIRE_TIME):
-            # 2.获取当前知识库的关键词表
-            keyword_table_record = self.get_keyword_table_from_dataset_id(dataset_id)
-            keyword_table = keyword_table_record.keyword_table.copy()
-
-            # 3.将片段id列表转换成集合，并创建关键词集合用于清除空关键词
-            segment_ids_to_delete = set([str(segment_id) for segment_id in segment_ids])
-            keywords_to_delete = set()
-
-            # 4.循环遍历所有关键词执行判断与更新
-            for keyword, ids in keyword_table.items():
-                ids_set = set(ids)
-                if segment_ids_to_delete.intersection(ids_set):
-                    keyword_table[keyword] = list(
-                        ids_set.difference(segment_ids_to_delete)
-                    )
-                    if not keyword_table[keyword]:
-                        keywords_to_delete.add(keyword)
-
-            # 5.检测空关键词数据并删除（关键词并没有映射任何字段id的数据）
-            for keyword in keywords_to_delete:
-                del keyword_table[keyword]
-
-            # 6.将数据更新到关键词表中
-            self.update(keyword_table_record, keyword_table=keyword_table)
+        if not segment_ids:
+            return
+
+        with self.db.auto_commit():
+            self._delete_segment_keywords(dataset_id, segment_ids)
+        self.bump_version(dataset_id)
 
     def add_keyword_table_from_ids(
         self, dataset_id: UUID, segment_ids: list[UUID]
     ) -> None:
         """根据传递的知识库id+片段id列表，在关键词表中添加关键词"""
-        # 1.新增知识库关键词表里多余的数据，该操作需要上锁，避免在并发的情况下拿到错误的数据
-        cache_key = LOCK_KEYWORD_TABLE_UPDATE_KEYWORD_TABLE.format(
-            dataset_id=dataset_id
+        with self.db.auto_commit():
+            self.add_segment_keywords(dataset_id, segment_ids)
+        self.bump_version(dataset_id)
+
+    def bump_version(self, dataset_id: UUID) -> None:
+        """关键词表变更并提交后调用，自增版本号，各进程在下一次检索时发现版本变化，改由数据库计算并在后台重新加载"""
+        self.redis_client.incr(KEYWORD_TABLE_VERSION.format(dataset_id=dataset_id))
+
+    def get_keyword_tables(
+        self, dataset_ids: list[UUID]
+    ) -> Optional[list[KeywordTable]]:
+        """获取多个知识库解析后的关键词表，返回None时由调用方交由数据库计算
+
+        关键词表只在后台线程中加载，任意知识库尚未加载、版本过期或者超出单个知识库的内存上限时返回None，
+        过期的关键词表不会被使用，避免已禁用或已删除的片段继续被检索到，后台加载只用于预热缓存
+        """
+        # 1.一次性获取所有知识库关键词表的最新版本号
+        versions = self.redis_client.mget(
+            [KEYWORD_TABLE_VERSION.format(dataset_id=id) for id in dataset_ids]
         )
-        with self.redis_client.lock(cache_key, timeout=LOCK_EXPIRE_TIME):
-            # 2.获取指定知识库的关键词比哦啊
-            keyword_table_record = self.get_keyword_table_from_dataset_id(dataset_id)
-            keyword_table = {
-                field: set(value)
-                for field, value in keyword_table_record.keyword_table.items()
-            }
 
-            # 3.根据segment_ids查找片段的关键词信息
-            segments = (
-                self.db.session.query(Segment)
-                .with_entities(Segment.id, Segment.keywords)
-                .filter(
-                    Segment.id.in_(segment_ids),
+        # 2.版本号一致时直接使用缓存，未加载或过期时在后台重新加载，本次检索交由数据库计算
+        keyword_tables = []
+        for dataset_id, version in zip(dataset_ids, versions):
+            version = int(version) if version else 0
+            keyword_table = keyword_table_cache.get(str(dataset_id))
+            if keyword_table is None or keyword_table.version != version:
+                if oversized_keyword_tables.get(str(dataset_id)) != version:
+                    self._schedule_refresh(dataset_id)
+                return None
+            keyword_tables.append(keyword_table)
+
+        return keyword_tables
+
+    def _schedule_refresh(self, dataset_id: UUID) -> None:
+        """提交知识库关键词表的后台加载任务，同一进程内同一知识库同时只有一个加载任务"""
+        global _loader, _loader_pid
+
+        flask_app = current_app._get_current_object()
+        with _loader_lock:
+            # 1.fork出的子进程没有父进程的加载线程，需要重新创建线程池并重置加载状态
+            if _loader_pid != os.getpid():
+                _loader = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="keyword_table"
+                )
+                _loader_pid = os.getpid()
+                _loading_datasets.clear()
+
+            # 2.知识库正在加载时不重复提交
+            if str(dataset_id) in _loading_datasets:
+                return
+            _loading_datasets.add(str(dataset_id))
+
+        _loader.submit(self._refresh_keyword_table, flask_app, dataset_id)
+
+    def _refresh_keyword_table(self, flask_app: Flask, dataset_id: UUID) -> None:
+        """后台加载知识库关键词表，距离上次加载不足最小间隔时先等待，期间的多次变更合并为一次加载"""
+        try:
+            wait_time = (
+                _loaded_at.get(str(dataset_id), 0)
+                + KEYWORD_TABLE_REFRESH_INTERVAL
+                - time.monotonic()
+            )
+            if wait_time > 0:
+                time.sleep(wait_time)
+
+            with flask_app.app_context():
+                # 先读取版本号再加载，加载期间发生的变更会在下一次检索时再次触发加载
+                version = self.redis_client.get(
+                    KEYWORD_TABLE_VERSION.format(dataset_id=dataset_id)
                 )
-                .all()
+                self._load_keyword_table(dataset_id, int(version) if version else 0)
+        except Exception as e:
+            logging.exception(
+                f"加载关键词表失败, dataset_id: {dataset_id}, 错误信息: {str(e)}"
             )
+        finally:
+            _loaded_at[str(dataset_id)] = time.monotonic()
+            with _loader_lock:
+                _loading_datasets.discard(str(dataset_id))
 
-            # 4.循环将新关键词添加到关键词表中
-            for id, keywords in segments:
-                for keyword in keywords:
-                    if keyword not in keyword_table:
-                        keyword_table[keyword] = set()
-                    keyword_table[keyword].add(str(id))
-
-            # 5.更新关键词表
-            self.update(
-                keyword_table_record,
-                keyword_table={
-                    field: list(value) for field, value in keyword_table.items()
+    def _load_keyword_table(
+        self, dataset_id: UUID, version: int
+    ) -> Optional[KeywordTable]:
+        """从数据库加载知识库的倒排记录并写入进程内缓存，超出单个知识库的内存上限时停止加载并返回None"""
+        # 1.流式加载倒排记录并组装关键词表，相同片段id共用同一个字符串
+        keyword_table = KeywordTable(version=version)
+        max_postings = (
+            KEYWORD_TABLE_CACHE_ENTRY_MAX_BYTES // KEYWORD_TABLE_CACHE_POSTING_BYTES
+        )
+        posting_count = 0
+        for keyword, segment_id, frequency, segment_length in (
+            self.db.session.query(SegmentKeyword)
+            .with_entities(
+                SegmentKeyword.keyword,
+                SegmentKeyword.segment_id,
+                SegmentKeyword.frequency,
+                SegmentKeyword.segment_length,
+            )
+            .filter(SegmentKeyword.dataset_id == dataset_id)
+            .yield_per(10000)
+        ):
+            # 2.倒排记录数超出上限时记录该版本超限，并移除旧版本的缓存
+            posting_count += 1
+            if posting_count > max_postings:
+                oversized_keyword_tables.set(str(dataset_id), version)
+                keyword_table_cache.delete(str(dataset_id))
+                return None
+
+            segment_id = sys.intern(str(segment_id))
+            keyword_table.segment_lengths[segment_id] = segment_length
+            keyword_table.postings.setdefault(keyword, {})[segment_id] = frequency
+
+        keyword_table_cache.set(
+            str(dataset_id),
+            keyword_table,
+            posting_count * KEYWORD_TABLE_CACHE_POSTING_BYTES,
+        )
+        return keyword_table
+
+    def _delete_segment_keywords(
+        self, dataset_id: UUID, segment_ids: list[UUID]
+    ) -> None:
+        """删除片段对应的倒排记录，并根据实际删除的记录扣减统计信息"""
+        deleted_rows = self.db.session.execute(
+            delete(SegmentKeyword)
+            .where(
+                SegmentKeyword.dataset_id == dataset_id,
+                SegmentKeyword.segment_id.in_(segment_ids),
+            )
+            .returning(
+                SegmentKeyword.keyword,
+                SegmentKeyword.segment_id,
+                SegmentKeyword.segment_length,
+            )
+        ).all()
+
+        self._update_statistics(dataset_id, [row._asdict() for row in deleted_rows], -1)
+
+    def _update_statistics(self, dataset_id: UUID, rows: list[dict], sign: int) -> None:
+        """根据新增(sign=1)或删除(sign=-1)的倒排记录增量更新关键词文档频率以及知识库片段统计"""
+        if not rows:
+            return
+
+        # 1.计算每个关键词的文档频率变化量，并累加关键词统计
+        keyword_counter = Counter(row["keyword"] for row in rows)
+        stmt = insert(KeywordStatistic)
+        self.db.session.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_keyword_statistic_dataset_id_keyword",
+                set_={
+                    "document_frequency": KeywordStatistic.document_frequency
+                    + stmt.excluded.document_frequency
+                },
+            ),
+            [
+                {
+                    "dataset_id": dataset_id,
+                    "keyword": keyword,
+                    "document_frequency": sign * count,
+                }
+                for keyword, count in keyword_counter.items()
+            ],
+        )
+
+        # 2.删除文档频率已经归零的关键词统计
+        if sign < 0:
+            self.db.session.execute(
+                delete(KeywordStatistic).where(
+                    KeywordStatistic.dataset_id == dataset_id,
+                    KeywordStatistic.keyword.in_(list(keyword_counter.keys())),
+                    KeywordStatistic.document_frequency <= 0,
+                )
+            )
+
+        # 3.计算片段数与片段总长度的变化量，并累加知识库统计
+        segment_lengths = {
+            str(row["segment_id"]): row["segment_length"] for row in rows
+        }
+        stmt = insert(DatasetStatistic).values(
+            dataset_id=dataset_id,
+            segment_count=sign * len(segment_lengths),
+            segment_length_total=sign * sum(segment_lengths.values()),
+        )
+        self.db.session.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_dataset_statistic_dataset_id",
+                set_={
+                    "segment_count": DatasetStatistic.segment_count
+                    + stmt.excluded.segment_count,
+                    "segment_length_total": DatasetStatistic.segment_length_total
+                    + stmt.excluded.segment_length_total,
                 },
             )
+        )
@@ -0,0 +1,109 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
+from typing import Optional
+
+from injector import inject, singleton
+from langchain_core.documents import Document as LCDocument
+
+# 重排序模型名字，使用体积较小、支持中英文的交叉编码器在CPU上执行
+RERANK_MODEL_NAME = "BAAI/bge-reranker-base"
+
+
+@inject
+@singleton
+@dataclass
+class RerankService:
+    """重排序服务，使用本地交叉编码器对召回的候选文档打分并保留得分最高的前k条，模型在应用创建时于后台线程中预热加载"""
+
+    _model: Optional[object]
+    _loading_pid: Optional[int]
+    _lock: threading.Lock
+    _executor: ThreadPoolExecutor
+
+    def __init__(self):
+        """构造函数，交叉编码器在CPU上串行执行，排队等待的时间同样计入延迟预算"""
+        self._model = None
+        self._loading_pid = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+    def warm_up(self) -> None:
+        """在后台线程中加载交叉编码器，每个进程只加载一次，加载失败时记录日志并不再重试"""
+        with self._lock:
+            if self._model is not None or self._loading_pid == os.getpid():
+                return
+            self._loading_pid = os.getpid()
+
+        threading.Thread(
+            target=self._load_model, name="rerank_warm_up", daemon=True
+        ).start()
+
+    def rerank(
+        self,
+        query: str,
+        lc_documents: list[LCDocument],
+        k: int,
+        timeout: Optional[float] = None,
+        batch_size: int = 16,
+    ) -> Optional[list[LCDocument]]:
+        """在延迟预算内对候选文档重排序并返回前k条，超时或出错时返回None，由调用方使用原始排序"""
+        if len(lc_documents) <= 1:
+            return lc_documents[:k]
+
+        # 模型尚未加载完成时直接使用原始排序，不在请求的延迟预算内加载模型
+        if self._model is None:
+            self.warm_up()
+            return None
+
+        future = self._executor.submit(self._predict, query, lc_documents, batch_size)
+        try:
+            scores = future.result(timeout=timeout)
+        except TimeoutError:
+            # 尚未开始执行的任务直接取消，避免超时请求继续占用CPU
+            future.cancel()
+            logging.warning(
+                f"重排序超时, 候选文档数: {len(lc_documents)}, 超时时间: {timeout}s"
+            )
+            return None
+        except Exception as e:
+            logging.exception(f"重排序执行出错, 错误信息: {str(e)}")
+            return None
+
+        # 按照重排序得分从高到低排序，并将得分添加到文档元数据中
+        ranked = sorted(
+            zip(lc_documents, scores), key=lambda item: item[1], reverse=True
+        )[:k]
+        for lc_document, score in ranked:
+            lc_document.metadata["rerank_score"] = float(score)
+
+        return [lc_document for lc_document, _ in ranked]
+
+    def _predict(
+        self, query: str, lc_documents: list[LCDocument], batch_size: int
+    ) -> list[float]:
+        """按照batch_size分批计算query与每个候选文档的相关性得分"""
+        return self._model.predict(
+            [(query, lc_document.page_content) for lc_document in lc_documents],
+            batch_size=batch_size,
+            show_progress_bar=False,
+        )
+
+    def _load_model(self) -> None:
+        """加载交叉编码器，模型体积较大，在后台线程中执行"""
+        try:
+            from sentence_transformers import CrossEncoder
+
+            cache_dir = os.path.join(os.getcwd(), "internal", "core", "embeddings")
+            self._model = CrossEncoder(
+                RERANK_MODEL_NAME,
+                max_length=512,
+                device="cpu",
+                tokenizer_args={"cache_dir": cache_dir},
+                automodel_args={"cache_dir": cache_dir},
+            )
+            logging.info(f"重排序模型加载完成: {RERANK_MODEL_NAME}")
+        except Exception as e:
+            logging.exception(f"重排序模型加载失败, 错误信息: {str(e)}")
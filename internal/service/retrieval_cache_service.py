@@ -0,0 +1,83 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+
+from injector import inject
+from langchain_core.documents import Document as LCDocument
+from redis import Redis
+
+from internal.entity.cache_entity import (
+    DATASET_CONTENT_VERSION,
+    KEYWORD_TABLE_VERSION,
+)
+from pkg.cache import LRUCache
+
+# 进程内检索结果缓存，缓存键中包含知识库的内容版本号与关键词表版本号，任意一个变更后旧的缓存不会再被命中并最终被淘汰
+retrieval_result_cache = LRUCache(max_size=2048, ttl=600)
+
+
+@inject
+@dataclass
+class RetrievalCacheService:
+    """检索结果缓存服务，维护知识库的内容版本号，并按照(知识库及其版本、检索参数、标准化query)缓存检索结果"""
+
+    redis_client: Redis
+
+    def bump_dataset_version(self, dataset_id: UUID) -> None:
+        """知识库内容(片段、关键词、向量、启用状态)变更后调用，自增知识库的内容版本号使缓存失效"""
+        self.redis_client.incr(DATASET_CONTENT_VERSION.format(dataset_id=dataset_id))
+
+    def get(self, dataset_ids: list[UUID], query: str, **kwargs) -> tuple[
+        str,
+        Optional[list[LCDocument]],
+    ]:
+        """根据知识库列表、query以及检索参数查询缓存，返回缓存键以及缓存的文档列表(未命中时为None)"""
+        cache_key = self._build_cache_key(dataset_ids, query, **kwargs)
+        lc_documents = retrieval_result_cache.get(cache_key)
+        if lc_documents is None:
+            return cache_key, None
+
+        return cache_key, [
+            lc_document.model_copy(deep=True) for lc_document in lc_documents
+        ]
+
+    def set(self, cache_key: str, lc_documents: list[LCDocument]) -> None:
+        """根据缓存键缓存检索得到的文档列表"""
+        retrieval_result_cache.set(
+            cache_key,
+            [lc_document.model_copy(deep=True) for lc_document in lc_documents],
+        )
+
+    def _build_cache_key(self, dataset_ids: list[UUID], query: str, **kwargs) -> str:
+        """构建缓存键，涵盖排序后的知识库id及其内容版本号与关键词表版本号、检索参数以及标准化后的query
+
+        关键词表版本号与检索时使用的关键词表一致(过期的关键词表不会被使用)，只变更关键词表的操作同样会使缓存失效
+        """
+        # 1.一次性获取所有知识库的内容版本号与关键词表版本号
+        dataset_ids = sorted(str(dataset_id) for dataset_id in dataset_ids)
+        versions = self.redis_client.mget(
+            [DATASET_CONTENT_VERSION.format(dataset_id=id) for id in dataset_ids]
+            + [KEYWORD_TABLE_VERSION.format(dataset_id=id) for id in dataset_ids]
+        )
+        versions = [int(version) if version else 0 for version in versions]
+
+        # 2.组装缓存键
+        return json.dumps(
+            {
+                "datasets": [
+                    [dataset_id, content_version, keyword_table_version]
+                    for dataset_id, content_version, keyword_table_version in zip(
+                        dataset_ids,
+                        versions[: len(dataset_ids)],
+                        versions[len(dataset_ids) :],
+                    )
+                ],
+                "query": re.sub(r"\s+", " ", query).strip().lower(),
+                **kwargs,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
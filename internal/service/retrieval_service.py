@@ -1,24 +1,52 @@
+import json
+import logging
+import uuid
+from collections import defaultdict
 from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
-from flask import Flask
+from flask import Flask, current_app
 from injector import inject
-from langchain.retrievers import EnsembleRetriever
 from langchain_core.documents import Document as LCDocument
+from langchain_core.retrievers import BaseRetriever
 from pydantic import BaseModel, Field
 from langchain_core.tools import BaseTool, tool
+from redis import Redis
 from sqlalchemy import update
 
 from internal.core.agent.entities.agent_entity import DATASET_RETRIEVAL_TOOL_NAME
-from internal.entity.dataset_entity import RetrievalStrategy, RetrievalSource
+from internal.entity.dataset_entity import (
+    RetrievalStrategy,
+    RetrievalSource,
+    FusionStrategy,
+    HYBRID_OVERFETCH_FACTOR,
+    DEFAULT_HYBRID_WEIGHTS,
+)
+from internal.entity.cache_entity import (
+    PENDING_DATASET_QUERIES,
+    PENDING_SEGMENT_HIT_COUNTS,
+    WRITE_BEHIND_BATCH_SIZE,
+)
 from internal.exception import NotFoundException
 from internal.lib.helper import combine_documents
 from internal.model import Dataset, DatasetQuery, Segment
+from pkg.cache import LRUCache
 from pkg.sqlalchemy import SQLAlchemy
 from .base_service import BaseService
 from .jieba_service import JiebaService
+from .keyword_table_service import KeywordTableService
+from .rerank_service import RerankService
+from .retrieval_cache_service import RetrievalCacheService
 from .vector_database_service import VectorDatabaseService
 
+# 检索器注册表，按照(知识库、检索策略、检索参数)缓存构建好的检索器，每次检索只需要传递query
+retriever_registry = LRUCache(max_size=1024)
+
+# 账号有权限检索的知识库id缓存，格式为{(account_id, dataset_ids): authorized_dataset_ids}
+authorized_dataset_cache = LRUCache(max_size=4096, ttl=60)
+
 
 @inject
 @dataclass
@@ -26,7 +54,11 @@ class RetrievalService(BaseService):
     """检索服务"""
 
     db: SQLAlchemy
+    redis_client: Redis
     jieba_service: JiebaService
+    keyword_table_service: KeywordTableService
+    rerank_service: RerankService
+    retrieval_cache_service: RetrievalCacheService
     vector_database_service: VectorDatabaseService
 
     def search_in_datasets(
@@ -38,78 +70,53 @@ class RetrievalService(BaseService):
         k: int = 4,
         score: float = 0,
         retrival_source: str = RetrievalSource.HIT_TESTING,
+        fusion: str = FusionStrategy.RRF,
+        weights: Optional[dict[str, float]] = None,
+        rerank: Optional[dict] = None,
     ) -> list[LCDocument]:
         """根据传递的query+知识库列表执行检索，并返回检索的文档+得分数据（如果检索策略为全文检索，则得分为0）"""
-        # 1.提取知识库列表并校验权限同时更新知识库id
-        datasets = (
-            self.db.session.query(Dataset)
-            .filter(Dataset.id.in_(dataset_ids), Dataset.account_id == account_id)
-            .all()
-        )
-        if datasets is None or len(datasets) == 0:
-            raise NotFoundException("当前无知识库可执行检索")
-        dataset_ids = [dataset.id for dataset in datasets]
+        # 1.校验知识库权限并更新知识库id
+        dataset_ids = self._get_authorized_dataset_ids(dataset_ids, account_id)
 
-        # 2.构建不同种类的检索器
-        from internal.core.retrievers import SemanticRetriever, FullTextRetriever
-
-        semantic_retriever = SemanticRetriever(
-            dataset_ids=dataset_ids,
-            vector_store=self.vector_database_service.vector_store,
-            search_kwargs={
-                "k": k,
-                "score_threshold": score,
-            },
+        # 2.查询检索结果缓存，未命中时执行检索并缓存结果
+        cache_key, lc_documents = self.retrieval_cache_service.get(
+            dataset_ids,
+            query,
+            retrieval_strategy=retrieval_strategy,
+            k=k,
+            score=score,
+            fusion=fusion,
+            weights=weights,
+            rerank=rerank,
         )
-        full_text_retriever = FullTextRetriever(
-            db=self.db,
-            dataset_ids=dataset_ids,
-            jieba_service=self.jieba_service,
-            search_kwargs={"k": k},
-        )
-        hybrid_retriever = EnsembleRetriever(
-            retrievers=[semantic_retriever, full_text_retriever],
-            weights=[0.5, 0.5],
-        )
-
-        # 3.根据不同的检索策略执行检索
-        if retrieval_strategy == RetrievalStrategy.SEMANTIC:
-            lc_documents = semantic_retriever.invoke(query)[:k]
-        elif retrieval_strategy == RetrievalStrategy.FULL_TEXT:
-            lc_documents = full_text_retriever.invoke(query)[:k]
-        else:
-            lc_documents = hybrid_retriever.invoke(query)[:k]
-
-        # 4.添加知识库查询记录（只存储唯一记录，也就是一个知识库如果检索了多篇文档，也只存储一条）
-        unique_dataset_ids = list(
-            set(str(lc_document.metadata["dataset_id"]) for lc_document in lc_documents)
-        )
-        for dataset_id in unique_dataset_ids:
-            self.create(
-                DatasetQuery,
-                dataset_id=dataset_id,
-                query=query,
-                source=retrival_source,
-                # todo:等待APP配置模块完成后进行调整
-                source_app_id=None,
-                created_by=account_id,
+        if lc_documents is None:
+            # 2.1 开启重排序时超额召回候选文档，再使用交叉编码器重排序后保留前k条
+            rerank_enabled = bool(rerank and rerank.get("enable"))
+            fetch_k = max(rerank["fetch_k"], k) if rerank_enabled else k
+            lc_documents = self._retrieve(
+                dataset_ids, query, retrieval_strategy, fetch_k, score, fusion, weights
             )
-
-        # 5.批量更新片段的命中次数，召回次数，涵盖了构建+执行语句
-        with self.db.auto_commit():
-            stmt = (
-                update(Segment)
-                .where(
-                    Segment.id.in_(
-                        [
-                            lc_document.metadata["segment_id"]
-                            for lc_document in lc_documents
-                        ]
-                    )
+            reranked_documents = (
+                self.rerank_service.rerank(
+                    query,
+                    lc_documents,
+                    k,
+                    current_app.config["RERANK_TIMEOUT"],
+                    current_app.config["RERANK_BATCH_SIZE"],
                 )
-                .values(hit_count=Segment.hit_count + 1)
+                if rerank_enabled
+                else lc_documents
             )
-            self.db.session.execute(stmt)
+
+            # 2.2 重排序超时或出错时使用召回的原始排序，并且不缓存降级的结果
+            if reranked_documents is None:
+                lc_documents = lc_documents[:k]
+            else:
+                lc_documents = reranked_documents
+                self.retrieval_cache_service.set(cache_key, lc_documents)
+
+        # 3.记录知识库查询记录与片段命中次数，数据先写入缓存，由定时任务批量写入数据库
+        self._record_retrieval(lc_documents, query, account_id, retrival_source)
 
         return lc_documents
 
@@ -122,6 +129,9 @@ class RetrievalService(BaseService):
         k: int = 4,
         score: float = 0,
         retrival_source: str = RetrievalSource.HIT_TESTING,
+        fusion: str = FusionStrategy.RRF,
+        weights: Optional[dict[str, float]] = None,
+        rerank: Optional[dict] = None,
     ) -> BaseTool:
         """根据传递的参数构建一个LangChain知识库搜索工具"""
 
@@ -143,6 +153,9 @@ class RetrievalService(BaseService):
                     k=k,
                     score=score,
                     retrival_source=retrival_source,
+                    fusion=fusion,
+                    weights=weights,
+                    rerank=rerank,
                 )
 
             # 2.将LangChain文档列表转换成字符串后返回
@@ -152,3 +165,220 @@ class RetrievalService(BaseService):
             return combine_documents(documents)
 
         return dataset_retrieval
+
+    def _get_authorized_dataset_ids(
+        self, dataset_ids: list[UUID], account_id: UUID
+    ) -> list[UUID]:
+        """获取账号有权限检索的知识库id列表，结果在进程内缓存一段时间，避免每次检索都查询数据库"""
+        # 1.查询缓存，知识库的归属不会变更，只需要通过过期时间处理被删除的知识库
+        cache_key = (str(account_id), tuple(sorted(str(id) for id in dataset_ids)))
+        authorized_dataset_ids = authorized_dataset_cache.get(cache_key)
+        if authorized_dataset_ids is not None:
+            return authorized_dataset_ids
+
+        # 2.缓存未命中时查询数据库校验权限，没有可检索的知识库时不缓存
+        authorized_dataset_ids = [
+            id
+            for id, in self.db.session.query(Dataset.id)
+            .filter(Dataset.id.in_(dataset_ids), Dataset.account_id == account_id)
+            .all()
+        ]
+        if len(authorized_dataset_ids) == 0:
+            raise NotFoundException("当前无知识库可执行检索")
+        authorized_dataset_cache.set(cache_key, authorized_dataset_ids)
+
+        return authorized_dataset_ids
+
+    def _retrieve(
+        self,
+        dataset_ids: list[UUID],
+        query: str,
+        retrieval_strategy: str,
+        k: int,
+        score: float,
+        fusion: str,
+        weights: Optional[dict[str, float]],
+    ) -> list[LCDocument]:
+        """根据检索策略获取检索器并在已校验权限的知识库中执行检索"""
+        weights = {**DEFAULT_HYBRID_WEIGHTS, **(weights or {})}
+        cache_key = (
+            tuple(sorted(str(id) for id in dataset_ids)),
+            retrieval_strategy,
+            k,
+            score,
+            fusion,
+            tuple(sorted(weights.items())),
+        )
+        retriever = retriever_registry.get(cache_key)
+        if retriever is None:
+            retriever = self._build_retriever(
+                dataset_ids, retrieval_strategy, k, score, fusion, weights
+            )
+            retriever_registry.set(cache_key, retriever)
+
+        return retriever.invoke(query)[:k]
+
+    def _build_retriever(
+        self,
+        dataset_ids: list[UUID],
+        retrieval_strategy: str,
+        k: int,
+        score: float,
+        fusion: str,
+        weights: dict[str, float],
+    ) -> BaseRetriever:
+        """根据检索策略构建检索器，检索器不持有query相关的状态，可以在多次检索、多个线程之间复用"""
+        from internal.core.retrievers import (
+            SemanticRetriever,
+            FullTextRetriever,
+            HybridRetriever,
+        )
+
+        # 1.混合检索时每个检索器超额召回，融合后再截取前k条数据，保证融合结果的精度
+        fetch_k = (
+            k * HYBRID_OVERFETCH_FACTOR
+            if retrieval_strategy == RetrievalStrategy.HYBRID
+            else k
+        )
+
+        # 2.构建相似性检索器与全文检索器
+        semantic_retriever = SemanticRetriever(
+            dataset_ids=dataset_ids,
+            vector_store=self.vector_database_service.vector_store,
+            search_kwargs={
+                "k": fetch_k,
+                "score_threshold": score,
+            },
+        )
+        if retrieval_strategy == RetrievalStrategy.SEMANTIC:
+            return semantic_retriever
+        full_text_retriever = FullTextRetriever(
+            db=self.db,
+            dataset_ids=dataset_ids,
+            jieba_service=self.jieba_service,
+            keyword_table_service=self.keyword_table_service,
+            search_kwargs={"k": fetch_k},
+        )
+        if retrieval_strategy == RetrievalStrategy.FULL_TEXT:
+            return full_text_retriever
+
+        # 3.构建并行执行并融合结果的混合检索器
+        hybrid_timeout = current_app.config["HYBRID_RETRIEVAL_TIMEOUT"]
+        return HybridRetriever(
+            flask_app=current_app._get_current_object(),
+            retrievers=[semantic_retriever, full_text_retriever],
+            weights=[weights["semantic"], weights["full_text"]],
+            timeouts=[hybrid_timeout, hybrid_timeout],
+            fusion=fusion,
+            k=k,
+        )
+
+    def flush_retrieval_records(self) -> None:
+        """将缓存中累积的知识库查询记录与片段命中次数批量写入数据库，由定时任务调用"""
+        self._flush_dataset_queries()
+        self._flush_segment_hit_counts()
+
+    def _record_retrieval(
+        self,
+        lc_documents: list[LCDocument],
+        query: str,
+        account_id: UUID,
+        retrival_source: str,
+    ) -> None:
+        """在一次Redis往返中记录查询记录与命中次数增量，记录失败不影响检索结果"""
+        # 1.添加知识库查询记录（只存储唯一记录，也就是一个知识库如果检索了多篇文档，也只存储一条）
+        unique_dataset_ids = list(
+            set(str(lc_document.metadata["dataset_id"]) for lc_document in lc_documents)
+        )
+        created_at = datetime.now().timestamp()
+
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for dataset_id in unique_dataset_ids:
+                pipeline.rpush(
+                    PENDING_DATASET_QUERIES,
+                    json.dumps(
+                        {
+                            "dataset_id": dataset_id,
+                            "query": query,
+                            "source": retrival_source,
+                            # todo:等待APP配置模块完成后进行调整
+                            "source_app_id": None,
+                            "created_by": str(account_id),
+                            "created_at": created_at,
+                        }
+                    ),
+                )
+
+            # 2.累加片段的命中次数，召回次数
+            for lc_document in lc_documents:
+                pipeline.hincrby(
+                    PENDING_SEGMENT_HIT_COUNTS,
+                    str(lc_document.metadata["segment_id"]),
+                    1,
+                )
+            pipeline.execute()
+        except Exception as e:
+            logging.exception(f"记录知识库检索信息失败, 错误信息: {str(e)}")
+
+    def _flush_dataset_queries(self) -> None:
+        """分批取出缓存中的查询记录并批量插入数据库，写入失败时将记录放回缓存"""
+        while True:
+            # 1.原子地取出一批查询记录
+            pipeline = self.redis_client.pipeline()
+            pipeline.lrange(PENDING_DATASET_QUERIES, 0, WRITE_BEHIND_BATCH_SIZE - 1)
+            pipeline.ltrim(PENDING_DATASET_QUERIES, WRITE_BEHIND_BATCH_SIZE, -1)
+            records, _ = pipeline.execute()
+            if not records:
+                return
+
+            # 2.批量写入数据库
+            try:
+                rows = []
+                for record in records:
+                    record = json.loads(record)
+                    record["created_at"] = datetime.fromtimestamp(record["created_at"])
+                    rows.append(record)
+                self.create_many(DatasetQuery, rows)
+            except Exception as e:
+                logging.exception(f"批量写入知识库查询记录失败, 错误信息: {str(e)}")
+                self.redis_client.rpush(PENDING_DATASET_QUERIES, *records)
+                return
+
+            if len(records) < WRITE_BEHIND_BATCH_SIZE:
+                return
+
+    def _flush_segment_hit_counts(self) -> None:
+        """取出缓存中累积的命中次数增量，按照增量分组批量更新片段，写入失败时将增量放回缓存"""
+        # 1.将待写入的哈希重命名为临时键，新的命中次数会累加到新的哈希中
+        flushing_key = f"{PENDING_SEGMENT_HIT_COUNTS}:flushing:{uuid.uuid4()}"
+        try:
+            self.redis_client.rename(PENDING_SEGMENT_HIT_COUNTS, flushing_key)
+        except Exception:
+            # 哈希不存在表示没有待写入的命中次数
+            return
+        hit_counts = {
+            segment_id.decode(): int(count)
+            for segment_id, count in self.redis_client.hgetall(flushing_key).items()
+        }
+
+        # 2.相同增量的片段使用同一条语句更新，片段id排序后更新以避免死锁
+        segment_ids_by_count = defaultdict(list)
+        for segment_id, count in hit_counts.items():
+            segment_ids_by_count[count].append(segment_id)
+        try:
+            with self.db.auto_commit():
+                for count, segment_ids in segment_ids_by_count.items():
+                    self.db.session.execute(
+                        update(Segment)
+                        .where(Segment.id.in_(sorted(segment_ids)))
+                        .values(hit_count=Segment.hit_count + count)
+                    )
+        except Exception as e:
+            logging.exception(f"批量更新片段命中次数失败, 错误信息: {str(e)}")
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for segment_id, count in hit_counts.items():
+                pipeline.hincrby(PENDING_SEGMENT_HIT_COUNTS, segment_id, count)
+            pipeline.execute()
+        finally:
+            self.redis_client.delete(flushing_key)
@@ -20,6 +20,7 @@ from internal.entity.dataset_entity import SegmentStatus, DocumentStatus
 from internal.entity.cache_entity import LOCK_SEGMENT_UPDATE_ENABLED, LOCK_EXPIRE_TIME
 from redis import Redis
 from .keyword_table_service import KeywordTableService
+from .retrieval_cache_service import RetrievalCacheService
 from .vector_database_service import VectorDatabaseService
 from .embeddings_service import EmbeddingsService
 from .jieba_service import JiebaService
@@ -35,6 +36,7 @@ class SegmentService(BaseService):
     db: SQLAlchemy
     redis_client: Redis
     keyword_table_service: KeywordTableService
+    retrieval_cache_service: RetrievalCacheService
     vector_database_service: VectorDatabaseService
     embeddings_service: EmbeddingsService
     jieba_service: JiebaService
@@ -84,24 +86,28 @@ class SegmentService(BaseService):
         try:
             # 位置+1并新增记录
             position += 1
-            segment = self.create(
+            segment = self.create_many(
                 Segment,
-                account_id=account.id,
-                dataset_id=dataset_id,
-                document_id=document_id,
-                node_id=uuid.uuid4(),
-                position=position,
-                content=req.content.data,
-                character_count=len(req.content.data),
-                token_count=token_count,
-                keywords=req.keywords.data,
-                hash=generate_text_hash(req.content.data),
-                enabled=True,
-                processing_started_at=datetime.now(),
-                indexing_completed_at=datetime.now(),
-                completed_at=datetime.now(),
-                status=SegmentStatus.COMPLETED,
-            )
+                [
+                    {
+                        "account_id": account.id,
+                        "dataset_id": dataset_id,
+                        "document_id": document_id,
+                        "node_id": uuid.uuid4(),
+                        "position": position,
+                        "content": req.content.data,
+                        "character_count": len(req.content.data),
+                        "token_count": token_count,
+                        "keywords": req.keywords.data,
+                        "hash": generate_text_hash(req.content.data),
+                        "enabled": True,
+                        "processing_started_at": datetime.now(),
+                        "indexing_completed_at": datetime.now(),
+                        "completed_at": datetime.now(),
+                        "status": SegmentStatus.COMPLETED,
+                    }
+                ],
+            )[0]
 
             # 往向量数据库中新增数据
             self.vector_database_service.vector_store.add_documents(
@@ -140,6 +146,9 @@ class SegmentService(BaseService):
                 self.keyword_table_service.add_keyword_table_from_ids(
                     dataset_id, [segment.id]
                 )
+
+            # 更新知识库内容版本号，使检索结果缓存失效
+            self.retrieval_cache_service.bump_dataset_version(dataset_id)
         except Exception as e:
             logging.exception(f"文档片段新增失败，错误信息：{str(e)}")
             if segment:
@@ -266,6 +275,9 @@ class SegmentService(BaseService):
                     uuid=segment.node_id, properties={"segment_enabled": enabled}
                 )
 
+                # 更新知识库内容版本号，使检索结果缓存失效
+                self.retrieval_cache_service.bump_dataset_version(dataset_id)
+
             except Exception as e:
                 logging.exception(
                     f"片段状态更新失败，segment_id: {segment_id},错误信息：{str(e)}"
@@ -327,10 +339,7 @@ class SegmentService(BaseService):
                 ),
             )
 
-            # 7.更新片段归属关键词信息
-            self.keyword_table_service.delete_keyword_table_from_ids(
-                dataset_id, [segment_id]
-            )
+            # 7.更新片段归属关键词信息，重新添加时会先清除旧的倒排记录及统计信息
             self.keyword_table_service.add_keyword_table_from_ids(
                 dataset_id, [segment_id]
             )
@@ -355,10 +364,13 @@ class SegmentService(BaseService):
                     properties={
                         "text": req.content.data,
                     },
-                    vector=self.embeddings_service.embeddings.embed_query(
-                        req.content.data
-                    ),
+                    vector=self.embeddings_service.embed_documents([req.content.data])[
+                        0
+                    ],
                 )
+
+            # 10.更新知识库内容版本号，使检索结果缓存失效
+            self.retrieval_cache_service.bump_dataset_version(dataset_id)
         except Exception as e:
             logging.exception(
                 f"更新文档片段记录失败, segment_id: {segment}, 错误信息: {str(e)}"
@@ -401,6 +413,7 @@ class SegmentService(BaseService):
             self.vector_database_service.collection.data.delete_by_id(
                 str(segment.node_id)
             )
+            self.retrieval_cache_service.bump_dataset_version(dataset_id)
         except Exception as e:
             logging.exception(
                 f"删除文档片段失败，segment_id: {segment_id}, 错误信息: {str(e)}"
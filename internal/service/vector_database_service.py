@@ -9,7 +9,8 @@ from langchain_core.documents import Document
 from langchain_core.vectorstores import VectorStoreRetriever
 from .embeddings_service import EmbeddingsService
 from weaviate.collections import Collection
-
+from weaviate.classes.data import DataObject
+from internal.exception import FailException
 
 # 向量数据库的集合名字
 COLLECTION_NAME = "Dataset"
@@ -40,8 +41,26 @@ class VectorDatabaseService:
             client=self.client,
             index_name=COLLECTION_NAME,
             text_key="text",
-            embedding=self.embeddings_service.embeddings,
+            embedding=self.embeddings_service.cache_backed_embeddings,
+        )
+
+    def add_documents_with_vectors(
+        self, documents: List[Document], vectors: List[List[float]], ids: List[str]
+    ) -> None:
+        """将已经预先计算好向量的文档批量写入向量数据库，存储结构与WeaviateVectorStore保持一致"""
+        result = self.collection.data.insert_many(
+            [
+                DataObject(
+                    properties={"text": document.page_content, **document.metadata},
+                    uuid=id,
+                    vector=vector,
+                )
+                for document, vector, id in zip(documents, vectors, ids)
+            ]
         )
+        if result.has_errors:
+            error = next(iter(result.errors.values()))
+            raise FailException(f"向量数据库批量写入失败: {error.message}")
 
     def get_retriever(self) -> VectorStoreRetriever:
         """获取向量数据库服务的检索器"""
@@ -0,0 +1,13 @@
+from uuid import UUID
+
+from celery import shared_task
+
+
+@shared_task
+def run_debug_agent(app_id: UUID, query: str, account_id: UUID, task_id: UUID) -> None:
+    """在Celery中执行调试智能体，事件通过跨进程的事件总线推送给HTTP进程"""
+    from app.http.module import injector
+    from internal.service.app_service import AppService
+
+    app_service = injector.get(AppService)
+    app_service.run_debug_agent(app_id, query, account_id, task_id)
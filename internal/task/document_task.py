@@ -4,13 +4,29 @@ from celery import shared_task
 
 
 @shared_task
-def build_documents(document_ids: list[UUID]) -> None:
-    """根据传递的文档id列表构建文档"""
+def build_documents(document_ids: list[UUID], batch: str = "") -> int:
+    """根据传递的文档id列表构建文档，传递批次号时同步累加批次的处理进度"""
     from app.http.module import injector
     from internal.service.indexing_service import IndexingService
 
     indexing_service = injector.get(IndexingService)
-    indexing_service.build_documents(document_ids)
+    try:
+        indexing_service.build_documents(document_ids)
+    finally:
+        if batch:
+            indexing_service.update_batch_progress(batch, len(document_ids))
+
+    return len(document_ids)
+
+
+@shared_task
+def build_documents_completed(results: list[int], batch: str) -> None:
+    """批次内所有文档构建子任务完成后的回调，将批次标记为已完成"""
+    from app.http.module import injector
+    from internal.service.indexing_service import IndexingService
+
+    indexing_service = injector.get(IndexingService)
+    indexing_service.complete_batch(batch)
 
 
 @shared_task
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """线程安全的进程内LRU缓存，支持按条目数量、内存预算(字节)以及过期时间淘汰数据"""
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        """构造函数，max_size为最大条目数，max_bytes为内存预算，ttl为过期时间(秒)，为None时不限制"""
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._lock = threading.RLock()
+        # 缓存数据，格式为{key: (value, size, expire_at)}，顺序即为最近使用顺序
+        self._data: OrderedDict[Hashable, tuple[Any, int, Optional[float]]] = (
+            OrderedDict()
+        )
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """根据键获取缓存数据，命中后将该条目移动到最近使用的位置"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+
+            value, _, expire_at = item
+            if expire_at is not None and expire_at <= time.monotonic():
+                self._pop(key)
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, size: int = 0) -> bool:
+        """设置缓存数据，size为该条目估算的字节数，超出内存预算的条目不会被缓存并返回False"""
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.delete(key)
+            return False
+
+        with self._lock:
+            self._pop(key)
+            expire_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._data[key] = (value, size, expire_at)
+            self._bytes += size
+
+            # 按照最久未使用的顺序淘汰数据，直到满足条目数与内存预算
+            while len(self._data) > self.max_size or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+        return True
+
+    def delete(self, key: Hashable) -> None:
+        """根据键删除缓存数据"""
+        with self._lock:
+            self._pop(key)
+
+    def keys(self) -> list[Hashable]:
+        """获取所有缓存键，按照最久未使用到最近使用排序"""
+        with self._lock:
+            return list(self._data.keys())
+
+    def clear(self) -> None:
+        """清空所有缓存数据"""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """获取缓存的统计信息，涵盖命中/未命中/淘汰次数、条目数以及占用字节数"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "bytes": self._bytes,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def _pop(self, key: Hashable) -> None:
+        """删除指定条目并扣减占用字节数，调用方需持有锁"""
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[1]
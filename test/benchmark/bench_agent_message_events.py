@@ -0,0 +1,115 @@
+"""
+智能体消息事件发布基准测试：对比每个token都序列化完整消息列表的旧实现与每次LLM调用只序列化一次、后续事件只携带增量内容的新实现
+
+模拟约6k token的上下文与500个token的回答，同时统计事件写入事件总线(JSON)的字节数
+运行方式: python -m test.benchmark.bench_agent_message_events
+"""
+
+import time
+import uuid
+
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+    messages_to_dict,
+)
+from pydantic import BaseModel, Field
+
+from internal.core.agent.entities.queue_entity import AgentThought, QueueEvent
+
+# 回答的token数，每个token对应一个消息事件
+ANSWER_TOKENS = 500
+
+# 历史对话轮数以及每条消息的字符数，总计约6k token
+HISTORY_ROUNDS = 6
+MESSAGE_CHARS = 1000
+
+
+class LegacyAgentThought(BaseModel):
+    """旧实现的智能体事件，基于pydantic模型并在每次创建时校验"""
+
+    id: uuid.UUID
+    task_id: uuid.UUID
+    event: QueueEvent
+    thought: str = ""
+    observation: str = ""
+    tool: str = ""
+    tool_input: dict = Field(default_factory=dict)
+    message: list[dict] = Field(default_factory=list)
+    message_token_count: int = 0
+    message_unit_price: float = 0
+    message_price_unit: float = 0
+    answer: str = ""
+    answer_token_count: int = 0
+    answer_unit_price: float = 0
+    answer_price_unit: float = 0
+    total_token_count: int = 0
+    total_price: float = 0
+    latency: float = 0
+
+
+def build_messages() -> list:
+    """构建包含系统消息、历史对话以及工具输出的消息列表"""
+    messages = [SystemMessage("系统提示" * (MESSAGE_CHARS // 4))]
+    for i in range(HISTORY_ROUNDS):
+        messages.append(HumanMessage(f"问题{i}" + "问" * MESSAGE_CHARS))
+        messages.append(AIMessage(f"回答{i}" + "答" * MESSAGE_CHARS))
+    messages.append(
+        ToolMessage(tool_call_id="call_0", content="工具输出" * (MESSAGE_CHARS // 2))
+    )
+    messages.append(HumanMessage("当前问题"))
+    return messages
+
+
+def legacy_publishing(messages: list) -> tuple[float, int]:
+    """旧实现：每个token都序列化完整消息列表并创建pydantic事件"""
+    task_id, event_id, size = uuid.uuid4(), uuid.uuid4(), 0
+    start = time.perf_counter()
+    for _ in range(ANSWER_TOKENS):
+        agent_thought = LegacyAgentThought(
+            id=event_id,
+            task_id=task_id,
+            event=QueueEvent.AGENT_MESSAGE,
+            thought="字",
+            message=messages_to_dict(messages),
+            answer="字",
+            latency=0.1,
+        )
+        size += len(agent_thought.model_dump_json())
+    return time.perf_counter() - start, size
+
+
+def delta_publishing(messages: list) -> tuple[float, int]:
+    """新实现：每次LLM调用只序列化一次消息列表，后续事件只携带增量内容"""
+    task_id, event_id, size = uuid.uuid4(), uuid.uuid4(), 0
+    start = time.perf_counter()
+    message = messages_to_dict(messages)
+    for index in range(ANSWER_TOKENS):
+        agent_thought = AgentThought(
+            id=event_id,
+            task_id=task_id,
+            event=QueueEvent.AGENT_MESSAGE,
+            thought="字",
+            message=message if index == 0 else [],
+            answer="字",
+            latency=0.1,
+        )
+        size += len(agent_thought.to_json())
+    return time.perf_counter() - start, size
+
+
+def main() -> None:
+    messages = build_messages()
+    for name, func in [("全量消息", legacy_publishing), ("增量消息", delta_publishing)]:
+        elapsed, size = func(messages)
+        print(
+            f"{name}: 总耗时 {elapsed * 1000:.1f}ms, "
+            f"单token {elapsed / ANSWER_TOKENS * 1_000_000:.1f}us, "
+            f"序列化 {size / 1024 / 1024:.2f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+智能体启动基准测试：对比每次请求都重新编译LangGraph图结构的旧实现与复用编译好的图结构的新实现，统计创建智能体以及首个事件的延迟
+
+使用GenericFakeChatModel模拟LLM，事件写入内存列表，不依赖redis与外部服务
+运行方式: python -m test.benchmark.bench_agent_startup
+"""
+
+import statistics
+import time
+import uuid
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from internal.core.agent.agents import FunctionCallAgent
+from internal.core.agent.entities.agent_entity import AgentConfig
+
+# 模拟的请求次数
+REQUESTS_TOTAL = 200
+
+
+class MemoryQueueManager:
+    """记录首个事件时间的队列管理器"""
+
+    def __init__(self):
+        self.first_event_at = None
+
+    def publish(self, task_id, agent_thought) -> None:
+        if self.first_event_at is None:
+            self.first_event_at = time.perf_counter()
+
+    def publish_error(self, task_id, error) -> None:
+        raise RuntimeError(error)
+
+
+class RebuildFunctionCallAgent(FunctionCallAgent):
+    """旧实现：每次创建智能体时重新编译图结构"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._agent = self._build_agent()
+
+
+def run(name: str, agent_cls: type[FunctionCallAgent]) -> None:
+    """模拟多次请求，输出创建智能体以及首个事件的延迟分位数"""
+    startup_latencies, first_event_latencies = [], []
+    for _ in range(REQUESTS_TOTAL):
+        start = time.perf_counter()
+        agent = agent_cls(
+            llm=GenericFakeChatModel(messages=iter([AIMessage("你好")])),
+            agent_config=AgentConfig(user_id=uuid.uuid4()),
+        )
+        startup_latencies.append((time.perf_counter() - start) * 1000)
+
+        queue_manager = MemoryQueueManager()
+        agent._agent_queue_manager = queue_manager
+        agent.run({"messages": [HumanMessage("你好")]})
+        first_event_latencies.append((queue_manager.first_event_at - start) * 1000)
+
+    for label, latencies in [
+        ("创建智能体", startup_latencies),
+        ("首个事件", first_event_latencies),
+    ]:
+        latencies.sort()
+        print(
+            f"{name} {label}: p50 {statistics.median(latencies):.2f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f}ms"
+        )
+
+
+def main() -> None:
+    run("每次编译图结构", RebuildFunctionCallAgent)
+    run("复用编译好的图结构", FunctionCallAgent)
+
+
+if __name__ == "__main__":
+    main()
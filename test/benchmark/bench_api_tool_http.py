@@ -0,0 +1,120 @@
+"""
+API工具HTTP执行层基准测试：对比每次调用都新建连接的requests.request与共享连接池的ApiToolHttpClient，同时验证大响应截断
+
+在本地线程中启动一个简单的HTTP服务，/small返回小JSON，/large返回约5MB的响应体
+运行方式: python -m test.benchmark.bench_api_tool_http
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from internal.core.tools.api_tools.providers.api_tool_http_client import (
+    ApiToolHttpClient,
+)
+
+# 每种方式执行的请求总数
+REQUESTS_TOTAL = 500
+
+# 并发测试使用的线程数
+CONCURRENCY = 16
+
+SMALL_BODY = json.dumps({"weather": "晴", "temperature": 25}).encode()
+LARGE_BODY = b"x" * (5 * 1024 * 1024)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """本地测试服务，支持长连接"""
+
+    protocol_version = "HTTP/1.1"
+    # 响应头与响应体分开写入，关闭Nagle算法避免长连接上出现40ms的延迟确认等待
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        body = LARGE_BODY if self.path.startswith("/large") else SMALL_BODY
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def run(name: str, func, url: str, concurrency: int) -> None:
+    """使用指定并发数执行请求并输出耗时"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: func(url), range(REQUESTS_TOTAL)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name}(并发数 {concurrency}): 总耗时 {elapsed * 1000:.1f}ms, "
+        f"单次 {elapsed / REQUESTS_TOTAL * 1000:.2f}ms"
+    )
+
+
+async def run_async(client: ApiToolHttpClient, url: str) -> None:
+    """使用异步客户端并发执行请求并输出耗时"""
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def request() -> str:
+        async with semaphore:
+            return await client.arequest("GET", url)
+
+    await asyncio.gather(*[request() for _ in range(REQUESTS_TOTAL)])
+    elapsed = time.perf_counter() - start
+    print(
+        f"httpx异步请求(并发数 {CONCURRENCY}): 总耗时 {elapsed * 1000:.1f}ms, "
+        f"单次 {elapsed / REQUESTS_TOTAL * 1000:.2f}ms"
+    )
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    client = ApiToolHttpClient(pool_maxsize=CONCURRENCY)
+    for concurrency in [1, CONCURRENCY]:
+        run(
+            "requests.request",
+            lambda url: requests.request("GET", url).text,
+            f"{base_url}/small",
+            concurrency,
+        )
+        run(
+            "共享连接池",
+            lambda url: client.request("GET", url),
+            f"{base_url}/small",
+            concurrency,
+        )
+    asyncio.run(run_async(client, f"{base_url}/small"))
+
+    # 大响应只读取max_response_bytes字节
+    for name, func in [
+        ("requests.request", lambda url: requests.request("GET", url).text),
+        ("共享连接池", lambda url: client.request("GET", url)),
+    ]:
+        start = time.perf_counter()
+        text = func(f"{base_url}/large")
+        print(
+            f"{name}大响应: 耗时 {(time.perf_counter() - start) * 1000:.1f}ms, "
+            f"返回 {len(text)}字符"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+知识库召回测试接口基准测试：使用多个线程并发请求POST /datasets/<dataset_id>/hit，统计不同并发数下的延迟分位数与吞吐量
+
+需要先启动应用并准备好包含已完成文档的知识库，通过环境变量传递接口地址、授权凭证以及知识库id:
+    BENCH_BASE_URL(默认为http://127.0.0.1:5001)、BENCH_ACCESS_TOKEN、BENCH_DATASET_ID
+运行方式: python -m test.benchmark.bench_dataset_hit
+"""
+
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# 每个并发数下执行的请求总数
+REQUESTS_PER_LEVEL = 200
+
+# 测试的并发数
+CONCURRENCY_LEVELS = [1, 4, 16]
+
+# 召回测试使用的query，轮流使用以覆盖缓存命中与未命中的情况
+QUERIES = [
+    "如何创建知识库",
+    "文档上传后需要多久才能完成索引",
+    "混合检索与全文检索有什么区别",
+    "怎么关闭某个片段",
+]
+
+
+def hit(session: requests.Session, url: str, query: str) -> float:
+    """发起一次召回测试请求，返回请求耗时(毫秒)"""
+    start = time.perf_counter()
+    response = session.post(
+        url,
+        json={"query": query, "retrieval_strategy": "hybrid", "k": 10, "score": 0},
+        timeout=30,
+    )
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    base_url = os.getenv("BENCH_BASE_URL", "http://127.0.0.1:5001")
+    url = f"{base_url}/datasets/{os.environ['BENCH_DATASET_ID']}/hit"
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {os.environ['BENCH_ACCESS_TOKEN']}"
+    session.mount(
+        "http://", requests.adapters.HTTPAdapter(pool_maxsize=max(CONCURRENCY_LEVELS))
+    )
+
+    for concurrency in CONCURRENCY_LEVELS:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            start = time.perf_counter()
+            latencies = list(
+                executor.map(
+                    lambda i: hit(session, url, QUERIES[i % len(QUERIES)]),
+                    range(REQUESTS_PER_LEVEL),
+                )
+            )
+            elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        print(
+            f"并发数 {concurrency}: p50 {statistics.median(latencies):.1f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f}ms, "
+            f"吞吐量 {REQUESTS_PER_LEVEL / elapsed:.1f}req/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+混合检索延迟基准测试：使用模拟固定延迟的本地检索器代替向量数据库与全文检索，对比串行执行的EnsembleRetriever与并行执行的HybridRetriever
+
+运行方式: python -m test.benchmark.bench_hybrid_retrieval
+"""
+
+import statistics
+import time
+from typing import List
+
+from flask import Flask
+from langchain.retrievers import EnsembleRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document as LCDocument
+from langchain_core.retrievers import BaseRetriever
+
+from internal.core.retrievers.hybrid_retriever import HybridRetriever
+
+# 每种场景执行的检索次数
+ROUNDS = 20
+
+# 检索返回的文档数
+K = 4
+
+
+class StandInRetriever(BaseRetriever):
+    """模拟检索器，休眠指定的时间后返回固定的文档列表"""
+
+    name: str
+    latency: float
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[LCDocument]:
+        time.sleep(self.latency)
+        return [
+            LCDocument(
+                page_content=f"{self.name}-{i}",
+                metadata={"segment_id": f"{self.name}-{i}"},
+            )
+            for i in range(K)
+        ]
+
+
+def measure(retriever: BaseRetriever) -> tuple[float, int]:
+    """执行多次检索，返回延迟的中位数(毫秒)以及返回的文档数"""
+    latencies, count = [], 0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        count = len(retriever.invoke("benchmark"))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), count
+
+
+def main() -> None:
+    flask_app = Flask(__name__)
+    scenarios = [
+        ("向量检索80ms + 全文检索50ms", 0.08, 0.05, 1.0),
+        ("向量检索400ms(超时200ms) + 全文检索50ms", 0.4, 0.05, 0.2),
+    ]
+
+    for name, semantic_latency, full_text_latency, timeout in scenarios:
+        retrievers = [
+            StandInRetriever(name="semantic", latency=semantic_latency),
+            StandInRetriever(name="full_text", latency=full_text_latency),
+        ]
+        ensemble = EnsembleRetriever(retrievers=retrievers, weights=[0.5, 0.5])
+        hybrid = HybridRetriever(
+            flask_app=flask_app,
+            retrievers=retrievers,
+            weights=[0.5, 0.5],
+            timeouts=[timeout, timeout],
+        )
+
+        ensemble_latency, ensemble_count = measure(ensemble)
+        hybrid_latency, hybrid_count = measure(hybrid)
+        print(f"{name}:")
+        print(
+            f"  串行EnsembleRetriever: {ensemble_latency:.1f}ms, 文档数 {ensemble_count}"
+        )
+        print(f"  并行HybridRetriever:   {hybrid_latency:.1f}ms, 文档数 {hybrid_count}")
+
+
+if __name__ == "__main__":
+    main()
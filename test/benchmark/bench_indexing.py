@@ -0,0 +1,182 @@
+"""
+关键词表构建基准测试：调用真实的IndexingService._indexing(内部调用KeywordTableService.add_segment_keywords)，
+统计不同大小的文档首次构建与重新构建索引时执行的SQL语句数、绑定的记录数以及耗时
+
+数据库会话使用内存中的计数会话代替，只记录执行的语句并模拟片段表与倒排表，不依赖postgres与redis
+运行方式: python -m test.benchmark.bench_indexing
+"""
+
+import random
+import time
+import uuid
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock, create_autospec
+
+from langchain_core.documents import Document as LC_Document
+from redis import Redis
+
+from internal.service import IndexingService, JiebaService, KeywordTableService
+
+# 单个文档分割后的片段数量
+DOCUMENT_SEGMENT_COUNTS = [100, 250, 500, 1000]
+
+# 词汇表大小以及每个片段包含的词数
+VOCABULARY_SIZE = 4000
+WORDS_PER_SEGMENT = 80
+
+# 倒排表删除时返回的记录
+DeletedRow = namedtuple("DeletedRow", ["keyword", "segment_id", "segment_length"])
+
+
+class CountingQuery:
+    """模拟片段查询，返回会话中记录的片段关键词、内容以及长度"""
+
+    def __init__(self, session: "CountingSession"):
+        self.session = session
+
+    def with_entities(self, *args) -> "CountingQuery":
+        return self
+
+    def filter(self, *args) -> "CountingQuery":
+        return self
+
+    def all(self) -> list[tuple]:
+        self.session.statements["select segment"] += 1
+        return [
+            (id, segment["keywords"], segment["content"], segment["token_count"])
+            for id, segment in self.session.segments.items()
+        ]
+
+
+class CountingSession:
+    """记录执行语句的数据库会话，同时在内存中维护片段关键词以及倒排记录"""
+
+    def __init__(self, segments: dict[str, dict]):
+        self.segments = segments
+        self.postings: dict[str, list[DeletedRow]] = {}
+        self.statements = Counter()
+        self.bound_rows = 0
+
+    def query(self, *args) -> CountingQuery:
+        return CountingQuery(self)
+
+    def execute(self, statement, params=None) -> MagicMock:
+        # 1.按照语句类型与表名统计语句数以及绑定的记录数
+        statement_name = f"{statement.__visit_name__} {statement.table.name}"
+        self.statements[statement_name] += 1
+        self.bound_rows += len(params) if isinstance(params, list) else 1
+
+        # 2.模拟片段关键词的更新以及倒排记录的插入、删除
+        result = MagicMock()
+        result.all.return_value = []
+        if statement_name == "update segment":
+            for param in params:
+                self.segments[param["id"]]["keywords"] = param["keywords"]
+        elif statement_name == "insert segment_keyword":
+            for row in params:
+                self.postings.setdefault(row["segment_id"], []).append(
+                    DeletedRow(row["keyword"], row["segment_id"], row["segment_length"])
+                )
+        elif statement_name == "delete segment_keyword":
+            result.all.return_value = [
+                row
+                for segment_id in list(self.postings.keys())
+                for row in self.postings.pop(segment_id)
+            ]
+        return result
+
+    def commit(self) -> None:
+        self.statements["commit"] += 1
+
+    def rollback(self) -> None:
+        pass
+
+
+def build_indexing_service(session: CountingSession) -> IndexingService:
+    """使用计数会话构建索引服务以及关键词表服务，其余依赖在索引阶段不会被调用"""
+    db = SimpleNamespace(session=session)
+
+    @contextmanager
+    def auto_commit():
+        yield
+        session.commit()
+
+    db.auto_commit = auto_commit
+    redis_client = create_autospec(Redis, instance=True)
+    return IndexingService(
+        db=db,
+        redis_client=redis_client,
+        file_extractor=MagicMock(),
+        process_rule_service=MagicMock(),
+        embeddings_service=MagicMock(),
+        jieba_service=JiebaService(),
+        keyword_table_service=KeywordTableService(db=db, redis_client=redis_client),
+        retrieval_cache_service=MagicMock(),
+        vector_database_service=MagicMock(),
+    )
+
+
+def build_segments(segment_count: int) -> dict[str, dict]:
+    """随机生成指定数量的片段"""
+    segments = {}
+    for _ in range(segment_count):
+        words = [
+            f"词汇{random.randint(0, VOCABULARY_SIZE)}"
+            for _ in range(WORDS_PER_SEGMENT)
+        ]
+        segments[str(uuid.uuid4())] = {
+            "keywords": [],
+            "content": "，".join(words),
+            "token_count": len(words),
+        }
+    return segments
+
+
+def run(
+    service: IndexingService, session: CountingSession, document, verbose: bool = True
+) -> None:
+    """执行一次索引构建并输出语句数、绑定记录数以及耗时"""
+    lc_segments = [
+        LC_Document(page_content=segment["content"], metadata={"segment_id": id})
+        for id, segment in session.segments.items()
+    ]
+    session.statements.clear()
+    session.bound_rows = 0
+
+    start_at = time.perf_counter()
+    service._indexing(document, lc_segments)
+    cost = time.perf_counter() - start_at
+
+    if not verbose:
+        return
+    print(
+        f"{len(lc_segments):>8} {sum(session.statements.values()):>8} "
+        f"{session.bound_rows:>10} {cost:>10.3f}  {dict(session.statements)}"
+    )
+
+
+def main():
+    # 预热jieba的词典，避免首次加载的耗时计入第一组数据
+    JiebaService.extract_keywords("预热jieba词典")
+
+    for title in ["首次构建索引", "重新构建索引"]:
+        print(title)
+        print(
+            f"{'片段数':>8} {'语句数':>8} {'绑定记录数':>10} {'耗时(s)':>10}  语句明细"
+        )
+        for segment_count in DOCUMENT_SEGMENT_COUNTS:
+            session = CountingSession(build_segments(segment_count))
+            service = build_indexing_service(session)
+            document = SimpleNamespace(
+                dataset_id=uuid.uuid4(), indexing_completed_at=None
+            )
+            # 重新构建时先完成一次索引，使片段已有倒排记录与统计信息
+            if title == "重新构建索引":
+                run(service, session, document, verbose=False)
+            run(service, session, document)
+
+
+if __name__ == "__main__":
+    main()
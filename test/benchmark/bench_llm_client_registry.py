@@ -0,0 +1,125 @@
+"""
+大语言模型客户端注册表基准测试：对比每次请求都创建ChatOpenAI的旧实现与通过注册表复用模型实例及其长连接的新实现，统计首个token的延迟
+
+在本地线程中启动一个兼容OpenAI接口的流式服务，/v1/chat/completions以SSE格式逐个返回token
+运行方式: python -m test.benchmark.bench_llm_client_registry
+"""
+
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_openai import ChatOpenAI
+
+from internal.core.language_model import LLMClientRegistry
+
+# 每种方式执行的请求总数
+REQUESTS_TOTAL = 200
+
+# 测试的并发数
+CONCURRENCY_LEVELS = [1, 8]
+
+# 每次回答返回的token
+ANSWER_TOKENS = ["你好", "，", "我是", "智能体", "。"]
+
+
+def build_stream_body() -> bytes:
+    """构建流式响应体"""
+    chunks = [
+        {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "bench-model",
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": token},
+                    "finish_reason": None,
+                }
+            ],
+        }
+        for token in ANSWER_TOKENS
+    ]
+    lines = [f"data: {json.dumps(chunk)}\n\n" for chunk in chunks]
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode()
+
+
+STREAM_BODY = build_stream_body()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """兼容OpenAI接口的本地测试服务，支持长连接"""
+
+    protocol_version = "HTTP/1.1"
+    # 响应头与响应体分开写入，关闭Nagle算法避免长连接上出现40ms的延迟确认等待
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(STREAM_BODY)))
+        self.end_headers()
+        self.wfile.write(STREAM_BODY)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def first_token_latency(get_llm) -> float:
+    """获取模型实例并流式调用，返回从获取实例到收到首个token的耗时(毫秒)"""
+    start = time.perf_counter()
+    llm = get_llm()
+    latency = 0
+    for chunk in llm.stream("你好"):
+        if not latency and chunk.content:
+            latency = (time.perf_counter() - start) * 1000
+    return latency
+
+
+def run(name: str, get_llm, concurrency: int) -> None:
+    """使用指定并发数执行请求并输出首个token的延迟分位数"""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(
+            executor.map(lambda _: first_token_latency(get_llm), range(REQUESTS_TOTAL))
+        )
+    print(
+        f"{name}(并发数 {concurrency}): 首个token p50 {statistics.median(latencies):.2f}ms, "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f}ms"
+    )
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    params = {
+        "temperature": 0,
+        "openai_api_key": "bench",
+        "openai_api_base": f"http://127.0.0.1:{server.server_port}/v1",
+    }
+
+    registry = LLMClientRegistry()
+    for concurrency in CONCURRENCY_LEVELS:
+        run(
+            "每次创建ChatOpenAI",
+            lambda: ChatOpenAI(model="bench-model", **params),
+            concurrency,
+        )
+        run(
+            "客户端注册表",
+            lambda: registry.get_llm(model="bench-model", **params),
+            concurrency,
+        )
+    print(f"注册表统计: {registry.stats}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+检索器注册表基准测试：调用真实的RetrievalService._retrieve，对比每次检索前清空检索器注册表(等同于每次重新构建检索器)
+与复用注册表中已构建检索器的单次检索耗时
+
+向量数据库、数据库以及分词服务使用自动生成的同类型替身对象并返回空结果，只测量检索器的构建、查找以及调用框架本身的开销
+运行方式: python -m test.benchmark.bench_retriever_registry
+"""
+
+import time
+import uuid
+from unittest.mock import create_autospec
+
+from flask import Flask
+from langchain_weaviate import WeaviateVectorStore
+from redis import Redis
+
+from internal.entity.dataset_entity import FusionStrategy, RetrievalStrategy
+from internal.service import (
+    JiebaService,
+    KeywordTableService,
+    RerankService,
+    RetrievalCacheService,
+    RetrievalService,
+    VectorDatabaseService,
+)
+from internal.service.retrieval_service import retriever_registry
+from pkg.sqlalchemy import SQLAlchemy
+
+# 每种方式执行的次数
+ROUNDS = 2000
+
+# 检索的知识库数
+DATASET_COUNT = 5
+
+
+def build_retrieval_service() -> RetrievalService:
+    """使用同类型替身对象构建检索服务，向量检索与关键词提取均返回空结果"""
+    vector_database_service = create_autospec(VectorDatabaseService, instance=True)
+    vector_database_service.vector_store = create_autospec(
+        WeaviateVectorStore, instance=True
+    )
+    vector_database_service.vector_store.similarity_search_with_relevance_scores.return_value = (
+        []
+    )
+    jieba_service = create_autospec(JiebaService, instance=True)
+    jieba_service.extract_keywords.return_value = []
+
+    return RetrievalService(
+        db=create_autospec(SQLAlchemy, instance=True),
+        redis_client=create_autospec(Redis, instance=True),
+        jieba_service=jieba_service,
+        keyword_table_service=create_autospec(KeywordTableService, instance=True),
+        rerank_service=create_autospec(RerankService, instance=True),
+        retrieval_cache_service=create_autospec(RetrievalCacheService, instance=True),
+        vector_database_service=vector_database_service,
+    )
+
+
+def run(
+    name: str,
+    retrieval_service: RetrievalService,
+    dataset_ids: list[uuid.UUID],
+    retrieval_strategy: str,
+    use_registry: bool,
+) -> None:
+    """执行多次检索并输出单次检索的耗时"""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        if not use_registry:
+            retriever_registry.clear()
+        retrieval_service._retrieve(
+            dataset_ids,
+            "检索器注册表",
+            retrieval_strategy,
+            4,
+            0,
+            FusionStrategy.RRF,
+            None,
+        )
+    elapsed = (time.perf_counter() - start) / ROUNDS * 1_000_000
+    print(
+        f"{RetrievalStrategy(retrieval_strategy).value} {name}: 单次检索耗时 {elapsed:.1f}us"
+    )
+
+
+def main() -> None:
+    flask_app = Flask(__name__)
+    flask_app.config["HYBRID_RETRIEVAL_TIMEOUT"] = 3
+    retrieval_service = build_retrieval_service()
+    dataset_ids = [uuid.uuid4() for _ in range(DATASET_COUNT)]
+
+    with flask_app.app_context():
+        for retrieval_strategy in [
+            RetrievalStrategy.SEMANTIC,
+            RetrievalStrategy.FULL_TEXT,
+            RetrievalStrategy.HYBRID,
+        ]:
+            run("每次构建", retrieval_service, dataset_ids, retrieval_strategy, False)
+            run("注册表复用", retrieval_service, dataset_ids, retrieval_strategy, True)
+    print(f"注册表统计: {retriever_registry.stats}")
+
+
+if __name__ == "__main__":
+    main()
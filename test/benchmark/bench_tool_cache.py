@@ -0,0 +1,70 @@
+"""
+工具缓存基准测试：对比每次调试会话都重新编译API工具(create_model + StructuredTool)与从缓存中获取编译好的工具的耗时
+
+模拟一个绑定了多个API工具、每个工具包含多个参数的应用
+运行方式: python -m test.benchmark.bench_tool_cache
+"""
+
+import time
+import uuid
+
+from internal.core.tools.api_tools.entities import ToolEntity
+from internal.core.tools.api_tools.providers import ApiProvidersManager
+from internal.core.tools.api_tools.providers.api_providers_manager import (
+    api_tool_cache,
+)
+
+# 模拟的调试会话次数
+CHAT_ROUNDS = 200
+
+# 应用绑定的API工具数以及每个工具的参数数
+TOOLS_PER_APP = 8
+PARAMETERS_PER_TOOL = 6
+
+
+def build_tool_entities() -> list[ToolEntity]:
+    """构建应用绑定的API工具配置"""
+    return [
+        ToolEntity(
+            id=str(uuid.uuid4()),
+            name=f"tool_{i}",
+            url="https://api.example.com/items/{item_id}",
+            method="get",
+            description=f"示例API工具{i}",
+            headers=[{"key": "Authorization", "value": "Bearer token"}],
+            parameters=[
+                {
+                    "name": f"param_{j}" if j else "item_id",
+                    "in": "path" if j == 0 else "query",
+                    "description": f"参数{j}",
+                    "required": j == 0,
+                    "type": "str",
+                }
+                for j in range(PARAMETERS_PER_TOOL)
+            ],
+        )
+        for i in range(TOOLS_PER_APP)
+    ]
+
+
+def run(name: str, tool_entities: list[ToolEntity], use_cache: bool) -> None:
+    """模拟多次调试会话构建工具的过程并输出单次会话的耗时"""
+    manager = ApiProvidersManager()
+    start = time.perf_counter()
+    for _ in range(CHAT_ROUNDS):
+        if not use_cache:
+            api_tool_cache.clear()
+        [manager.get_tool(tool_entity) for tool_entity in tool_entities]
+    elapsed = time.perf_counter() - start
+    print(f"{name}: 单次会话构建工具耗时 {elapsed / CHAT_ROUNDS * 1000:.3f}ms")
+
+
+def main() -> None:
+    tool_entities = build_tool_entities()
+    run("每次重新编译", tool_entities, use_cache=False)
+    run("缓存编译好的工具", tool_entities, use_cache=True)
+    print(f"缓存统计: {api_tool_cache.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import json
+import time
+import uuid
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from internal.core.agent.agents import FunctionCallAgent, configure_tool_concurrency
+from internal.core.agent.entities.agent_entity import AgentConfig
+from internal.core.agent.entities.queue_entity import QueueEvent
+
+
+class MemoryQueueManager:
+    """将事件记录在列表中的队列管理器"""
+
+    def __init__(self):
+        self.agent_thoughts = []
+
+    def publish(self, task_id, agent_thought) -> None:
+        self.agent_thoughts.append(agent_thought)
+
+
+@tool
+def fast_tool(query: str) -> str:
+    """立即返回的工具"""
+    return f"fast:{query}"
+
+
+@tool
+def slow_tool(query: str) -> str:
+    """执行时间超过超时时间的工具"""
+    time.sleep(1)
+    return f"slow:{query}"
+
+
+def run_tools_node(tool_names: list[str], timeout: float = 0.2) -> tuple[list, list]:
+    """使用指定的工具调用执行工具节点，返回工具结果以及提交的事件"""
+    agent = FunctionCallAgent(
+        llm=None,
+        agent_config=AgentConfig(
+            user_id=uuid.uuid4(),
+            tools=[fast_tool, slow_tool],
+            tool_call_timeout=timeout,
+        ),
+    )
+    queue_manager = MemoryQueueManager()
+    agent._agent_queue_manager = queue_manager
+    tool_calls = [
+        {"id": f"call_{index}", "name": name, "args": {"query": str(index)}}
+        for index, name in enumerate(tool_names)
+    ]
+    result = agent._tools_node(
+        {"task_id": uuid.uuid4(), "messages": [AIMessage("", tool_calls=tool_calls)]}
+    )
+    return [
+        json.loads(message.content) for message in result["messages"]
+    ], queue_manager.agent_thoughts
+
+
+class TestFunctionCallAgent:
+    """TestFunctionCallAgent class."""
+
+    def teardown_method(self):
+        configure_tool_concurrency(max_workers=8, max_inflight=32)
+
+    def test_tools_node_bounds_step_and_process_concurrency(self):
+        # 1.步骤线程均被超时的工具占用时，排队的工具调用直接记为超时，不会无限等待
+        configure_tool_concurrency(max_workers=1, max_inflight=32)
+        start = time.perf_counter()
+        results, _ = run_tools_node(["slow_tool", "fast_tool"])
+        assert time.perf_counter() - start < 0.5
+        assert results[0].startswith("工具执行超时")
+        assert results[1].startswith("工具执行超时: 等待执行")
+
+        # 2.进程内执行名额被仍未结束的超时工具占用时，新的工具调用直接返回错误
+        configure_tool_concurrency(max_workers=8, max_inflight=1)
+        results, _ = run_tools_node(["slow_tool"])
+        assert results[0].startswith("工具执行超时")
+        results, agent_thoughts = run_tools_node(["fast_tool"])
+        assert results[0].startswith("工具执行出错: 当前执行中的工具调用过多")
+        assert len(agent_thoughts) == 1
+
+        # 3.超时的工具结束后释放名额
+        time.sleep(1)
+        assert run_tools_node(["fast_tool"])[0] == ["fast:0"]
+
+    def test_tools_node_runs_tools_in_parallel_with_per_tool_timeout(self):
+        agent = FunctionCallAgent(
+            llm=None,
+            agent_config=AgentConfig(
+                user_id=uuid.uuid4(),
+                tools=[fast_tool, slow_tool],
+                tool_call_timeout=0.2,
+            ),
+        )
+        queue_manager = MemoryQueueManager()
+        agent._agent_queue_manager = queue_manager
+        tool_calls = [
+            {"id": "call_0", "name": "slow_tool", "args": {"query": "a"}},
+            {"id": "call_1", "name": "fast_tool", "args": {"query": "b"}},
+        ]
+
+        start = time.perf_counter()
+        result = agent._tools_node(
+            {
+                "task_id": uuid.uuid4(),
+                "messages": [AIMessage("", tool_calls=tool_calls)],
+            }
+        )
+
+        assert time.perf_counter() - start < 0.5
+        assert [message.tool_call_id for message in result["messages"]] == [
+            "call_0",
+            "call_1",
+        ]
+        assert json.loads(result["messages"][0].content).startswith("工具执行超时")
+        assert json.loads(result["messages"][1].content) == "fast:b"
+        assert [t.tool for t in queue_manager.agent_thoughts] == [
+            "fast_tool",
+            "slow_tool",
+        ]
+        assert all(
+            t.event == QueueEvent.AGENT_ACTION for t in queue_manager.agent_thoughts
+        )
@@ -0,0 +1,56 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, create_autospec
+
+from redis import Redis
+
+from internal.entity.dataset_entity import DocumentBatchStatus, DocumentStatus
+from internal.service.document_service import DocumentService
+
+
+class TestDocumentService:
+    """TestDocumentService class."""
+
+    @classmethod
+    def _create_service(cls, statuses: list[str], progress: dict) -> DocumentService:
+        account = SimpleNamespace(id=uuid.uuid4())
+        documents = [SimpleNamespace(status=status) for status in statuses]
+        db = MagicMock()
+        db.session.query.return_value.get.return_value = SimpleNamespace(
+            account_id=account.id
+        )
+        db.session.query.return_value.filter.return_value.order_by.return_value.all.return_value = (
+            documents
+        )
+        redis_client = create_autospec(Redis, instance=True)
+        redis_client.hgetall.return_value = progress
+        service = DocumentService(db=db, redis_client=redis_client)
+        service.account = account
+        return service
+
+    def test_get_batch_progress_from_cache(self):
+        service = self._create_service(
+            [DocumentStatus.PARSING] * 3,
+            {
+                b"total_count": b"3",
+                b"processed_count": b"2",
+                b"subtask_count": b"3",
+                b"status": DocumentBatchStatus.PROCESSING.encode(),
+            },
+        )
+
+        progress = service.get_batch_progress(uuid.uuid4(), "batch", service.account)
+        assert progress["total_count"] == 3
+        assert progress["processed_count"] == 2
+        assert progress["subtask_count"] == 3
+        assert progress["status"] == DocumentBatchStatus.PROCESSING
+
+    def test_get_batch_progress_from_documents(self):
+        service = self._create_service(
+            [DocumentStatus.COMPLETED, DocumentStatus.ERROR], {}
+        )
+
+        progress = service.get_batch_progress(uuid.uuid4(), "batch", service.account)
+        assert progress["total_count"] == 2
+        assert progress["processed_count"] == 2
+        assert progress["status"] == DocumentBatchStatus.COMPLETED
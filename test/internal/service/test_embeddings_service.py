@@ -0,0 +1,77 @@
+from unittest.mock import create_autospec, patch
+
+from langchain_core.embeddings import Embeddings
+from flask import Flask
+from redis import Redis
+
+from config import Config
+from internal.lib.helper import generate_text_hash
+from internal.service.embeddings_service import (
+    BatchEmbeddingEngine,
+    EmbeddingsService,
+    EMBEDDINGS_MODEL_NAME,
+)
+
+
+class CountingEmbeddings(Embeddings):
+    """记录调用次数的文本嵌入模型，向量为文本长度"""
+
+    def __init__(self):
+        self.texts = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.texts.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+def create_redis() -> Redis:
+    """创建模拟的redis客户端，键值存储在字典中"""
+    data = {}
+    redis = create_autospec(Redis, instance=True)
+    redis.mget.side_effect = lambda keys: [data.get(key) for key in keys]
+    pipeline = redis.pipeline.return_value
+    pipeline.set.side_effect = lambda key, value, **kwargs: data.update({key: value})
+    redis.data = data
+    return redis
+
+
+class TestEmbeddingsService:
+    """TestEmbeddingsService class."""
+
+    def test_construct_and_cache_by_content_hash(self):
+        embeddings = CountingEmbeddings()
+        redis = create_redis()
+        with patch(
+            "internal.service.embeddings_service.HuggingFaceEmbeddings",
+            return_value=embeddings,
+        ):
+            service = EmbeddingsService(redis)
+
+        assert service.cache_backed_embeddings.embed_documents(["a", "bb"]) == [
+            [1.0],
+            [2.0],
+        ]
+        assert service.cache_backed_embeddings.embed_documents(["bb"]) == [[2.0]]
+        assert embeddings.texts == ["a", "bb"]
+        assert (
+            f"embeddings:{EMBEDDINGS_MODEL_NAME}/{generate_text_hash('a')}"
+            in redis.data
+        )
+
+        # 根据应用配置设置查询向量缓存与批量嵌入引擎
+        app = Flask(__name__)
+        app.config.from_object(Config())
+        app.config["EMBEDDING_MAX_BATCH_SIZE"] = 8
+        service.init_app(app)
+        assert service._query_cache.max_size == app.config["EMBEDDING_QUERY_CACHE_SIZE"]
+        assert service._engine.max_batch_size == 8
+
+    def test_batch_engine_embeds_duplicate_texts_once(self):
+        embeddings = CountingEmbeddings()
+        engine = BatchEmbeddingEngine(embeddings, max_wait_time=0.05)
+
+        assert engine.embed_documents(["a", "bb", "a"]) == [[1.0], [2.0], [1.0]]
+        assert sorted(embeddings.texts) == ["a", "bb"]
@@ -0,0 +1,50 @@
+import time
+import uuid
+from unittest.mock import MagicMock, create_autospec, patch
+
+from flask import Flask
+from redis import Redis
+
+from internal.service import keyword_table_service as module
+from internal.service.keyword_table_service import KeywordTable, KeywordTableService
+
+
+def wait_for_refresh(dataset_id: uuid.UUID) -> None:
+    """等待后台加载任务完成"""
+    deadline = time.monotonic() + 2
+    while str(dataset_id) in module._loading_datasets:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class TestKeywordTableService:
+    """TestKeywordTableService class."""
+
+    def test_load_in_background_and_never_serve_stale_table(self):
+        dataset_id, version = uuid.uuid4(), {"value": b"1"}
+        redis = create_autospec(Redis, instance=True)
+        redis.mget.side_effect = lambda keys: [version["value"]]
+        redis.get.side_effect = lambda key: version["value"]
+        service = KeywordTableService(db=MagicMock(), redis_client=redis)
+
+        def load(dataset_id, version):
+            time.sleep(0.05)
+            keyword_table = KeywordTable(version=version)
+            module.keyword_table_cache.set(str(dataset_id), keyword_table)
+            return keyword_table
+
+        with Flask(__name__).app_context(), patch.object(
+            module, "KEYWORD_TABLE_REFRESH_INTERVAL", 0
+        ), patch.object(service, "_load_keyword_table", side_effect=load) as loader:
+            # 1.尚未加载时返回None，由数据库计算，同时在后台加载
+            assert service.get_keyword_tables([dataset_id]) is None
+            wait_for_refresh(dataset_id)
+            assert service.get_keyword_tables([dataset_id])[0].version == 1
+
+            # 2.版本变化后不再返回旧版本，多次检索只触发一次后台加载
+            version["value"] = b"2"
+            for _ in range(5):
+                assert service.get_keyword_tables([dataset_id]) is None
+            wait_for_refresh(dataset_id)
+            assert service.get_keyword_tables([dataset_id])[0].version == 2
+            assert loader.call_count == 2
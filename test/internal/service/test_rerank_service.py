@@ -0,0 +1,30 @@
+import time
+from unittest.mock import MagicMock, patch
+
+from langchain_core.documents import Document as LCDocument
+
+from internal.service.rerank_service import RerankService
+
+
+class TestRerankService:
+    """TestRerankService class."""
+
+    def test_fall_back_until_model_is_warmed_up(self):
+        service = RerankService()
+        lc_documents = [LCDocument(page_content=text) for text in ["a", "bb", "ccc"]]
+
+        # 1.模型尚未加载时立即返回None，并且只触发一次后台加载
+        with patch.object(service, "_load_model") as load_model:
+            assert service.rerank("q", lc_documents, 2, 0.5) is None
+            assert service.rerank("q", lc_documents, 2, 0.5) is None
+            deadline = time.monotonic() + 2
+            while not load_model.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert load_model.call_count == 1
+
+        # 2.模型加载完成后按照得分排序
+        service._model = MagicMock()
+        service._model.predict.return_value = [0.1, 0.9, 0.5]
+        result = service.rerank("q", lc_documents, 2, 0.5)
+        assert [d.page_content for d in result] == ["bb", "ccc"]
+        assert result[0].metadata["rerank_score"] == 0.9
@@ -0,0 +1,36 @@
+import uuid
+from unittest.mock import create_autospec
+
+from langchain_core.documents import Document as LCDocument
+from redis import Redis
+
+from internal.entity.cache_entity import (
+    DATASET_CONTENT_VERSION,
+    KEYWORD_TABLE_VERSION,
+)
+from internal.service.retrieval_cache_service import RetrievalCacheService
+
+
+class TestRetrievalCacheService:
+    """TestRetrievalCacheService class."""
+
+    def test_any_version_change_invalidates_cached_result(self):
+        dataset_id, versions = uuid.uuid4(), {}
+        redis = create_autospec(Redis, instance=True)
+        redis.mget.side_effect = lambda keys: [versions.get(key) for key in keys]
+        service = RetrievalCacheService(redis_client=redis)
+
+        cache_key, lc_documents = service.get([dataset_id], "query", k=4)
+        assert lc_documents is None
+        service.set(cache_key, [LCDocument(page_content="segment")])
+        assert service.get([dataset_id], " QUERY ", k=4)[1][0].page_content == "segment"
+
+        # 1.只变更关键词表时缓存同样失效
+        versions[KEYWORD_TABLE_VERSION.format(dataset_id=dataset_id)] = b"1"
+        assert service.get([dataset_id], "query", k=4)[1] is None
+
+        # 2.知识库内容变更时缓存失效
+        cache_key, _ = service.get([dataset_id], "query", k=4)
+        service.set(cache_key, [LCDocument(page_content="segment")])
+        versions[DATASET_CONTENT_VERSION.format(dataset_id=dataset_id)] = b"1"
+        assert service.get([dataset_id], "query", k=4)[1] is None
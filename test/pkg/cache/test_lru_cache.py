@@ -0,0 +1,32 @@
+import time
+
+from pkg.cache import LRUCache
+
+
+class TestLRUCache:
+    """TestLRUCache class."""
+
+    def test_evict_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert "b" not in cache
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.stats["evictions"] == 1
+
+    def test_memory_budget(self):
+        cache = LRUCache(max_bytes=100)
+        assert cache.set("a", 1, 60)
+        assert cache.set("b", 2, 60)
+        assert "a" not in cache
+        assert not cache.set("c", 3, 200)
+        assert cache.stats["bytes"] == 60
+
+    def test_ttl(self):
+        cache = LRUCache(ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+        assert cache.stats["misses"] == 1